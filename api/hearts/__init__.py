@@ -3,6 +3,8 @@ from flask import Flask
 from flask_cors import CORS
 from flask_socketio import SocketIO
 
+from hearts import db_pool, hub_monitor, metrics
+from hearts.auth_utils import hash_pool_stats
 from hearts.extensions import db, limiter
 from flask_migrate import Migrate
 
@@ -20,13 +22,28 @@ app.config["SQLALCHEMY_DATABASE_URI"] = os.environ.get(
     "DATABASE_URL", "sqlite:///hearts.db"
 )
 app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+app.config["SQLALCHEMY_ENGINE_OPTIONS"] = db_pool.engine_options(
+    app.config["SQLALCHEMY_DATABASE_URI"]
+)
+db_pool.install_green_wait_callback()
+app.config["RATELIMIT_ENABLED"] = os.environ.get("RATELIMIT_ENABLED", "1") != "0"
 app.config["FRONTEND_URL"] = os.environ.get("FRONTEND_URL", "http://localhost:3000")
+app.config["GAME_RESULT_RETENTION_MONTHS"] = max(
+    1, int(os.environ.get("GAME_RESULT_RETENTION_MONTHS", "3"))
+)
+app.config["EMAIL_TRANSPORT"] = os.environ.get("EMAIL_TRANSPORT", "smtp2go")
+app.config["EMAIL_QUEUE_WORKER"] = os.environ.get("EMAIL_QUEUE_WORKER", "1") != "0"
+app.config["EMAIL_RETENTION_DAYS"] = max(
+    1, int(os.environ.get("EMAIL_RETENTION_DAYS", "7"))
+)
 app.config["SMTP2GO_API_KEY"] = os.environ.get("SMTP2GO_API_KEY", "")
 app.config["SMTP2GO_FROM_EMAIL"] = os.environ.get(
     "SMTP2GO_FROM_EMAIL", "noreply@shmem.dev"
 )
 
 db.init_app(app)
+metrics.init_app(app)
+metrics.init_socketio(socketio)
 migrate = Migrate(app, db)
 limiter.init_app(app)
 CORS(app, origins=_cors_origins)
@@ -40,6 +57,8 @@ from hearts.lobby_routes import lobby_bp  # noqa: E402
 from hearts.lobby_socket import register_lobby_socket  # noqa: E402
 from hearts.multiplayer_socket import register_multiplayer_socket  # noqa: E402
 from hearts.leaderboard_routes import leaderboard_bp  # noqa: E402
+from hearts import email_queue  # noqa: E402
+from hearts.ai import opening_book  # noqa: E402
 
 app.register_blueprint(auth_bp)
 app.register_blueprint(games_bp)
@@ -51,7 +70,54 @@ register_game_socket(socketio)
 register_lobby_socket(socketio)
 register_multiplayer_socket(socketio)
 
+# Drain mail queued before a restart without waiting for a new enqueue().
+app.before_request(email_queue.ensure_worker)
+app.before_request(hub_monitor.ensure_started)
+
+# Map the hard AI's opening book (if configured) at startup, not on first use.
+opening_book.get_book()
+
+
+metrics.gauges_from_stats(
+    "hearts_db_pool",
+    "Database connection pool",
+    lambda: db_pool.pool_stats(db.engine),
+    keys=(
+        "checkouts",
+        "checkout_timeouts",
+        "connects",
+        "checkout_seconds_total",
+        "size",
+        "checked_out",
+        "overflow",
+    ),
+    counters=("checkouts", "checkout_timeouts", "connects", "checkout_seconds_total"),
+)
+metrics.gauges_from_stats(
+    "hearts_password_hash",
+    "Password hashing pool",
+    hash_pool_stats,
+    keys=("in_flight", "waiting", "completed", "wait_seconds_total"),
+    counters=("completed", "wait_seconds_total"),
+)
+metrics.gauge(
+    "hearts_email_queue",
+    "Outbound emails by status",
+    lambda: {(status,): n for status, n in email_queue.queue_stats().items()},
+    ("status",),
+)
+
+
+@app.route("/metrics")
+def metrics_endpoint():
+    return app.response_class(metrics.render(), content_type=metrics.CONTENT_TYPE)
+
 
 @app.route("/health")
 def health():
-    return {"status": "ok"}, 200
+    return {
+        "status": "ok",
+        "password_hashing": hash_pool_stats(),
+        "db_pool": db_pool.pool_stats(db.engine),
+        "event_loop": hub_monitor.stats(),
+    }, 200
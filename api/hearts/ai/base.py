@@ -3,15 +3,21 @@ Abstract strategy interfaces for Hearts AI. Engine calls these; no I/O.
 """
 
 from abc import ABC, abstractmethod
-from typing import List
+from typing import TYPE_CHECKING, List, Optional
 
 from hearts.game.card import Card
 from hearts.game.state import GameState, PassDirection
 
+if TYPE_CHECKING:
+    from hearts.ai.profiling import DecisionProfiler
+
 
 class PassStrategy(ABC):
     """Choose exactly 3 cards to pass. Caller ensures hand has 13+ cards."""
 
+    # Set per game by hearts.ai.profiling.open_profiler; None means off.
+    profiler: Optional["DecisionProfiler"] = None
+
     @abstractmethod
     def choose_cards_to_pass(
         self,
@@ -25,6 +31,8 @@ class PassStrategy(ABC):
 class PlayStrategy(ABC):
     """Choose one card to play from legal_plays. Caller provides state and legal list."""
 
+    profiler: Optional["DecisionProfiler"] = None
+
     @abstractmethod
     def choose_play(
         self,
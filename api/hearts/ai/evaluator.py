@@ -0,0 +1,272 @@
+"""
+Static evaluation of a mid-round position: each player's expected final round
+points, so the hard AI can stop a rollout after a few tricks instead of
+playing the round out.
+
+The model is linear: for every player, a handful of features of a fully
+dealt position at a trick boundary (points still out, who holds Q♠ and the
+spades above it, hearts and high cards in hand, voids, who leads) are
+weighted into the points that player will still take.  Predictions are
+clipped at zero and scaled so the players share exactly the points still
+out.
+
+Weights are fitted by least squares on positions from medium-strategy
+self-play (the hard AI's rollout policy) and stored as a small JSON file
+next to this module::
+
+    python -m hearts.ai.evaluator train -o hearts/ai/evaluator_weights.json
+    python -m hearts.ai.evaluator score hearts/ai/evaluator_weights.json
+"""
+
+import argparse
+import json
+import os
+import random
+import time
+from typing import Iterator, List, Optional, Sequence, Tuple
+
+from hearts.game.card import QUEEN_OF_SPADES_RANK, Card, Suit
+from hearts.game.state import GameState
+
+DEFAULT_WEIGHTS = os.path.join(os.path.dirname(__file__), "evaluator_weights.json")
+
+FEATURES = (
+    "bias",
+    "hearts_out",
+    "queen_out",
+    "holds_queen",
+    "queen_short",
+    "spades_over_queen",
+    "hearts",
+    "high_hearts",
+    "high_cards",
+    "low_cards",
+    "voids",
+    "leads",
+)
+
+_QS = Card(Suit.SPADES, QUEEN_OF_SPADES_RANK)
+_HEARTS = tuple(Card(Suit.HEARTS, r) for r in range(2, 15))
+
+
+def features(state: GameState, player_index: int) -> List[float]:
+    """Feature vector (in FEATURES order) for *player_index* in *state*.
+
+    *state* must be fully dealt (e.g. a determinized world) and between
+    tricks.
+    """
+    hand = state.hands[player_index]
+    hearts_out = 13 - sum(1 for c in _HEARTS if state.is_played(c))
+    queen_out = not state.is_played(_QS)
+    holds_queen = _QS in hand
+    spades = hearts = high_hearts = high_cards = low_cards = 0
+    over_queen = 0
+    suits = set()
+    for c in hand:
+        suits.add(c.suit)
+        if c.suit == Suit.HEARTS:
+            hearts += 1
+            if c.rank >= 10:
+                high_hearts += 1
+        elif c.rank > 10:
+            high_cards += 1
+        if c.rank <= 5:
+            low_cards += 1
+        if c.suit == Suit.SPADES:
+            spades += 1
+            if c.rank > QUEEN_OF_SPADES_RANK:
+                over_queen += 1
+    return [
+        1.0,
+        float(hearts_out),
+        float(queen_out),
+        float(holds_queen),
+        float(holds_queen and spades <= 3),
+        float(over_queen if queen_out and not holds_queen else 0),
+        float(hearts),
+        float(high_hearts),
+        float(high_cards),
+        float(low_cards),
+        float(4 - len(suits)),
+        float(state.whose_turn == player_index),
+    ]
+
+
+class Evaluator:
+    """Linear estimate of each player's points still to come."""
+
+    def __init__(self, weights: Sequence[float]) -> None:
+        if len(weights) != len(FEATURES):
+            raise ValueError(f"Expected {len(FEATURES)} weights, got {len(weights)}")
+        self.weights = tuple(float(w) for w in weights)
+
+    def remaining_points(self, state: GameState) -> List[float]:
+        """Points each player will still take this round."""
+        out = 13 - sum(1 for c in _HEARTS if state.is_played(c))
+        if not state.is_played(_QS):
+            out += 13
+        if out == 0:
+            return [0.0] * 4
+        weights = self.weights
+        raw = [
+            max(0.0, sum(w * x for w, x in zip(weights, features(state, j))))
+            for j in range(4)
+        ]
+        total = sum(raw)
+        if total == 0:
+            return [out / 4.0] * 4
+        return [out * r / total for r in raw]
+
+    def estimate(self, state: GameState) -> Tuple[float, ...]:
+        """Expected final ``round_scores`` from *state*."""
+        return tuple(
+            s + r for s, r in zip(state.round_scores, self.remaining_points(state))
+        )
+
+    @classmethod
+    def load(cls, path: str) -> "Evaluator":
+        with open(path) as f:
+            data = json.load(f)
+        if tuple(data["features"]) != FEATURES:
+            raise ValueError(f"{path} was trained on different features")
+        return cls(data["weights"])
+
+    def save(self, path: str, **meta) -> None:
+        data = {"features": list(FEATURES), "weights": list(self.weights), **meta}
+        tmp = path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(data, f, indent=2)
+            f.write("\n")
+        os.replace(tmp, path)
+
+
+_evaluator: Optional[Evaluator] = None
+
+
+def get_evaluator() -> Evaluator:
+    """The evaluator shipped with the package, loaded on first use."""
+    global _evaluator
+    if _evaluator is None:
+        _evaluator = Evaluator.load(DEFAULT_WEIGHTS)
+    return _evaluator
+
+
+def reset_evaluator() -> None:
+    """For tests only: forget the loaded evaluator."""
+    global _evaluator
+    _evaluator = None
+
+
+# ---------------------------------------------------------------------------
+# Training
+# ---------------------------------------------------------------------------
+
+
+def _positions(rounds: int, seed: int) -> Iterator[Tuple[GameState, Tuple[int, ...]]]:
+    """Every trick boundary after the first trick of *rounds* medium
+    self-play rounds, with that round's final ``round_scores``."""
+    from hearts.ai import selfplay
+    from hearts.ai.medium_ai import MediumPassStrategy, MediumPlayStrategy
+
+    rng = random.Random(seed)
+    seats = [(MediumPassStrategy(rng=rng), MediumPlayStrategy(rng=rng))] * 4
+    for n in range(rounds):
+        positions: List[GameState] = []
+
+        def on_play(state, player, legal, card):
+            if not state.current_trick and state.tricks_completed:
+                positions.append(state)
+
+        final = selfplay.play_round(selfplay.deal(rng, n % 4 + 1), seats, on_play)
+        for state in positions:
+            yield state, final.round_scores
+
+
+def collect(rounds: int, seed: int = 0) -> Tuple[List[List[float]], List[float]]:
+    """Features and points still to come for every player at every trick
+    boundary after the first trick of *rounds* self-play rounds."""
+    rows: List[List[float]] = []
+    targets: List[float] = []
+    for state, final in _positions(rounds, seed):
+        for j in range(4):
+            rows.append(features(state, j))
+            targets.append(float(final[j] - state.round_scores[j]))
+    return rows, targets
+
+
+def fit(
+    rows: List[List[float]], targets: List[float], ridge: float = 1e-3
+) -> List[float]:
+    """Least-squares weights (lightly ridge-regularized) for *rows* -> *targets*."""
+    k = len(rows[0])
+    ata = [[0.0] * k for _ in range(k)]
+    atb = [0.0] * k
+    for x, y in zip(rows, targets):
+        for i in range(k):
+            xi = x[i]
+            if xi:
+                atb[i] += xi * y
+                row = ata[i]
+                for j in range(k):
+                    row[j] += xi * x[j]
+    # The bias (feature 0) is not penalized.
+    for i in range(1, k):
+        ata[i][i] += ridge * len(rows)
+    return _solve(ata, atb)
+
+
+def _solve(a: List[List[float]], b: List[float]) -> List[float]:
+    """Solve a x = b by Gaussian elimination with partial pivoting."""
+    n = len(b)
+    m = [row[:] + [b[i]] for i, row in enumerate(a)]
+    for col in range(n):
+        pivot = max(range(col, n), key=lambda r: abs(m[r][col]))
+        m[col], m[pivot] = m[pivot], m[col]
+        for r in range(col + 1, n):
+            f = m[r][col] / m[col][col]
+            for c in range(col, n + 1):
+                m[r][c] -= f * m[col][c]
+    x = [0.0] * n
+    for r in range(n - 1, -1, -1):
+        x[r] = (m[r][n] - sum(m[r][c] * x[c] for c in range(r + 1, n))) / m[r][r]
+    return x
+
+
+def mean_absolute_error(evaluator: Evaluator, rounds: int, seed: int = 1) -> float:
+    """Error of the final-score estimates on fresh self-play positions."""
+    error = 0.0
+    count = 0
+    for state, final in _positions(rounds, seed):
+        for est, actual in zip(evaluator.estimate(state), final):
+            error += abs(est - actual)
+            count += 1
+    return error / max(count, 1)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Train or score the evaluator")
+    sub = parser.add_subparsers(dest="command", required=True)
+    train = sub.add_parser("train", help="fit weights from self-play")
+    train.add_argument("-o", "--output", default=DEFAULT_WEIGHTS)
+    train.add_argument("--rounds", type=int, default=5000)
+    train.add_argument("--seed", type=int, default=0)
+    score = sub.add_parser("score", help="mean absolute error on fresh rounds")
+    score.add_argument("weights", nargs="?", default=DEFAULT_WEIGHTS)
+    score.add_argument("--rounds", type=int, default=500)
+    args = parser.parse_args(argv)
+
+    if args.command == "train":
+        started = time.perf_counter()
+        rows, targets = collect(args.rounds, args.seed)
+        evaluator = Evaluator(fit(rows, targets))
+        evaluator.save(args.output, rounds=args.rounds, seed=args.seed)
+        elapsed = time.perf_counter() - started
+        print(f"fitted {len(rows)} positions in {elapsed:.0f}s -> {args.output}")
+    else:
+        evaluator = Evaluator.load(args.weights)
+        mae = mean_absolute_error(evaluator, args.rounds)
+        print(f"{args.weights}: mean absolute error {mae:.2f} points")
+
+
+if __name__ == "__main__":
+    main()
@@ -6,7 +6,20 @@ from typing import Optional, Tuple
 from hearts.ai.base import PassStrategy, PlayStrategy
 from hearts.ai.random_ai import RandomPassStrategy, RandomPlayStrategy
 from hearts.ai.medium_ai import MediumPassStrategy, MediumPlayStrategy
-from hearts.ai.hard_ai import HardPassStrategy, HardPlayStrategy
+from hearts.ai.hard_ai import ROLLOUT_TRICKS, HardPassStrategy, HardPlayStrategy
+from hearts.ai import opening_book
+
+# Levels a game can be started with.
+DIFFICULTIES = ("easy", "medium", "hard", "harder", "hardest")
+
+
+def normalize_difficulty(difficulty) -> str:
+    """*difficulty* stripped and lowercased; ValueError unless that is one of
+    DIFFICULTIES (or it is not a string)."""
+    level = difficulty.strip().lower() if isinstance(difficulty, str) else None
+    if level not in DIFFICULTIES:
+        raise ValueError(f"Unknown difficulty: {difficulty!r}")
+    return level
 
 
 def create_strategies(
@@ -15,8 +28,9 @@ def create_strategies(
 ) -> Tuple[PassStrategy, PlayStrategy]:
     """Return (PassStrategy, PlayStrategy) for the given difficulty level.
 
-    Valid levels: ``"easy"``, ``"medium"``, ``"hard"``, ``"harder"``,
-    ``"hardest"``.
+    Valid levels are DIFFICULTIES. The hard levels share the process-wide
+    opening book (AI_OPENING_BOOK), if one is configured, and cut their
+    rollouts short with the packaged evaluator.
     """
     difficulty = difficulty.lower().strip()
 
@@ -25,12 +39,26 @@ def create_strategies(
     if difficulty == "medium":
         return MediumPassStrategy(rng=rng), MediumPlayStrategy(rng=rng)
     if difficulty == "hard":
-        return HardPassStrategy(rng=rng), HardPlayStrategy(rng=rng, num_worlds=50)
+        return HardPassStrategy(rng=rng), HardPlayStrategy(
+            rng=rng,
+            num_worlds=50,
+            book=opening_book.get_book(),
+            rollout_tricks=ROLLOUT_TRICKS,
+        )
     if difficulty == "harder":
-        return HardPassStrategy(rng=rng), HardPlayStrategy(rng=rng, num_worlds=100)
+        return HardPassStrategy(rng=rng), HardPlayStrategy(
+            rng=rng,
+            num_worlds=100,
+            book=opening_book.get_book(),
+            rollout_tricks=ROLLOUT_TRICKS,
+        )
     if difficulty == "hardest":
-        return HardPassStrategy(rng=rng), HardPlayStrategy(rng=rng, num_worlds=150)
-
+        return HardPassStrategy(rng=rng), HardPlayStrategy(
+            rng=rng,
+            num_worlds=150,
+            book=opening_book.get_book(),
+            rollout_tricks=ROLLOUT_TRICKS,
+        )
     raise ValueError(
         f"Unknown difficulty: {difficulty!r}. "
         "Use 'easy', 'medium', 'hard', 'harder', or 'hardest'."
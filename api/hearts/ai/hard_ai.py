@@ -8,123 +8,227 @@ picks the move with the lowest expected score.
 
 import random
 from collections import defaultdict
+from dataclasses import replace
+from functools import partial
 from itertools import combinations
-from typing import Dict, List, Optional, Set, Tuple
+from math import comb
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
 
 from hearts.game.card import Card, Suit, QUEEN_OF_SPADES_RANK, deck_52
-from hearts.game.state import GameState, PassDirection
-from hearts.game.rules import get_legal_plays
-from hearts.game.transitions import apply_play, _is_first_lead, _is_first_trick_of_round
+from hearts.game.state import GameState, PassDirection, pass_target
+from hearts.game.transitions import apply_play_unchecked
 
 from hearts.ai.base import PassStrategy, PlayStrategy
+from hearts.ai.evaluator import Evaluator, get_evaluator
 from hearts.ai.medium_ai import MediumPlayStrategy
+from hearts.ai.profiling import TimedPlayStrategy
+from hearts.metrics import AI_ROLLOUTS
+
+if TYPE_CHECKING:
+    from hearts.ai.opening_book import OpeningBook
 
 _QS = Card(Suit.SPADES, QUEEN_OF_SPADES_RANK)
-_ALL_CARDS = set(deck_52())
+_DECK = tuple(deck_52())
 
 NUM_DETERMINIZATIONS = 50
+# Tricks the hard levels roll out before the evaluator takes over.
+ROLLOUT_TRICKS = 3
 
 
 # ---------------------------------------------------------------------------
-# Round tracker: observes voids from trick play
+# Determinization: deal unknown cards to opponents
 # ---------------------------------------------------------------------------
 
 
-class RoundTracker:
-    """Lightweight tracker for void information, reset each round.
-
-    Called at every ``choose_play`` invocation (shared strategy sees all AI
-    turns).  Detects when a player fails to follow suit and records the void.
+# Opponents are numbered 0-2 ("slots") in the sampler and sets of them are
+# bitmasks 1-7.  _SUPERSETS[m] lists the sets containing m, _WITH_SLOT[k] the
+# sets containing slot k, and _TIGHT[k, m] the sets that lose one unit of
+# slack when a card allowed to *m* is given to slot k.
+_SLOT_SETS = range(1, 8)
+_SUPERSETS = {m: tuple(s for s in _SLOT_SETS if s & m == m) for m in _SLOT_SETS}
+_WITH_SLOT = tuple(tuple(s for s in _SLOT_SETS if s >> k & 1) for k in range(3))
+_TIGHT = {
+    (k, m): tuple(s for s in _WITH_SLOT[k] if s & m != m)
+    for m in _SLOT_SETS
+    for k in range(3)
+    if m >> k & 1
+}
+
+
+def _deal_constrained(
+    cards: List[Card],
+    allowed: List[int],
+    need: List[int],
+    hands: List[List[Card]],
+    rng: random.Random,
+) -> None:
+    """Deal *cards* into *hands* so slot k gets need[k] and every card goes to
+    a slot in ``allowed[card.suit]``.
+
+    A deal exists iff, for every set S of slots, the cards allowed only in S
+    fit in S (Hall's condition); ``slack[S]`` tracks that margin.  Each card
+    goes to a random slot, weighted by remaining need, among those that keep
+    every slack non-negative, so one pass always completes the deal.
     """
-
-    def __init__(self) -> None:
-        self._round: int = -1
-        self._known_voids: Dict[int, Set[Suit]] = {}
-
-    def observe(self, state: GameState) -> None:
-        if state.round != self._round:
-            self._round = state.round
-            self._known_voids = {i: set() for i in range(4)}
-
-        trick = state.current_trick
-        if len(trick) >= 2:
-            lead_suit = trick[0][1].suit
-            for pi, card in trick[1:]:
-                if card.suit != lead_suit:
-                    self._known_voids.setdefault(pi, set()).add(lead_suit)
-
-    @property
-    def known_voids(self) -> Dict[int, Set[Suit]]:
-        return {k: set(v) for k, v in self._known_voids.items()}
-
-
-# ---------------------------------------------------------------------------
-# Determinization: deal unknown cards to opponents
-# ---------------------------------------------------------------------------
+    slack = [0] * 8
+    for s in _SLOT_SETS:
+        slack[s] = sum(need[k] for k in range(3) if s >> k & 1)
+    for card in cards:
+        for s in _SUPERSETS[allowed[card.suit]]:
+            slack[s] -= 1
+    if min(slack[1:]) < 0:
+        raise ValueError("No deal is consistent with the known voids")
+
+    for card in cards:
+        m = allowed[card.suit]
+        choices = [
+            k
+            for k in range(3)
+            if m >> k & 1 and need[k] and all(slack[s] for s in _TIGHT[k, m])
+        ]
+        pick = rng.random() * sum(need[k] for k in choices)
+        for k in choices:
+            pick -= need[k]
+            if pick < 0:
+                break
+        hands[k].append(card)
+        need[k] -= 1
+        for s in _WITH_SLOT[k]:
+            slack[s] -= 1
+        for s in _SUPERSETS[m]:
+            slack[s] += 1
 
 
 def _determinize(
     state: GameState,
     player_index: int,
-    voids: Dict[int, Set[Suit]],
     rng: random.Random,
 ) -> GameState:
     """Build a plausible state by randomly assigning unknown cards to opponents.
 
-    Respects known void constraints (best-effort).  The AI's own hand and the
-    current trick remain unchanged.
+    Only uses what *player_index* has seen: unknown cards are those neither in
+    their hand nor played this round, each opponent keeps their hand size, no
+    opponent gets a suit in ``state.known_voids``, and cards *player_index*
+    passed this round stay with the receiver until played.  The AI's own hand
+    and the current trick remain unchanged.
     """
-    my_hand = set(state.hands[player_index])
-    trick_cards = {card for _, card in state.current_trick}
-    unknown = list(_ALL_CARDS - my_hand - trick_cards)
+    opponents = [j for j in range(4) if j != player_index]
+    need = [len(state.hands[j]) for j in opponents]
+    hands: List[List[Card]] = [[], [], []]
+
+    hidden = ~state.played_mask
+    for card in state.hands[player_index]:
+        hidden &= ~(1 << card.index)
+
+    receiver = pass_target(player_index, state.pass_direction)
+    if receiver != player_index:
+        slot = opponents.index(receiver)
+        for card in state.passed_cards[player_index]:
+            if hidden >> card.index & 1:
+                hidden &= ~(1 << card.index)
+                hands[slot].append(card)
+                need[slot] -= 1
+
+    unknown = [c for c in _DECK if hidden >> c.index & 1]
     rng.shuffle(unknown)
 
-    my_hand_size = len(state.hands[player_index])
-    trick_players = {pi for pi, _ in state.current_trick}
-    opponents = [j for j in range(4) if j != player_index]
+    voids = [state.known_voids[j] for j in opponents]
+    allowed = [sum(1 << k for k in range(3) if suit not in voids[k]) for suit in Suit]
+    if any(voids):
+        _deal_constrained(unknown, allowed, need, hands, rng)
+    else:
+        start = 0
+        for k in range(3):
+            hands[k].extend(unknown[start : start + need[k]])
+            start += need[k]
+
+    new_hands = list(state.hands)
+    for k, j in enumerate(opponents):
+        new_hands[j] = tuple(hands[k])
+    return replace(state, hands=tuple(new_hands))
+
+
+# ---------------------------------------------------------------------------
+# World pool: sampled worlds kept across one seat's plays in a round
+# ---------------------------------------------------------------------------
 
-    sizes: Dict[int, int] = {}
-    for j in opponents:
-        sizes[j] = my_hand_size - 1 if j in trick_players else my_hand_size
-
-    # Deal to most-constrained opponents first
-    opp_order = sorted(
-        opponents,
-        key=lambda j: len(voids.get(j, set())),
-        reverse=True,
-    )
-
-    dealt: Dict[int, List[Card]] = {}
-    used: Set[Card] = set()
-
-    for j in opp_order:
-        void_suits = voids.get(j, set())
-        eligible = [c for c in unknown if c not in used and c.suit not in void_suits]
-        need = sizes[j]
-        if len(eligible) < need:
-            # Relax constraint if not satisfiable (very rare)
-            eligible = [c for c in unknown if c not in used]
-        dealt[j] = eligible[:need]
-        used.update(dealt[j])
-
-    new_hands: List[List[Card]] = [[] for _ in range(4)]
-    new_hands[player_index] = list(state.hands[player_index])
-    for j in opponents:
-        new_hands[j] = dealt[j]
-
-    return GameState(
-        round=state.round,
-        phase=state.phase,
-        pass_direction=state.pass_direction,
-        hands=tuple(tuple(h) for h in new_hands),
-        current_trick=state.current_trick,
-        whose_turn=state.whose_turn,
-        scores=state.scores,
-        round_scores=state.round_scores,
-        hearts_broken=state.hearts_broken,
-        game_over=state.game_over,
-        winner_index=state.winner_index,
-    )
+
+Hands = Tuple[Tuple[Card, ...], ...]
+
+
+def _same_round(state: GameState, round_num: int, played_mask: int) -> bool:
+    """Whether *state* is later in round *round_num* than a position where
+    *played_mask* had been played."""
+    return state.round == round_num and state.played_mask & played_mask == played_mask
+
+
+def _still_consistent(
+    hands: Hands,
+    state: GameState,
+    player_index: int,
+) -> Optional[Hands]:
+    """*hands*, sampled earlier this round, brought up to *state*; None if
+    what was played since rules them out.
+
+    Every card played since must have been played by the player the world
+    gave it to (``state.played_by``), so each opponent is left with exactly
+    their current hand size; and nobody may still hold a suit they have
+    shown out of.
+    """
+    played = state.played_mask
+    new_hands = list(state.hands)
+    for j in range(4):
+        if j == player_index:
+            continue
+        by_j = state.played_by[j]
+        kept = []
+        for c in hands[j]:
+            if not played >> c.index & 1:
+                kept.append(c)
+            elif not by_j >> c.index & 1:
+                return None
+        if len(kept) != len(state.hands[j]):
+            return None
+        voids = state.known_voids[j]
+        if voids and any(c.suit in voids for c in kept):
+            return None
+        new_hands[j] = tuple(kept)
+    return tuple(new_hands)
+
+
+class _WorldPool:
+    """One seat's sampled worlds for the current round."""
+
+    __slots__ = ("round", "played_mask", "worlds")
+
+    def __init__(self, state: GameState) -> None:
+        self.round = state.round
+        self.played_mask = state.played_mask
+        self.worlds: List[Hands] = []
+
+    def refresh(
+        self,
+        state: GameState,
+        player_index: int,
+        size: int,
+        rng: random.Random,
+        determinize=_determinize,
+    ) -> int:
+        """Drop the worlds *state* contradicts, bring the rest up to *state*
+        and top up to *size* with new samples; return how many were kept."""
+        worlds = []
+        for hands in self.worlds:
+            hands = _still_consistent(hands, state, player_index)
+            if hands is not None:
+                worlds.append(hands)
+                if len(worlds) == size:
+                    break
+        kept = len(worlds)
+        while len(worlds) < size:
+            worlds.append(determinize(state, player_index, rng).hands)
+        self.worlds = worlds
+        self.played_mask = state.played_mask
+        return kept
 
 
 # ---------------------------------------------------------------------------
@@ -274,41 +378,45 @@ def _moon_score(
 # ---------------------------------------------------------------------------
 
 
+def _legal_plays(state: GameState) -> Tuple[Card, ...]:
+    return state.legal_plays
+
+
 def _simulate_remaining(
     state: GameState,
     rollout: PlayStrategy,
-) -> Tuple[int, ...]:
-    """Play out remaining tricks, return final ``round_scores``."""
-    while True:
-        total_cards = sum(len(state.hands[i]) for i in range(4))
-        if total_cards == 0:
-            break
-
-        player = state.whose_turn
-        hand = state.hand(player)
-        if not hand:
-            break
-
-        trick = state.trick_list()
-        first_lead = _is_first_lead(state, hand)
-        legal = get_legal_plays(
-            hand,
-            trick,
-            state.hearts_broken,
-            first_lead_of_round=first_lead,
-            first_trick=_is_first_trick_of_round(state),
-        )
+    legal_fn=_legal_plays,
+    play_fn=apply_play_unchecked,
+    stop_after: Optional[int] = None,
+    evaluator: Optional[Evaluator] = None,
+) -> Tuple[float, ...]:
+    """Play out remaining tricks, return final ``round_scores``.
+
+    With *stop_after*, the rollout stops once that many tricks of the round
+    are complete and returns *evaluator*'s estimate of the final scores.
+
+    The rollout policy picks from ``state.legal_plays``, so plays are applied
+    unchecked. *legal_fn* and *play_fn* are only replaced by the profiler.
+    """
+    while state.hands[state.whose_turn]:
+        if (
+            stop_after is not None
+            and state.tricks_completed >= stop_after
+            and not state.current_trick
+        ):
+            return evaluator.estimate(state)
+        legal = legal_fn(state)
         if not legal:
             break
-
+        player = state.whose_turn
         card = rollout.choose_play(state, player, legal)
-        state = apply_play(state, player, card)
+        state = play_fn(state, player, card)
 
     return state.round_scores
 
 
 def _evaluate_round_scores(
-    scores: Tuple[int, ...],
+    scores: Tuple[float, ...],
     player_index: int,
 ) -> float:
     """Convert raw round_scores into the effective score for *player_index*.
@@ -386,6 +494,8 @@ class HardPassStrategy(PassStrategy):
                 best_pass = list(combo)
 
         assert best_pass is not None
+        if self.profiler is not None:
+            self.profiler.count(combinations=comb(len(hand), 3))
         return best_pass
 
 
@@ -397,23 +507,51 @@ class HardPassStrategy(PassStrategy):
 class HardPlayStrategy(PlayStrategy):
     """Determinized Monte Carlo: sample possible worlds, simulate, pick best.
 
+    Every candidate move is played out in the same *num_worlds* worlds.  The
+    worlds are kept for the seat's next play in the round: those still
+    consistent with what has been played since are reused and the pool is
+    topped up with fresh samples, so less sampling is needed as the round
+    goes on.
+
     When the hand or round state suggests moon potential, a parallel set of
     simulations uses a moon-seeking rollout.  The move with the lowest expected
     score across *either* strategy wins, so the bot naturally pivots to (or
     away from) a moon attempt based on what the simulations show.
+
+    With an opening *book*, covered early-round decisions it has an entry for
+    are answered from the book without searching.
+
+    With *rollout_tricks*, normal rollouts stop once that many more tricks
+    (counting the one in progress) are complete and the rest of the round
+    is estimated by *evaluator* (the packaged one by default).  Moon rollouts always play
+    the round out: the estimate cannot see a moon coming.
+
+    With a profiler attached, the search helpers are swapped for timed
+    wrappers for the decision (phases ``determinize``, ``apply_play``,
+    ``rollout`` and, inside rollouts, ``legal_plays``, ``apply_play`` and
+    ``policy``).
     """
 
     def __init__(
         self,
         rng: Optional[random.Random] = None,
         num_worlds: int = NUM_DETERMINIZATIONS,
+        book: Optional["OpeningBook"] = None,
+        rollout_tricks: Optional[int] = None,
+        evaluator: Optional[Evaluator] = None,
     ) -> None:
         self._rng = rng or random.Random()
         self._num_worlds = num_worlds
-        self._tracker = RoundTracker()
+        self._book = book
+        self._rollout_tricks = rollout_tricks
+        if rollout_tricks is not None and evaluator is None:
+            evaluator = get_evaluator()
+        self._evaluator = evaluator
         # Separate RNG for rollout so it doesn't perturb the main RNG
         self._rollout = MediumPlayStrategy(rng=random.Random(42))
         self._moon_strategy = _MoonSeekingPlayStrategy(rng=random.Random(43))
+        # One pool per seat: the runner drives every AI seat with one strategy.
+        self._pools: Dict[int, _WorldPool] = {}
 
     def choose_play(
         self,
@@ -426,14 +564,18 @@ class HardPlayStrategy(PlayStrategy):
         if len(legal_plays) == 1:
             return legal_plays[0]
 
-        self._tracker.observe(state)
-        voids = self._tracker.known_voids
+        if self._book is not None:
+            card = self._book.choose(state, player_index, legal_plays)
+            if card is not None:
+                if self.profiler is not None:
+                    self.profiler.count(book_hits=1)
+                return card
 
         hand = state.hand(player_index)
         try_moon = (
             _moon_score(hand, state.round_scores, player_index) >= _MOON_THRESHOLD
         )
-        moon_rollout: Optional[_MoonAwareRollout] = None
+        moon_rollout: Optional[PlayStrategy] = None
         if try_moon:
             moon_rollout = _MoonAwareRollout(
                 player_index,
@@ -441,26 +583,61 @@ class HardPlayStrategy(PlayStrategy):
                 self._moon_strategy,
             )
 
+        determinize = _determinize
+        play = apply_play_unchecked
+        simulate = _simulate_remaining
+        rollout: PlayStrategy = self._rollout
+        profiler = self.profiler
+        if profiler is not None:
+            determinize = profiler.timed("determinize", _determinize)
+            play = profiler.timed("apply_play", apply_play_unchecked)
+            simulate = profiler.timed(
+                "rollout",
+                partial(
+                    _simulate_remaining,
+                    legal_fn=profiler.timed("rollout;legal_plays", _legal_plays),
+                    play_fn=profiler.timed("rollout;apply_play", apply_play_unchecked),
+                ),
+            )
+            rollout = TimedPlayStrategy(rollout, profiler, "rollout;policy")
+            if moon_rollout is not None:
+                moon_rollout = TimedPlayStrategy(
+                    moon_rollout, profiler, "rollout;policy"
+                )
+
+        cutoff = {}
+        if self._rollout_tricks is not None:
+            cutoff = {
+                "stop_after": state.tricks_completed + self._rollout_tricks,
+                "evaluator": self._evaluator,
+            }
+
+        pool = self._pools.get(player_index)
+        if pool is None or not _same_round(state, pool.round, pool.played_mask):
+            pool = self._pools[player_index] = _WorldPool(state)
+        reused = pool.refresh(
+            state, player_index, self._num_worlds, self._rng, determinize
+        )
+        worlds = [replace(state, hands=hands) for hands in pool.worlds]
+
         best_card = legal_plays[0]
         best_avg = float("inf")
 
         for card in legal_plays:
             total_score = 0.0
 
-            for _ in range(self._num_worlds):
-                sim_state = _determinize(state, player_index, voids, self._rng)
-                sim_state = apply_play(sim_state, player_index, card)
-                final_scores = _simulate_remaining(sim_state, self._rollout)
+            for world in worlds:
+                sim_state = play(world, player_index, card)
+                final_scores = simulate(sim_state, rollout, **cutoff)
                 total_score += _evaluate_round_scores(final_scores, player_index)
 
             avg = total_score / self._num_worlds
 
             if moon_rollout is not None:
                 total_moon = 0.0
-                for _ in range(self._num_worlds):
-                    sim_state = _determinize(state, player_index, voids, self._rng)
-                    sim_state = apply_play(sim_state, player_index, card)
-                    final_scores = _simulate_remaining(sim_state, moon_rollout)
+                for world in worlds:
+                    sim_state = play(world, player_index, card)
+                    final_scores = simulate(sim_state, moon_rollout)
                     total_moon += _evaluate_round_scores(final_scores, player_index)
                 avg = min(avg, total_moon / self._num_worlds)
 
@@ -468,4 +645,10 @@ class HardPlayStrategy(PlayStrategy):
                 best_avg = avg
                 best_card = card
 
+        rollouts = len(legal_plays) * self._num_worlds * (2 if moon_rollout else 1)
+        AI_ROLLOUTS.inc(rollouts)
+        if profiler is not None:
+            profiler.count(
+                worlds=self._num_worlds, worlds_reused=reused, rollouts=rollouts
+            )
         return best_card
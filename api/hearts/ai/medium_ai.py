@@ -177,7 +177,4 @@ def _qs_maybe_out(hand: List[Card], state: GameState) -> bool:
     """True if QS might still be lurking in an opponent's hand."""
     if _QS in hand:
         return False
-    # If any player already took 13+ round points, QS was likely played
-    if any(s >= 13 for s in state.round_scores):
-        return False
-    return True
+    return not state.is_played(_QS)
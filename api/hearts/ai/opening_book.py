@@ -0,0 +1,372 @@
+"""
+Opening book for the hard AI: precomputed decisions for frequent early-round
+situations, so the Monte Carlo search is skipped where the answer is known.
+
+Covered situations (forced plays never reach the book; choose_play returns a
+lone legal card straight away):
+
+- first trick, following the 2♣ lead: seat in the trick, the high club so
+  far, Q♠ held, number of clubs (5 means 5+), top club and top club that
+  still loses to the high club;
+- first trick, void in clubs: seat, Q♠ held and, for diamonds and spades,
+  the count (3 means 3+) and whether a queen or better is held;
+- the lead to the second trick: hearts broken, Q♠/K♠/A♠ held and, per suit,
+  the count (4 means 4+) and whether the lowest card is a 5 or below.
+
+Keys are deliberately coarse so that they recur. Actions are relative to the
+hand ("lowest/highest legal card of suit S", "highest card that ducks the
+trick") or, failing that, an exact card. An entry that names no legal card
+in the current hand is a miss and the search runs as usual; the agreement
+threshold below keeps keys that do not pin down the search's choice out of
+the book.
+
+The book is built offline from self-play: hard-AI seats play the opening of
+many random deals, every covered decision is recorded, and only keys seen
+``min_visits`` times whose most common action has at least ``min_share`` of
+the votes are kept::
+
+    python -m hearts.ai.opening_book build -o book.bin --deals 20000
+    python -m hearts.ai.opening_book stats book.bin
+
+File format: a 16-byte header (magic, record count) followed by records of an
+8-byte key hash and a 1-byte action, sorted by hash. The file is mapped
+read-only and binary searched in place, so it costs no heap and its pages are
+shared with any other process mapping it.
+
+- AI_OPENING_BOOK: path to the book; the hard AI searches every move when unset
+"""
+
+import argparse
+import hashlib
+import logging
+import mmap
+import os
+import random
+import struct
+import time
+from collections import Counter, defaultdict
+from typing import Dict, Iterable, List, Optional, Sequence
+
+from hearts.game.card import QUEEN_OF_SPADES_RANK, Card, Suit
+from hearts.game.state import GameState
+from hearts.metrics import counter
+
+from hearts.ai.base import PlayStrategy
+
+logger = logging.getLogger(__name__)
+
+AI_BOOK_LOOKUPS = counter(
+    "hearts_ai_book_lookups_total",
+    "Opening-book lookups by the hard AI in covered situations",
+    ("result",),
+)
+
+_MAGIC = b"HRTBOOK1"
+_HEADER = struct.Struct(">8sII")
+_RECORD = struct.Struct(">QB")
+
+_QS = Card(Suit.SPADES, QUEEN_OF_SPADES_RANK)
+
+# Situation tags (first byte of a key)
+FIRST_TRICK_FOLLOW = 1
+FIRST_TRICK_DISCARD = 2
+SECOND_TRICK_LEAD = 3
+
+# Actions 0-51 are exact cards (Card.index); the rest are relative to the hand.
+_BY_SUIT = 64  # + suit * 2 (+ 1 for the highest legal card of the suit)
+_DUCK = 72  # highest legal card below the trick's current winner
+
+
+# -----------------------------------------------------------------------------
+# Keys and actions
+# -----------------------------------------------------------------------------
+
+
+def _ranks_by_suit(hand: Iterable[Card]) -> Dict[Suit, List[int]]:
+    ranks: Dict[Suit, List[int]] = {suit: [] for suit in Suit}
+    for c in hand:
+        ranks[c.suit].append(c.rank)
+    return ranks
+
+
+def situation_key(
+    state: GameState, player_index: int, legal_plays: Sequence[Card]
+) -> Optional[bytes]:
+    """Canonical key for a covered situation, or None."""
+    if len(legal_plays) < 2:
+        return None
+    trick = state.current_trick
+    hand = state.hands[player_index]
+    ranks = _ranks_by_suit(hand)
+    if state.tricks_completed == 0 and trick:
+        qs = _QS in hand
+        clubs = ranks[Suit.CLUBS]
+        if clubs:
+            high = _trick_high(trick)
+            below = max((r for r in clubs if r < high), default=0)
+            key = [FIRST_TRICK_FOLLOW, len(trick), high, qs, min(len(clubs), 5)]
+            return bytes([*key, max(clubs), below])
+        shape = []
+        for suit in (Suit.DIAMONDS, Suit.SPADES):
+            shape += [min(len(ranks[suit]), 3), max(ranks[suit], default=0) >= 12]
+        return bytes([FIRST_TRICK_DISCARD, len(trick), qs, *shape])
+    if state.tricks_completed == 1 and not trick:
+        spade_danger = max(ranks[Suit.SPADES], default=0) >= QUEEN_OF_SPADES_RANK
+        shape = []
+        for suit in Suit:
+            shape += [min(len(ranks[suit]), 4), min(ranks[suit], default=15) <= 5]
+        return bytes([SECOND_TRICK_LEAD, state.hearts_broken, spade_danger, *shape])
+    return None
+
+
+def _trick_high(trick) -> int:
+    lead_suit = trick[0][1].suit
+    return max(c.rank for _, c in trick if c.suit == lead_suit)
+
+
+def _duck(legal_plays: Sequence[Card], trick) -> Optional[Card]:
+    """Highest legal card in the lead suit that loses to the trick so far."""
+    if not trick:
+        return None
+    lead_suit, high = trick[0][1].suit, _trick_high(trick)
+    below = [c for c in legal_plays if c.suit == lead_suit and c.rank < high]
+    return max(below, key=lambda c: c.rank) if below else None
+
+
+def encode_action(card: Card, legal_plays: Sequence[Card], trick: Sequence = ()) -> int:
+    """Action byte for playing *card* from *legal_plays* into *trick*."""
+    in_suit = [c.rank for c in legal_plays if c.suit == card.suit]
+    if card.rank == max(in_suit):
+        return _BY_SUIT + card.suit * 2 + 1
+    if card.rank == min(in_suit):
+        return _BY_SUIT + card.suit * 2
+    if card == _duck(legal_plays, trick):
+        return _DUCK
+    return card.index
+
+
+def decode_action(
+    action: int, legal_plays: Sequence[Card], trick: Sequence = ()
+) -> Optional[Card]:
+    """The legal card *action* names, or None if it names none."""
+    if action < _BY_SUIT:
+        for c in legal_plays:
+            if c.index == action:
+                return c
+        return None
+    if action == _DUCK:
+        return _duck(legal_plays, trick)
+    suit, highest = divmod(action - _BY_SUIT, 2)
+    in_suit = [c for c in legal_plays if c.suit == suit]
+    if not in_suit:
+        return None
+    pick = max if highest else min
+    return pick(in_suit, key=lambda c: c.rank)
+
+
+def _key_hash(key: bytes) -> int:
+    return int.from_bytes(hashlib.blake2b(key, digest_size=8).digest(), "big")
+
+
+# -----------------------------------------------------------------------------
+# Book file
+# -----------------------------------------------------------------------------
+
+
+class OpeningBook:
+    """Read-only, memory-mapped book file."""
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        with open(path, "rb") as fh:
+            self._mm = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            magic, count, _reserved = _HEADER.unpack_from(self._mm, 0)
+        except struct.error:
+            self._mm.close()
+            raise ValueError(f"{path}: not an opening book")
+        if magic != _MAGIC or len(self._mm) != _HEADER.size + count * _RECORD.size:
+            self._mm.close()
+            raise ValueError(f"{path}: not an opening book")
+        self._count = count
+
+    def __len__(self) -> int:
+        return self._count
+
+    def lookup(self, key: bytes) -> Optional[int]:
+        """Action byte stored for *key*, or None."""
+        target = _key_hash(key)
+        lo, hi = 0, self._count
+        mm, unpack, size = self._mm, _RECORD.unpack_from, _RECORD.size
+        while lo < hi:
+            mid = (lo + hi) // 2
+            h, action = unpack(mm, _HEADER.size + mid * size)
+            if h < target:
+                lo = mid + 1
+            elif h > target:
+                hi = mid
+            else:
+                return action
+        return None
+
+    def choose(
+        self, state: GameState, player_index: int, legal_plays: Sequence[Card]
+    ) -> Optional[Card]:
+        """Book card for this decision, or None to search."""
+        key = situation_key(state, player_index, legal_plays)
+        if key is None:
+            return None
+        action = self.lookup(key)
+        card = None
+        if action is not None:
+            card = decode_action(action, legal_plays, state.current_trick)
+        AI_BOOK_LOOKUPS.labels("hit" if card is not None else "miss").inc()
+        return card
+
+    def close(self) -> None:
+        self._mm.close()
+
+
+def write_book(path: str, entries: Dict[bytes, int]) -> int:
+    """Write *entries* (key -> action) to *path* atomically; returns the count."""
+    records = sorted((_key_hash(key), action) for key, action in entries.items())
+    tmp = f"{path}.tmp"
+    with open(tmp, "wb") as fh:
+        fh.write(_HEADER.pack(_MAGIC, len(records), 0))
+        for h, action in records:
+            fh.write(_RECORD.pack(h, action))
+    os.replace(tmp, path)
+    return len(records)
+
+
+_book: Optional[OpeningBook] = None
+_loaded = False
+
+
+def get_book() -> Optional[OpeningBook]:
+    """The process-wide book from AI_OPENING_BOOK (mapped on first call)."""
+    global _book, _loaded
+    if not _loaded:
+        _loaded = True
+        path = os.environ.get("AI_OPENING_BOOK")
+        if path:
+            try:
+                _book = OpeningBook(path)
+                logger.info("opening_book: mapped %d entries from %s", len(_book), path)
+            except (OSError, ValueError):
+                logger.exception("opening_book: could not load %s", path)
+    return _book
+
+
+def reset_opening_book() -> None:
+    """Unmap the process-wide book. For tests only."""
+    global _book, _loaded
+    if _book is not None:
+        _book.close()
+    _book = None
+    _loaded = False
+
+
+# -----------------------------------------------------------------------------
+# Generation
+# -----------------------------------------------------------------------------
+
+
+class _BookRecorder(PlayStrategy):
+    """Searches covered situations and records the choice; plays quickly elsewhere."""
+
+    def __init__(self, search: PlayStrategy, quick: PlayStrategy) -> None:
+        self.search = search
+        self.quick = quick
+        self.votes: Dict[bytes, Counter] = defaultdict(Counter)
+
+    def choose_play(
+        self, state: GameState, player_index: int, legal_plays: List[Card]
+    ) -> Card:
+        key = situation_key(state, player_index, legal_plays)
+        if key is None:
+            return self.quick.choose_play(state, player_index, legal_plays)
+        card = self.search.choose_play(state, player_index, legal_plays)
+        action = encode_action(card, legal_plays, state.current_trick)
+        self.votes[key][action] += 1
+        return card
+
+
+def select_entries(
+    votes: Dict[bytes, Counter], min_visits: int, min_share: float
+) -> Dict[bytes, int]:
+    """Keep keys seen *min_visits* times whose top action has *min_share*."""
+    entries: Dict[bytes, int] = {}
+    for key, counts in votes.items():
+        total = sum(counts.values())
+        action, n = counts.most_common(1)[0]
+        if total >= min_visits and n >= min_share * total:
+            entries[key] = action
+    return entries
+
+
+def generate(
+    deals: int,
+    num_worlds: int = 50,
+    seed: int = 0,
+    min_visits: int = 8,
+    min_share: float = 0.8,
+) -> Dict[bytes, int]:
+    """Self-play the opening of *deals* random deals and return book entries.
+
+    Every seat passes like the hard AI and searches (without a book) in
+    covered situations; other plays use the rollout policy. Only the first
+    trick and the lead to the second are played.
+    """
+    from hearts.ai import selfplay
+    from hearts.ai.hard_ai import HardPassStrategy, HardPlayStrategy
+    from hearts.ai.medium_ai import MediumPlayStrategy
+
+    rng = random.Random(seed)
+    recorder = _BookRecorder(
+        HardPlayStrategy(rng=rng, num_worlds=num_worlds),
+        MediumPlayStrategy(rng=rng),
+    )
+    seats = [(HardPassStrategy(rng=rng), recorder)] * 4
+    for n in range(deals):
+        # Cycle pass directions like a real game.
+        state = selfplay.play_round(selfplay.deal(rng, n % 4 + 1), seats, tricks=1)
+        leader = state.whose_turn
+        recorder.choose_play(state, leader, list(state.legal_plays))
+    return select_entries(recorder.votes, min_visits, min_share)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Build or inspect an opening book")
+    sub = parser.add_subparsers(dest="command", required=True)
+    build = sub.add_parser("build", help="generate a book from self-play")
+    build.add_argument("-o", "--output", required=True)
+    build.add_argument("--deals", type=int, default=20000)
+    build.add_argument("--worlds", type=int, default=50)
+    build.add_argument("--seed", type=int, default=0)
+    build.add_argument("--min-visits", type=int, default=8)
+    build.add_argument("--min-share", type=float, default=0.8)
+    stats = sub.add_parser("stats", help="print a book's size")
+    stats.add_argument("book")
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        started = time.perf_counter()
+        entries = generate(
+            args.deals,
+            num_worlds=args.worlds,
+            seed=args.seed,
+            min_visits=args.min_visits,
+            min_share=args.min_share,
+        )
+        count = write_book(args.output, entries)
+        elapsed = time.perf_counter() - started
+        print(f"{count} entries from {args.deals} deals in {elapsed:.0f}s")
+    else:
+        book = OpeningBook(args.book)
+        print(f"{args.book}: {len(book)} entries, {os.path.getsize(args.book)} bytes")
+        book.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,292 @@
+"""
+Opt-in per-decision profiling for AI strategies.
+
+A DecisionProfiler records one DecisionRecord per AI pass or play: wall time,
+time per phase, and counters such as worlds sampled, legal moves and rollouts.
+Phases are ``;``-separated paths, so ``rollout;legal_plays`` is time spent in
+legal-move generation inside a rollout. Records export as Chrome trace JSON (open in
+chrome://tracing or Perfetto) or as folded stacks for flamegraph.pl /
+speedscope.
+
+Profiling is chosen per game when the game is created:
+
+- AI_PROFILE_DIR: directory for profiles; profiling is off when unset
+- AI_PROFILE_SAMPLE_RATE: fraction of new games to profile (default 1.0)
+
+A profiled game stores its profile id in the runner state and appends each
+decision to ``<AI_PROFILE_DIR>/<id>.jsonl``. Convert one with::
+
+    python -m hearts.ai.profiling <id>.jsonl --format chrome -o trace.json
+    python -m hearts.ai.profiling <id>.jsonl --format folded -o stacks.folded
+
+Disabled costs nothing in the search itself: strategies read ``profiler`` once
+per decision and, when it is None, run with the undecorated helpers.
+"""
+
+import argparse
+import contextlib
+import json
+import logging
+import os
+import random
+import time
+from collections import defaultdict, deque
+from dataclasses import asdict, dataclass, field
+from typing import Any, Callable, Deque, Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+_NULL_CONTEXT = contextlib.nullcontext()
+
+
+@dataclass
+class DecisionRecord:
+    label: str
+    action: str
+    player_index: int
+    round: int
+    start_us: float
+    duration_s: float = 0.0
+    # phase path -> [seconds, calls]
+    phases: Dict[str, List[float]] = field(default_factory=dict)
+    counters: Dict[str, float] = field(default_factory=dict)
+
+
+class DecisionProfiler:
+    """Collects DecisionRecords for one game.
+
+    *sink* is called with each finished record (e.g. JsonlSink); the last
+    *max_records* are also kept in ``records``.
+    """
+
+    def __init__(
+        self,
+        label: str,
+        sink: Optional[Callable[[DecisionRecord], None]] = None,
+        max_records: int = 1000,
+    ) -> None:
+        self.label = label
+        self.sink = sink
+        self.records: Deque[DecisionRecord] = deque(maxlen=max_records)
+        self.current: Optional[DecisionRecord] = None
+
+    @contextlib.contextmanager
+    def decision(self, action: str, state, player_index: int, legal_moves: int):
+        record = DecisionRecord(
+            label=self.label,
+            action=action,
+            player_index=player_index,
+            round=state.round,
+            start_us=time.time() * 1e6,
+            counters={"legal_moves": legal_moves},
+        )
+        self.current = record
+        started = time.perf_counter()
+        try:
+            yield record
+        finally:
+            record.duration_s = time.perf_counter() - started
+            self.current = None
+            self.records.append(record)
+            if self.sink is not None:
+                try:
+                    self.sink(record)
+                except OSError:
+                    logger.exception("ai profiling: could not write record")
+
+    def timed(self, path: str, fn: Callable) -> Callable:
+        """Wrap *fn* so each call adds its duration to *path* on the open record."""
+        perf_counter = time.perf_counter
+
+        def _timed(*args, **kwargs):
+            started = perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                record = self.current
+                if record is not None:
+                    phase = record.phases.get(path)
+                    if phase is None:
+                        phase = record.phases[path] = [0.0, 0]
+                    phase[0] += perf_counter() - started
+                    phase[1] += 1
+
+        return _timed
+
+    def count(self, **counters: float) -> None:
+        """Add *counters* to the open record."""
+        record = self.current
+        if record is None:
+            return
+        for key, value in counters.items():
+            record.counters[key] = record.counters.get(key, 0) + value
+
+
+class TimedPlayStrategy:
+    """Stand-in for a rollout PlayStrategy whose choose_play is timed."""
+
+    def __init__(self, strategy, profiler: DecisionProfiler, path: str) -> None:
+        self.choose_play = profiler.timed(path, strategy.choose_play)
+
+
+def decision(
+    profiler: Optional[DecisionProfiler],
+    action: str,
+    state,
+    player_index: int,
+    legal_moves: int,
+):
+    """``profiler.decision(...)``, or a shared no-op context when not profiling."""
+    if profiler is None:
+        return _NULL_CONTEXT
+    return profiler.decision(action, state, player_index, legal_moves)
+
+
+# -----------------------------------------------------------------------------
+# Per-game configuration and storage
+# -----------------------------------------------------------------------------
+
+
+class JsonlSink:
+    """Append each record to *path* as one JSON line."""
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+
+    def __call__(self, record: DecisionRecord) -> None:
+        with open(self.path, "a", encoding="utf-8") as fh:
+            fh.write(json.dumps(asdict(record)) + "\n")
+
+
+def sample_game(game_id: str) -> Optional[str]:
+    """Profile id for a new game, or None if it should not be profiled."""
+    if not os.environ.get("AI_PROFILE_DIR"):
+        return None
+    rate = float(os.environ.get("AI_PROFILE_SAMPLE_RATE", "1.0"))
+    return game_id if random.random() < rate else None
+
+
+def open_profiler(
+    profile_id: Optional[str], label: str, *strategies
+) -> Optional[DecisionProfiler]:
+    """Attach a profiler writing to *profile_id*'s file to *strategies*.
+
+    Returns None (and leaves the strategies untouched) when *profile_id* is
+    None or AI_PROFILE_DIR has since been unset.
+    """
+    directory = os.environ.get("AI_PROFILE_DIR")
+    if profile_id is None or not directory:
+        return None
+    os.makedirs(directory, exist_ok=True)
+    safe_id = "".join(ch for ch in profile_id if ch.isalnum() or ch in "-_")
+    profiler = DecisionProfiler(
+        label, sink=JsonlSink(os.path.join(directory, f"{safe_id}.jsonl"))
+    )
+    for strategy in strategies:
+        strategy.profiler = profiler
+    return profiler
+
+
+def load_jsonl(path: str) -> List[DecisionRecord]:
+    with open(path, encoding="utf-8") as fh:
+        return [DecisionRecord(**json.loads(line)) for line in fh if line.strip()]
+
+
+# -----------------------------------------------------------------------------
+# Export
+# -----------------------------------------------------------------------------
+
+
+def _parent(path: str) -> str:
+    return path.rpartition(";")[0]
+
+
+def _self_seconds(record: DecisionRecord) -> Dict[str, float]:
+    """Exclusive time per stack ("" is the decision itself)."""
+    totals = {path: seconds for path, (seconds, _calls) in record.phases.items()}
+    exclusive = dict(totals)
+    exclusive[""] = record.duration_s
+    for path, seconds in totals.items():
+        parent = _parent(path)
+        if parent in exclusive:
+            exclusive[parent] -= seconds
+    return {path: max(0.0, seconds) for path, seconds in exclusive.items()}
+
+
+def to_folded(records: Iterable[DecisionRecord]) -> str:
+    """Folded stacks (``frame;frame;frame microseconds``) summed over *records*."""
+    totals: Dict[str, float] = defaultdict(float)
+    for record in records:
+        root = f"{record.label};{record.action}"
+        for path, seconds in _self_seconds(record).items():
+            totals[f"{root};{path}" if path else root] += seconds * 1e6
+    return "".join(
+        f"{stack} {round(us)}\n" for stack, us in sorted(totals.items()) if us >= 1
+    )
+
+
+def to_chrome_trace(records: Iterable[DecisionRecord]) -> Dict[str, Any]:
+    """Chrome trace JSON with one event per decision and per phase.
+
+    Phases are aggregates, so their events are laid end to end inside their
+    parent rather than at the times the calls actually happened.
+    """
+    events: List[Dict[str, Any]] = []
+    for record in records:
+        events.append(
+            {
+                "name": f"{record.label} {record.action}",
+                "cat": "decision",
+                "ph": "X",
+                "ts": record.start_us,
+                "dur": record.duration_s * 1e6,
+                "pid": 1,
+                "tid": record.player_index,
+                "args": {"round": record.round, **record.counters},
+            }
+        )
+        cursor: Dict[str, float] = {"": record.start_us}
+        by_depth = sorted(record.phases.items(), key=lambda kv: kv[0].count(";"))
+        for path, (seconds, calls) in by_depth:
+            parent = _parent(path)
+            if parent not in cursor:
+                continue
+            start = cursor[parent]
+            cursor[parent] = start + seconds * 1e6
+            cursor[path] = start
+            events.append(
+                {
+                    "name": path.rpartition(";")[2],
+                    "cat": "phase",
+                    "ph": "X",
+                    "ts": start,
+                    "dur": seconds * 1e6,
+                    "pid": 1,
+                    "tid": record.player_index,
+                    "args": {"calls": calls},
+                }
+            )
+    return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Convert an AI profile (.jsonl)")
+    parser.add_argument("profile")
+    parser.add_argument("--format", choices=("chrome", "folded"), default="chrome")
+    parser.add_argument("-o", "--output", default="-")
+    args = parser.parse_args(argv)
+
+    records = load_jsonl(args.profile)
+    if args.format == "chrome":
+        text = json.dumps(to_chrome_trace(records))
+    else:
+        text = to_folded(records)
+    if args.output == "-":
+        print(text, end="" if text.endswith("\n") else "\n")
+    else:
+        with open(args.output, "w", encoding="utf-8") as fh:
+            fh.write(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+"""
+Headless self-play: four AI seats play through the engine's transitions with
+no runner, persistence or I/O.
+
+Used offline to generate data from the AIs' own play (the opening book) and
+to compare strategies, reporting each seat's average score, wins and
+thinking time per play:
+
+    python -m hearts.ai.selfplay --seats hardest,hard,hard,hard --games 100
+"""
+
+import argparse
+import random
+import time
+from dataclasses import dataclass
+from typing import Callable, List, Optional, Sequence, Tuple
+
+from hearts.game.card import Card, deal_into_4_hands, deck_52, shuffle_deck
+from hearts.game.state import GameState, Phase
+from hearts.game.transitions import (
+    apply_passes,
+    apply_play,
+    apply_round_scoring,
+    deal_new_round,
+)
+
+from hearts.ai.base import PassStrategy, PlayStrategy
+
+Seat = Tuple[PassStrategy, PlayStrategy]
+# Called before each play with (state, player_index, legal_plays, chosen card).
+PlayObserver = Callable[[GameState, int, Sequence[Card], Card], None]
+
+
+@dataclass
+class GameResult:
+    scores: Tuple[int, ...]
+    rounds: int
+    winner_index: Optional[int]
+
+
+def deal(rng: random.Random, round_num: int = 1, scores=(0, 0, 0, 0)) -> GameState:
+    """A freshly shuffled round *round_num* (passing unless it is a hold round)."""
+    hands = deal_into_4_hands(shuffle_deck(deck_52(), rng))
+    return deal_new_round(tuple(scores), round_num, hands)
+
+
+def play_round(
+    state: GameState,
+    seats: Sequence[Seat],
+    on_play: Optional[PlayObserver] = None,
+    tricks: int = 13,
+) -> GameState:
+    """Pass (if needed) and play until *tricks* tricks are complete.
+
+    Returns the state before round scoring.
+    """
+    if state.phase == Phase.PASSING:
+        passes = [
+            seats[i][0].choose_cards_to_pass(state.hand(i), state.pass_direction)
+            for i in range(4)
+        ]
+        state = apply_passes(state, passes)
+    while state.tricks_completed < tricks:
+        player = state.whose_turn
+        legal = state.legal_plays
+        card = seats[player][1].choose_play(state, player, list(legal))
+        if on_play is not None:
+            on_play(state, player, legal, card)
+        state = apply_play(state, player, card)
+    return state
+
+
+def play_game(
+    seats: Sequence[Seat],
+    rng: random.Random,
+    on_play: Optional[PlayObserver] = None,
+    max_rounds: int = 100,
+) -> GameResult:
+    """Play one full game; seat i is player i."""
+    state = deal(rng)
+    while True:
+        state = apply_round_scoring(play_round(state, seats, on_play))
+        if state.game_over or state.round >= max_rounds:
+            break
+        state = deal(rng, state.round + 1, state.scores)
+    return GameResult(
+        scores=state.scores, rounds=state.round, winner_index=state.winner_index
+    )
+
+
+class _ClockedPlay(PlayStrategy):
+    """Totals the time a seat spends choosing plays."""
+
+    def __init__(self, strategy: PlayStrategy) -> None:
+        self.strategy = strategy
+        self.seconds = 0.0
+        self.plays = 0
+
+    def choose_play(
+        self,
+        state: GameState,
+        player_index: int,
+        legal_plays: List[Card],
+    ) -> Card:
+        started = time.perf_counter()
+        try:
+            return self.strategy.choose_play(state, player_index, legal_plays)
+        finally:
+            self.seconds += time.perf_counter() - started
+            self.plays += 1
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    from hearts.ai.factory import create_strategies
+
+    parser = argparse.ArgumentParser(description="Play AI-only games of Hearts")
+    parser.add_argument(
+        "--seats",
+        default="hard,medium,medium,medium",
+        help="comma-separated difficulty per seat",
+    )
+    parser.add_argument("--games", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    levels = [s.strip() for s in args.seats.split(",")]
+    if len(levels) != 4:
+        parser.error("--seats needs four difficulties")
+    rng = random.Random(args.seed)
+    seats = []
+    for level in levels:
+        pass_strategy, play_strategy = create_strategies(
+            level, rng=random.Random(rng.random())
+        )
+        seats.append((pass_strategy, _ClockedPlay(play_strategy)))
+
+    totals = [0] * 4
+    wins = [0] * 4
+    started = time.perf_counter()
+    for _ in range(args.games):
+        result = play_game(seats, rng)
+        for i in range(4):
+            totals[i] += result.scores[i]
+        if result.winner_index is not None and result.winner_index >= 0:
+            wins[result.winner_index] += 1
+    elapsed = time.perf_counter() - started
+
+    print(f"{args.games} games in {elapsed:.1f}s")
+    print(f"{'seat':>4} {'level':<8} {'avg score':>9} {'wins':>5} {'ms/play':>8}")
+    for i, level in enumerate(levels):
+        avg = totals[i] / max(args.games, 1)
+        clock = seats[i][1]
+        ms = clock.seconds * 1000 / max(clock.plays, 1)
+        print(f"{i:>4} {level:<8} {avg:>9.1f} {wins[i]:>5} {ms:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
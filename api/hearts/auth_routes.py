@@ -4,22 +4,27 @@ import jwt
 import secrets
 from flask import Blueprint, request, jsonify, g
 from datetime import datetime, timedelta
+from sqlalchemy.orm import joinedload
 
+from hearts import leaderboard, stats_cache
 from hearts.extensions import db, limiter
 from hearts.models import (
     User,
     UserStats,
     UserPreferences,
     ActiveGame,
+    DifficultyStats,
+    GameResult,
+    MonthlyResult,
     PasswordResetToken,
 )
-from hearts.auth_utils import hash_password, verify_password
+from hearts.auth_utils import hash_password, needs_rehash, verify_password
 from hearts.email_utils import (
     send_verification_email,
     send_password_reset_email,
     hash_token,
 )
-from hearts.jwt_utils import get_current_user, require_jwt
+from hearts.jwt_utils import forget_principal, get_current_user, require_jwt
 
 auth_bp = Blueprint("auth", __name__)
 
@@ -108,7 +113,11 @@ def login():
         return jsonify({"error": "Username and password required"}), 401
 
     try:
-        user = User.query.filter_by(username=username).first()
+        user = (
+            User.query.options(joinedload(User.preferences))
+            .filter_by(username=username)
+            .first()
+        )
     except Exception:
         return (
             jsonify({"error": "Unable to reach the server. Please try again later."}),
@@ -129,6 +138,10 @@ def login():
             403,
         )
 
+    if needs_rehash(user.password_hash):
+        user.password_hash = hash_password(password)
+        db.session.commit()
+
     secret = os.environ.get("JWT_SECRET")
     payload = {
         "sub": str(user.id),
@@ -507,6 +520,8 @@ def update_profile():
         return jsonify({"error": "No changes provided"}), 400
 
     db.session.commit()
+    forget_principal(user.id)
+    leaderboard.forget_user(user.id)
 
     if email_changed:
         send_verification_email(user.email, user.verification_token)
@@ -515,7 +530,7 @@ def update_profile():
 
 
 @auth_bp.route("/me", methods=["GET"])
-@require_jwt
+@require_jwt(options=[joinedload(User.preferences)])
 def me():
     return jsonify({"user": g.current_user.to_dict()}), 200
 
@@ -537,8 +552,15 @@ def delete_account():
     PasswordResetToken.query.filter_by(user_id=user.id).delete()
     ActiveGame.query.filter_by(user_id=user.id).delete()
     UserStats.query.filter_by(user_id=user.id).delete()
+    DifficultyStats.query.filter_by(user_id=user.id).delete()
+    GameResult.query.filter_by(user_id=user.id).delete()
+    MonthlyResult.query.filter_by(user_id=user.id).delete()
     UserPreferences.query.filter_by(user_id=user.id).delete()
+    user_id = user.id
     db.session.delete(user)
     db.session.commit()
+    forget_principal(user_id)
+    stats_cache.forget(user_id)
+    leaderboard.invalidate()
 
     return jsonify({"message": "Account deleted"}), 200
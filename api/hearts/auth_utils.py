@@ -1,16 +1,139 @@
+"""
+Password hashing.
+
+argon2 is deliberately slow and memory-hungry. Under the eventlet worker a
+hash computed inline would stall every greenthread (including all WebSocket
+traffic) for its full duration, so hashing runs in eventlet's native thread
+pool (argon2-cffi releases the GIL). A semaphore caps how many hashes run at
+once, which also bounds memory (each uses ARGON2_MEMORY_COST KiB); callers
+beyond the cap wait on the hub without blocking it.
+
+Cost parameters come from the environment so each deployment can tune them:
+
+- ARGON2_TIME_COST, ARGON2_MEMORY_COST (KiB), ARGON2_PARALLELISM
+- ARGON2_MAX_CONCURRENCY: hashes allowed to run at once
+
+Existing hashes made with other parameters keep verifying; login rehashes
+them (see needs_rehash).
+"""
+
+import os
+import time
+from typing import Callable, Dict, TypeVar
+
 from argon2 import PasswordHasher
-from argon2.exceptions import VerifyMismatchError
+from argon2.exceptions import InvalidHashError, VerifyMismatchError
+
+T = TypeVar("T")
+
+
+def _env_int(name: str, default: int) -> int:
+    value = os.environ.get(name, "").strip()
+    return int(value) if value else default
+
+
+_defaults = PasswordHasher()
+_hasher = PasswordHasher(
+    time_cost=_env_int("ARGON2_TIME_COST", _defaults.time_cost),
+    memory_cost=_env_int("ARGON2_MEMORY_COST", _defaults.memory_cost),
+    parallelism=_env_int("ARGON2_PARALLELISM", _defaults.parallelism),
+)
+
+MAX_CONCURRENCY = max(
+    1, _env_int("ARGON2_MAX_CONCURRENCY", min(4, os.cpu_count() or 1))
+)
+
+
+class _HashPool:
+    """Runs hashing calls off the hub, at most ``MAX_CONCURRENCY`` at a time.
+
+    Falls back to calling inline when eventlet has not monkey-patched the
+    process (tests, ``flask run``), where there is no hub to protect.
+    """
 
-_hasher = PasswordHasher()
+    def __init__(self, size: int) -> None:
+        self.size = size
+        self._semaphore = None
+        self.waiting = 0
+        self.in_flight = 0
+        self.completed = 0
+        self.wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+        self.run_seconds = 0.0
+
+    def _offload(self) -> bool:
+        try:
+            from eventlet import patcher
+        except ImportError:
+            return False
+        return patcher.is_monkey_patched("thread")
+
+    def run(self, fn: Callable[..., T], *args) -> T:
+        if not self._offload():
+            return self._measure(fn, *args)
+
+        from eventlet import semaphore, tpool
+
+        if self._semaphore is None:
+            self._semaphore = semaphore.Semaphore(self.size)
+        queued_at = time.monotonic()
+        self.waiting += 1
+        try:
+            self._semaphore.acquire()
+        finally:
+            self.waiting -= 1
+        waited = time.monotonic() - queued_at
+        self.wait_seconds += waited
+        self.max_wait_seconds = max(self.max_wait_seconds, waited)
+        try:
+            return self._measure(tpool.execute, fn, *args)
+        finally:
+            self._semaphore.release()
+
+    def _measure(self, fn: Callable[..., T], *args) -> T:
+        started = time.monotonic()
+        self.in_flight += 1
+        try:
+            return fn(*args)
+        finally:
+            self.in_flight -= 1
+            self.completed += 1
+            self.run_seconds += time.monotonic() - started
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "max_concurrency": self.size,
+            "in_flight": self.in_flight,
+            "waiting": self.waiting,
+            "completed": self.completed,
+            "wait_seconds_total": round(self.wait_seconds, 6),
+            "wait_seconds_max": round(self.max_wait_seconds, 6),
+            "run_seconds_total": round(self.run_seconds, 6),
+        }
+
+
+_pool = _HashPool(MAX_CONCURRENCY)
 
 
 def hash_password(plain: str) -> str:
-    return _hasher.hash(plain)
+    return _pool.run(_hasher.hash, plain)
 
 
 def verify_password(plain: str, password_hash: str) -> bool:
     try:
-        _hasher.verify(password_hash, plain)
-        return True
+        return _pool.run(_hasher.verify, password_hash, plain)
     except VerifyMismatchError:
         return False
+
+
+def needs_rehash(password_hash: str) -> bool:
+    """True if *password_hash* was made with other argon2 parameters."""
+    try:
+        return _hasher.check_needs_rehash(password_hash)
+    except InvalidHashError:
+        return False
+
+
+def hash_pool_stats() -> Dict[str, float]:
+    """Concurrency and queueing counters for the password hashing pool."""
+    return _pool.stats()
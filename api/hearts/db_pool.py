@@ -0,0 +1,152 @@
+"""
+Database connection pool and driver setup.
+
+For PostgreSQL the engine gets an explicit QueuePool whose limits come from
+the environment:
+
+- DB_POOL_SIZE: connections kept open (default 10)
+- DB_MAX_OVERFLOW: extra connections allowed under burst (default 5)
+- DB_POOL_TIMEOUT: seconds to wait for a free connection (default 10)
+- DB_POOL_RECYCLE: seconds before a connection is replaced (default 1800)
+- DB_POOL_PRE_PING: "0" to skip the liveness check on checkout (default on)
+- DB_STATEMENT_TIMEOUT_MS: server-side per-statement timeout, 0 to disable
+  (default 30000)
+
+Under the eventlet worker psycopg2 would otherwise block the hub for every
+round trip. install_green_wait_callback() switches it to non-blocking mode
+and waits on the socket through the hub, so a slow query only parks its own
+greenthread.
+
+The pool counts checkouts, checkout time and timeouts; pool_stats() reports
+them with the pool's live occupancy.
+"""
+
+import os
+import time
+from typing import Any, Dict
+
+from sqlalchemy import event, exc
+from sqlalchemy.pool import QueuePool
+
+
+class _PoolCounters:
+    def __init__(self) -> None:
+        self.reset()
+
+    def reset(self) -> None:
+        self.checkouts = 0
+        self.timeouts = 0
+        self.connects = 0
+        self.checkout_seconds = 0.0
+        self.max_checkout_seconds = 0.0
+
+
+_counters = _PoolCounters()
+
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool that records how long each checkout takes.
+
+    Checkout time covers waiting for a free slot plus, when needed, opening
+    a connection or the pre-ping, i.e. everything a request waits for
+    before its first statement.
+    """
+
+    def connect(self):
+        started = time.monotonic()
+        try:
+            return super().connect()
+        except exc.TimeoutError:
+            _counters.timeouts += 1
+            raise
+        finally:
+            elapsed = time.monotonic() - started
+            _counters.checkouts += 1
+            _counters.checkout_seconds += elapsed
+            _counters.max_checkout_seconds = max(
+                _counters.max_checkout_seconds, elapsed
+            )
+
+
+@event.listens_for(InstrumentedQueuePool, "connect")
+def _on_connect(dbapi_connection, connection_record) -> None:
+    _counters.connects += 1
+
+
+def reset_pool_stats() -> None:
+    """Zero the pool counters. For tests only."""
+    _counters.reset()
+
+
+def engine_options(database_uri: str) -> Dict[str, Any]:
+    """SQLALCHEMY_ENGINE_OPTIONS for *database_uri* (empty for non-Postgres)."""
+    if not database_uri.startswith("postgresql"):
+        return {}
+    options: Dict[str, Any] = {
+        "poolclass": InstrumentedQueuePool,
+        "pool_size": int(os.environ.get("DB_POOL_SIZE", "10")),
+        "max_overflow": int(os.environ.get("DB_MAX_OVERFLOW", "5")),
+        "pool_timeout": float(os.environ.get("DB_POOL_TIMEOUT", "10")),
+        "pool_recycle": int(os.environ.get("DB_POOL_RECYCLE", "1800")),
+        "pool_pre_ping": os.environ.get("DB_POOL_PRE_PING", "1") != "0",
+    }
+    statement_timeout_ms = int(os.environ.get("DB_STATEMENT_TIMEOUT_MS", "30000"))
+    if statement_timeout_ms > 0:
+        options["connect_args"] = {
+            "options": f"-c statement_timeout={statement_timeout_ms}"
+        }
+    return options
+
+
+def _eventlet_wait_callback(conn, timeout=None) -> None:
+    """psycopg2 wait callback that yields to the eventlet hub while waiting."""
+    from eventlet.hubs import trampoline
+    from psycopg2 import OperationalError, extensions
+
+    while True:
+        state = conn.poll()
+        if state == extensions.POLL_OK:
+            return
+        if state == extensions.POLL_READ:
+            trampoline(conn.fileno(), read=True)
+        elif state == extensions.POLL_WRITE:
+            trampoline(conn.fileno(), write=True)
+        else:
+            raise OperationalError(f"Bad result from poll: {state!r}")
+
+
+def install_green_wait_callback() -> bool:
+    """Make psycopg2 cooperative if eventlet has patched the process.
+
+    Returns whether the callback is installed. A no-op without eventlet
+    patching (tests, ``flask run``) or without psycopg2.
+    """
+    try:
+        from eventlet import patcher
+        from psycopg2 import extensions
+    except ImportError:
+        return False
+    if not patcher.is_monkey_patched("socket"):
+        return False
+    extensions.set_wait_callback(_eventlet_wait_callback)
+    return True
+
+
+def pool_stats(engine) -> Dict[str, float]:
+    """Checkout counters plus current occupancy of *engine*'s pool."""
+    stats: Dict[str, float] = {
+        "checkouts": _counters.checkouts,
+        "checkout_timeouts": _counters.timeouts,
+        "connects": _counters.connects,
+        "checkout_seconds_total": round(_counters.checkout_seconds, 6),
+        "checkout_seconds_max": round(_counters.max_checkout_seconds, 6),
+    }
+    pool = engine.pool
+    if isinstance(pool, QueuePool):
+        stats.update(
+            size=pool.size(),
+            checked_in=pool.checkedin(),
+            checked_out=pool.checkedout(),
+            overflow=max(0, pool.overflow()),
+        )
+    return stats
@@ -0,0 +1,314 @@
+"""
+Outbound email queue.
+
+Request handlers call enqueue(), which stores the message in outbound_emails
+and returns at once. A background sender (started lazily, never under
+TESTING) claims due rows, hands them to the configured transport and records
+the outcome:
+
+- success: status "sent"
+- temporary failure: back to "pending" with exponential backoff
+- permanent failure, or MAX_ATTEMPTS reached: status "dead" (kept for
+  inspection, never retried)
+
+A row's body (which may hold a verification or reset link) is cleared once
+it is sent or dead, and finished rows are deleted after EMAIL_RETENTION_DAYS.
+
+Rows are claimed with FOR UPDATE SKIP LOCKED and given a lease, so several
+workers can share the table and a row whose sender died is picked up again
+once the lease expires.
+
+The transport is chosen by the EMAIL_TRANSPORT config value: "smtp2go" (the
+default), "memory", an in-process sink for tests and local development, or
+"log". Without an SMTP2GO_API_KEY, "smtp2go" falls back to "log".
+"""
+
+import json
+import logging
+import random
+import threading
+import time
+import urllib.error
+import urllib.request
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from flask import current_app
+
+from hearts.extensions import db
+from hearts.models import OutboundEmail
+
+logger = logging.getLogger(__name__)
+
+SMTP2GO_API_URL = "https://api.smtp2go.com/v3/email/send"
+
+MAX_ATTEMPTS = 6
+BACKOFF_BASE_SECONDS = 30
+BACKOFF_MAX_SECONDS = 60 * 60
+LEASE_SECONDS = 5 * 60
+BATCH_SIZE = 20
+POLL_SECONDS = 2.0
+PURGE_INTERVAL_SECONDS = 60 * 60
+
+
+class EmailSendError(Exception):
+    """Raised by a transport when a message could not be delivered.
+
+    ``permanent`` failures (bad address, missing credentials) are
+    dead-lettered immediately instead of retried.
+    """
+
+    def __init__(self, message: str, permanent: bool = False) -> None:
+        super().__init__(message)
+        self.permanent = permanent
+
+
+# -----------------------------------------------------------------------------
+# Transports
+# -----------------------------------------------------------------------------
+
+
+class Smtp2GoTransport:
+    """Send through the SMTP2GO REST API."""
+
+    def send(self, to_email: str, subject: str, html_body: str) -> None:
+        api_key = current_app.config.get("SMTP2GO_API_KEY")
+        from_email = current_app.config.get("SMTP2GO_FROM_EMAIL", "noreply@shmem.dev")
+        if not api_key:
+            raise EmailSendError("SMTP2GO_API_KEY not set", permanent=True)
+
+        payload = json.dumps(
+            {
+                "api_key": api_key,
+                "to": [to_email],
+                "sender": f"Hearts <{from_email}>",
+                "subject": subject,
+                "html_body": html_body,
+            }
+        ).encode()
+        req = urllib.request.Request(
+            SMTP2GO_API_URL,
+            data=payload,
+            headers={"Content-Type": "application/json"},
+            method="POST",
+        )
+        try:
+            with urllib.request.urlopen(req, timeout=10) as resp:
+                body = json.loads(resp.read())
+                logger.info(
+                    "SMTP2GO %s for %s: %s",
+                    resp.status,
+                    to_email,
+                    body.get("data", {}).get("succeeded", 0),
+                )
+        except urllib.error.HTTPError as exc:
+            err_body = exc.read().decode(errors="replace") if exc.fp else ""
+            # 4xx other than throttling means the request itself is bad.
+            permanent = 400 <= exc.code < 500 and exc.code != 429
+            raise EmailSendError(
+                f"SMTP2GO {exc.code}: {err_body}", permanent=permanent
+            ) from exc
+        except Exception as exc:
+            raise EmailSendError(f"{type(exc).__name__}: {exc}") from exc
+
+
+class MemoryTransport:
+    """Collects messages in ``outbox``. For tests and local development.
+
+    Set ``fail_next`` to make that many upcoming sends fail temporarily.
+    """
+
+    def __init__(self) -> None:
+        self.outbox: List[Tuple[str, str, str]] = []
+        self.fail_next = 0
+
+    def send(self, to_email: str, subject: str, html_body: str) -> None:
+        if self.fail_next > 0:
+            self.fail_next -= 1
+            raise EmailSendError("simulated failure")
+        self.outbox.append((to_email, subject, html_body))
+
+
+class LogTransport:
+    """Logs messages instead of sending them (the body only at DEBUG)."""
+
+    def send(self, to_email: str, subject: str, html_body: str) -> None:
+        logger.warning("email to %s not sent (logged only): %s", to_email, subject)
+        logger.debug("email body for %s: %s", to_email, html_body)
+
+
+_TRANSPORT_TYPES = {
+    "smtp2go": Smtp2GoTransport,
+    "memory": MemoryTransport,
+    "log": LogTransport,
+}
+_transports: Dict[str, object] = {}
+
+
+def get_transport():
+    """Return the transport named by ``EMAIL_TRANSPORT`` (one instance per name).
+
+    "smtp2go" without an API key becomes "log", so a local setup keeps the
+    queue moving instead of dead-lettering every message.
+    """
+    name = current_app.config.get("EMAIL_TRANSPORT", "smtp2go")
+    if name == "smtp2go" and not current_app.config.get("SMTP2GO_API_KEY"):
+        name = "log"
+    transport = _transports.get(name)
+    if transport is None:
+        transport = _transports[name] = _TRANSPORT_TYPES[name]()
+    return transport
+
+
+# -----------------------------------------------------------------------------
+# Queue
+# -----------------------------------------------------------------------------
+
+
+def enqueue(to_email: str, subject: str, html_body: str) -> OutboundEmail:
+    """Store a message for delivery and make sure the sender is running."""
+    row = OutboundEmail(to_email=to_email, subject=subject, html_body=html_body)
+    db.session.add(row)
+    db.session.commit()
+    ensure_worker()
+    return row
+
+
+def _backoff(attempts: int) -> timedelta:
+    delay = min(BACKOFF_MAX_SECONDS, BACKOFF_BASE_SECONDS * 2 ** (attempts - 1))
+    return timedelta(seconds=delay * random.uniform(0.8, 1.2))
+
+
+def _claim(now: datetime, limit: int) -> List[Tuple[int, str, str, str]]:
+    """Lease up to *limit* due rows and return (id, to, subject, body) for each."""
+    rows = (
+        OutboundEmail.query.filter(
+            OutboundEmail.status.in_((OutboundEmail.PENDING, OutboundEmail.SENDING)),
+            OutboundEmail.next_attempt_at <= now,
+        )
+        .order_by(OutboundEmail.next_attempt_at)
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+        .all()
+    )
+    claimed = []
+    for row in rows:
+        row.status = OutboundEmail.SENDING
+        row.attempts += 1
+        row.next_attempt_at = now + timedelta(seconds=LEASE_SECONDS)
+        claimed.append((row.id, row.to_email, row.subject, row.html_body))
+    db.session.commit()
+    return claimed
+
+
+def process_due(limit: int = BATCH_SIZE) -> int:
+    """Send every due message (up to *limit*). Returns how many were attempted."""
+    claimed = _claim(datetime.utcnow(), limit)
+    if not claimed:
+        return 0
+
+    transport = get_transport()
+    for row_id, to_email, subject, html_body in claimed:
+        error: Optional[EmailSendError] = None
+        try:
+            transport.send(to_email, subject, html_body)
+        except EmailSendError as exc:
+            error = exc
+
+        row = db.session.get(OutboundEmail, row_id)
+        if row is None:
+            continue
+        if error is None:
+            row.status = OutboundEmail.SENT
+            row.sent_at = datetime.utcnow()
+            row.last_error = None
+            row.html_body = ""
+        elif error.permanent or row.attempts >= MAX_ATTEMPTS:
+            row.status = OutboundEmail.DEAD
+            row.last_error = str(error)
+            row.html_body = ""
+            logger.error(
+                "email %s to %s dead after %d attempt(s): %s",
+                row_id,
+                to_email,
+                row.attempts,
+                error,
+            )
+        else:
+            row.status = OutboundEmail.PENDING
+            row.last_error = str(error)
+            row.next_attempt_at = datetime.utcnow() + _backoff(row.attempts)
+            logger.warning(
+                "email %s to %s failed (attempt %d), retrying at %s: %s",
+                row_id,
+                to_email,
+                row.attempts,
+                row.next_attempt_at,
+                error,
+            )
+        db.session.commit()
+    return len(claimed)
+
+
+def purge_finished(now: Optional[datetime] = None) -> int:
+    """Delete sent and dead rows created more than EMAIL_RETENTION_DAYS ago.
+    Returns how many were deleted."""
+    days = current_app.config.get("EMAIL_RETENTION_DAYS", 7)
+    cutoff = (now or datetime.utcnow()) - timedelta(days=days)
+    deleted = OutboundEmail.query.filter(
+        OutboundEmail.status.in_((OutboundEmail.SENT, OutboundEmail.DEAD)),
+        OutboundEmail.created_at < cutoff,
+    ).delete(synchronize_session=False)
+    db.session.commit()
+    return deleted
+
+
+def queue_stats() -> Dict[str, int]:
+    """Row counts per status."""
+    rows = (
+        db.session.query(OutboundEmail.status, db.func.count())
+        .group_by(OutboundEmail.status)
+        .all()
+    )
+    return {status: count for status, count in rows}
+
+
+# -----------------------------------------------------------------------------
+# Background sender
+# -----------------------------------------------------------------------------
+
+_worker: Optional[threading.Thread] = None
+
+
+def _run(app) -> None:
+    next_purge = 0.0
+    while True:
+        try:
+            with app.app_context():
+                while process_due():
+                    pass
+                if time.monotonic() >= next_purge:
+                    next_purge = time.monotonic() + PURGE_INTERVAL_SECONDS
+                    purge_finished()
+        except Exception:
+            logger.exception("email queue: sender iteration failed")
+        time.sleep(POLL_SECONDS)
+
+
+def ensure_worker() -> None:
+    """Start the sender once per process. No-op under TESTING or with
+    EMAIL_QUEUE_WORKER off.
+
+    Under the eventlet worker ``threading`` is monkey-patched, so this is a
+    greenthread; under a plain WSGI server it is a daemon thread.
+    """
+    global _worker
+    if _worker is not None:
+        return
+    app = current_app._get_current_object()
+    if app.config.get("TESTING") or not app.config.get("EMAIL_QUEUE_WORKER", True):
+        return
+    _worker = threading.Thread(
+        target=_run, args=(app,), name="email-queue", daemon=True
+    )
+    _worker.start()
@@ -18,8 +18,10 @@ from hearts.game.transitions import (
     deal_new_round,
     apply_passes,
     apply_play,
+    apply_play_unchecked,
     apply_round_scoring,
 )
+from hearts.game.canonical import CanonicalPosition, canonical_position, canonicalize
 from hearts.game.runner import GameRunner
 
 __all__ = [
@@ -39,6 +41,10 @@ __all__ = [
     "deal_new_round",
     "apply_passes",
     "apply_play",
+    "apply_play_unchecked",
     "apply_round_scoring",
+    "CanonicalPosition",
+    "canonical_position",
+    "canonicalize",
     "GameRunner",
 ]
@@ -0,0 +1,168 @@
+"""
+Canonical form of a Hearts position for AI caches and transposition tables.
+
+Two positions get the same key when no rule can tell them apart:
+
+- Rank gaps: only the order of the cards still live in a suit (in a hand or
+  the current trick) matters, so ranks are compressed over played cards.
+  Live clubs, diamonds and hearts become 2, 3, 4, ... from the bottom; 2♣
+  therefore stays 2♣ while it is live. Live spades are packed around Q♠,
+  which keeps rank 12, so Q♠ and the K♠/A♠ above it keep their meaning and
+  no other spade becomes a queen.
+- Clubs and diamonds: once the first trick is over, clubs carry no special
+  rule, so the two suits are interchangeable and the labeling with the
+  smaller key is used.
+
+A position is the player's hand, the current trick (cards in play order),
+the cards played this round (``GameState.played_mask``), whether hearts are
+broken and whether this is the first trick. Anything else a cache depends
+on (scores, voids, seat) must go into the cache key separately.
+"""
+
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+from hearts.game.card import QUEEN_OF_SPADES_RANK, RANK_MIN, Card, Suit, deck_52
+from hearts.game.state import GameState
+
+_DECK = tuple(deck_52())
+
+_SWAP_MINORS = {
+    Suit.CLUBS: Suit.DIAMONDS,
+    Suit.DIAMONDS: Suit.CLUBS,
+    Suit.SPADES: Suit.SPADES,
+    Suit.HEARTS: Suit.HEARTS,
+}
+
+
+def _compress(suit: Suit, live: List[int]) -> Dict[int, int]:
+    """Map each live rank (ascending) to its canonical rank."""
+    if suit != Suit.SPADES:
+        return {r: RANK_MIN + i for i, r in enumerate(live)}
+    below = [r for r in live if r < QUEEN_OF_SPADES_RANK]
+    above = [r for r in live if r > QUEEN_OF_SPADES_RANK]
+    ranks = {r: QUEEN_OF_SPADES_RANK - 1 - i for i, r in enumerate(reversed(below))}
+    ranks.update({r: QUEEN_OF_SPADES_RANK + 1 + i for i, r in enumerate(above)})
+    if QUEEN_OF_SPADES_RANK in live:
+        ranks[QUEEN_OF_SPADES_RANK] = QUEEN_OF_SPADES_RANK
+    return ranks
+
+
+class CanonicalPosition:
+    """A position in canonical form, plus the card mapping in both directions.
+
+    ``key`` is hashable bytes equal for equivalent positions; ``hand`` and
+    ``trick`` are the canonical cards and ``live`` every card still in a
+    hand or the trick. card() and actual() translate single cards, e.g. to
+    store a best move canonically and play it back.
+    """
+
+    __slots__ = ("key", "hand", "trick", "swapped", "_canonical", "_actual")
+
+    def __init__(
+        self,
+        key: bytes,
+        hand: Tuple[Card, ...],
+        trick: Tuple[Card, ...],
+        swapped: bool,
+        canonical: Dict[Card, Card],
+    ) -> None:
+        self.key = key
+        self.hand = hand
+        self.trick = trick
+        self.swapped = swapped
+        self._canonical = canonical
+        self._actual = {c: a for a, c in canonical.items()}
+
+    def card(self, actual: Card) -> Card:
+        """Canonical image of a live card."""
+        return self._canonical[actual]
+
+    @property
+    def live(self) -> Tuple[Card, ...]:
+        """Canonical images of every live card, in deck order."""
+        return tuple(sorted(self._actual, key=lambda c: c.index))
+
+    def actual(self, canonical: Card) -> Card:
+        """Live card that *canonical* stands for."""
+        return self._actual[canonical]
+
+    def __repr__(self) -> str:
+        hand = " ".join(c.to_code() for c in self.hand)
+        trick = " ".join(c.to_code() for c in self.trick)
+        return f"CanonicalPosition(hand=[{hand}], trick=[{trick}])"
+
+
+def _encode(
+    flags: int,
+    hand: Iterable[Card],
+    trick: Sequence[Card],
+    live: Iterable[Card],
+) -> bytes:
+    hand_masks = [0, 0, 0, 0]
+    live_masks = [0, 0, 0, 0]
+    for c in hand:
+        hand_masks[c.suit] |= 1 << (c.rank - RANK_MIN)
+    for c in live:
+        live_masks[c.suit] |= 1 << (c.rank - RANK_MIN)
+    out = bytearray([flags, len(trick)])
+    for suit in Suit:
+        out += live_masks[suit].to_bytes(2, "big")
+        out += hand_masks[suit].to_bytes(2, "big")
+    out += bytes(c.index for c in trick)
+    return bytes(out)
+
+
+def canonicalize(
+    hand: Iterable[Card],
+    trick: Sequence[Card],
+    played_mask: int,
+    hearts_broken: bool = False,
+    first_trick: bool = False,
+) -> CanonicalPosition:
+    """Canonical form of *hand* facing *trick* with *played_mask* played."""
+    hand = tuple(hand)
+    trick = tuple(trick)
+    live_ranks: Dict[Suit, List[int]] = {suit: [] for suit in Suit}
+    for c in hand:
+        live_ranks[c.suit].append(c.rank)
+    # The played mask covers the current trick, so add it back as live.
+    unseen = ~played_mask
+    for c in trick:
+        live_ranks[c.suit].append(c.rank)
+        unseen &= ~(1 << c.index)
+    for c in hand:
+        unseen &= ~(1 << c.index)
+    for c in _DECK:
+        if unseen >> c.index & 1:
+            live_ranks[c.suit].append(c.rank)
+
+    canonical: Dict[Card, Card] = {}
+    for suit, ranks in live_ranks.items():
+        for rank, new_rank in _compress(suit, sorted(ranks)).items():
+            canonical[Card(suit, rank)] = Card(suit, new_rank)
+
+    flags = first_trick | hearts_broken << 1
+    best = None
+    for swap in (False,) if first_trick else (False, True):
+        mapping = canonical
+        if swap:
+            mapping = {
+                a: Card(_SWAP_MINORS[c.suit], c.rank) for a, c in canonical.items()
+            }
+        c_hand = tuple(sorted((mapping[c] for c in hand), key=lambda c: c.index))
+        c_trick = tuple(mapping[c] for c in trick)
+        key = _encode(flags, c_hand, c_trick, mapping.values())
+        if best is None or key < best.key:
+            best = CanonicalPosition(key, c_hand, c_trick, swap, mapping)
+    return best
+
+
+def canonical_position(state: GameState, player_index: int) -> CanonicalPosition:
+    """canonicalize() for *player_index*'s view of *state*."""
+    return canonicalize(
+        state.hands[player_index],
+        [c for _, c in state.current_trick],
+        state.played_mask,
+        hearts_broken=state.hearts_broken,
+        first_trick=state.first_trick,
+    )
@@ -54,6 +54,11 @@ class Card:
         if not (RANK_MIN <= self.rank <= RANK_MAX):
             raise ValueError(f"Rank must be {RANK_MIN}-{RANK_MAX}, got {self.rank}")
 
+    @property
+    def index(self) -> int:
+        """Position 0-51 in deck_52() order; bit index in card bitmasks."""
+        return self.suit * 13 + self.rank - RANK_MIN
+
     def to_code(self) -> str:
         return RANK_TO_CODE[self.rank] + CODE_SUIT[self.suit]
 
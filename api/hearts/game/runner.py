@@ -9,19 +9,26 @@ import random
 from typing import Any, Callable, Dict, List, Optional
 
 from hearts.game.card import Card, Suit, deck_52, shuffle_deck, deal_into_4_hands
-from hearts.game.rules import get_legal_plays, is_valid_pass
-from hearts.game.state import GameState, Phase, PassDirection
+from hearts.game.rules import is_valid_pass
+from hearts.game.state import (
+    GameState,
+    Phase,
+    PassDirection,
+    bookkeeping_from_dict,
+    bookkeeping_to_dict,
+)
 from hearts.game.transitions import (
     apply_passes,
     apply_play,
+    apply_play_unchecked,
     apply_round_scoring,
     deal_new_round,
-    _is_first_lead,
-    _is_first_trick_of_round,
 )
 
+from hearts.ai import profiling
 from hearts.ai.base import PassStrategy, PlayStrategy
 from hearts.ai.factory import create_strategies
+from hearts.metrics import AI_DECISION_SECONDS
 
 
 HUMAN_PLAYER = 0
@@ -44,8 +51,8 @@ AI_NAME_POOL = (
 
 
 def _round_complete(state: GameState) -> bool:
-    """True if all 13 tricks have been played this round (all hands empty)."""
-    return sum(len(state.hands[i]) for i in range(4)) == 0
+    """True if all 13 tricks have been played this round."""
+    return state.tricks_completed == 13
 
 
 class GameRunner:
@@ -63,6 +70,7 @@ class GameRunner:
         player_names: Optional[tuple] = None,
         rng: Optional[random.Random] = None,
         difficulty: str = "easy",
+        profile_id: Optional[str] = None,
     ) -> None:
         self._state = state
         self._pass_strategy = pass_strategy
@@ -70,6 +78,10 @@ class GameRunner:
         self._player_names = player_names or DEFAULT_PLAYER_NAMES
         self._rng = rng or random.Random()
         self._difficulty = difficulty
+        self._profile_id = profile_id
+        self._profiler = profiling.open_profiler(
+            profile_id, difficulty, pass_strategy, play_strategy
+        )
         self._human_moon_shots: int = 0
         self._human_hearts_broken: int = 0
         self._last_play_events: List[Dict[str, Any]] = []
@@ -88,6 +100,7 @@ class GameRunner:
         human_name: Optional[str] = None,
         rng: Optional[random.Random] = None,
         difficulty: str = "easy",
+        profile_id: Optional[str] = None,
     ) -> "GameRunner":
         """Create a new game: deal, initial state (round 1, passing or no-pass)."""
         rng = rng or random.Random()
@@ -110,6 +123,7 @@ class GameRunner:
             tuple(names),
             rng=rng,
             difficulty=difficulty,
+            profile_id=profile_id,
         )
 
     def submit_pass(self, human_cards: List[Card]) -> None:
@@ -124,18 +138,15 @@ class GameRunner:
             raise ValueError(
                 "Invalid pass: must select exactly 3 cards from your hand, no duplicates"
             )
-        passes = [
-            human_cards,
-            self._pass_strategy.choose_cards_to_pass(
-                self._state.hand(1), self._state.pass_direction
-            ),
-            self._pass_strategy.choose_cards_to_pass(
-                self._state.hand(2), self._state.pass_direction
-            ),
-            self._pass_strategy.choose_cards_to_pass(
-                self._state.hand(3), self._state.pass_direction
-            ),
-        ]
+        passes = [human_cards]
+        for player in (1, 2, 3):
+            with AI_DECISION_SECONDS.labels(self._difficulty, "pass").time():
+                with profiling.decision(self._profiler, "pass", self._state, player, 0):
+                    passes.append(
+                        self._pass_strategy.choose_cards_to_pass(
+                            self._state.hand(player), self._state.pass_direction
+                        )
+                    )
         self._state = apply_passes(self._state, passes)
 
     def submit_play(
@@ -157,21 +168,14 @@ class GameRunner:
         hand0 = self._state.hand(HUMAN_PLAYER)
         if card not in hand0:
             raise ValueError("Card not in hand")
-        legal = get_legal_plays(
-            hand0,
-            self._state.trick_list(),
-            self._state.hearts_broken,
-            first_lead_of_round=_is_first_lead(self._state, hand0),
-            first_trick=_is_first_trick_of_round(self._state),
-        )
-        if card not in legal:
+        if card not in self._state.legal_plays:
             raise ValueError("Illegal play")
         if card.suit == Suit.HEARTS and not self._state.hearts_broken:
             self._human_hearts_broken += 1
         play_event = {"player_index": HUMAN_PLAYER, "card": card.to_code()}
         self._last_play_events = [play_event]
         self._last_round_ended = False
-        self._state = apply_play(self._state, HUMAN_PLAYER, card)
+        self._state = apply_play_unchecked(self._state, HUMAN_PLAYER, card)
         if on_play:
             on_play(play_event)
         if (
@@ -233,15 +237,12 @@ class GameRunner:
                     on_done(self.get_state_for_frontend())
                 return
             player = self._state.whose_turn
-            hand = self._state.hand(player)
-            legal = get_legal_plays(
-                hand,
-                self._state.trick_list(),
-                self._state.hearts_broken,
-                first_lead_of_round=_is_first_lead(self._state, hand),
-                first_trick=_is_first_trick_of_round(self._state),
-            )
-            card = self._play_strategy.choose_play(self._state, player, legal)
+            legal = list(self._state.legal_plays)
+            with AI_DECISION_SECONDS.labels(self._difficulty, "play").time():
+                with profiling.decision(
+                    self._profiler, "play", self._state, player, len(legal)
+                ):
+                    card = self._play_strategy.choose_play(self._state, player, legal)
             play_event = {"player_index": player, "card": card.to_code()}
             self._last_play_events.append(play_event)
             self._state = apply_play(self._state, player, card)
@@ -303,7 +304,7 @@ class GameRunner:
         rng_state = self._rng.getstate()
         # rng_state is (version, internalstate_tuple, gauss_next).
         # internalstate_tuple contains ints safe for JSON via list conversion.
-        return {
+        data = {
             "state": {
                 "round": s.round,
                 "phase": s.phase.value,
@@ -318,6 +319,7 @@ class GameRunner:
                 "hearts_broken": s.hearts_broken,
                 "game_over": s.game_over,
                 "winner_index": s.winner_index,
+                **bookkeeping_to_dict(s),
             },
             "player_names": list(self._player_names),
             "difficulty": self._difficulty,
@@ -329,6 +331,9 @@ class GameRunner:
                 rng_state[2],
             ],
         }
+        if self._profile_id is not None:
+            data["ai_profile"] = self._profile_id
+        return data
 
     def to_json(self) -> str:
         return json.dumps(self.to_dict())
@@ -353,6 +358,7 @@ class GameRunner:
             hearts_broken=sd["hearts_broken"],
             game_over=sd["game_over"],
             winner_index=sd.get("winner_index"),
+            **bookkeeping_from_dict(sd),
         )
         difficulty = data.get("difficulty", "easy")
         pass_strategy, play_strategy = create_strategies(difficulty)
@@ -369,6 +375,7 @@ class GameRunner:
             player_names=tuple(data.get("player_names", DEFAULT_PLAYER_NAMES)),
             rng=rng,
             difficulty=difficulty,
+            profile_id=data.get("ai_profile"),
         )
         runner._human_moon_shots = data.get("human_moon_shots", 0)
         runner._human_hearts_broken = data.get("human_hearts_broken", 0)
@@ -399,15 +406,7 @@ class GameRunner:
             and s.whose_turn == HUMAN_PLAYER
             and not s.game_over
         ):
-            hand0 = s.hand(HUMAN_PLAYER)
-            legal_cards = get_legal_plays(
-                hand0,
-                s.trick_list(),
-                s.hearts_broken,
-                first_lead_of_round=_is_first_lead(s, hand0),
-                first_trick=_is_first_trick_of_round(s),
-            )
-            legal_plays = [c.to_code() for c in legal_cards]
+            legal_plays = [c.to_code() for c in s.legal_plays]
         # current_trick in play order: slot 0 = 1st play (bottom), 1 = 2nd (left), 2 = 3rd (top), 3 = 4th (right)
         current_trick = [
             {"player_index": idx, "card": card.to_code()}
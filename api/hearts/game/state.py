@@ -4,9 +4,33 @@ Canonical game state for Hearts. Immutable-friendly: transitions return new stat
 
 from dataclasses import dataclass
 from enum import Enum
-from typing import List, Optional, Tuple
+from functools import cached_property
+from typing import Any, Dict, FrozenSet, List, Optional, Tuple
 
-from hearts.game.card import Card, two_of_clubs
+from hearts.game.card import (
+    CODE_SUIT,
+    RANK_MAX,
+    RANK_MIN,
+    SUIT_CODE,
+    Card,
+    Suit,
+    two_of_clubs,
+)
+from hearts.game.rules import get_legal_plays
+
+FULL_DECK_MASK = (1 << 52) - 1
+
+
+def next_outstanding_rank(played_mask: int, suit: Suit, rank: int) -> int:
+    """Highest rank <= *rank* in *suit* not set in *played_mask*, else 0.
+
+    Used to step highest_outstanding down when its card is played; across a
+    round each suit is stepped through at most once.
+    """
+    base = suit * 13 - RANK_MIN
+    while rank >= RANK_MIN and played_mask >> (base + rank) & 1:
+        rank -= 1
+    return rank if rank >= RANK_MIN else 0
 
 
 class Phase(str, Enum):
@@ -29,6 +53,25 @@ class GameState:
     whose_turn: player index who must act (during play phase).
     scores: total points per player (list of 4 ints).
     round_scores: points taken this round per player (for shoot-the-moon); applied at round end.
+
+    Round bookkeeping, maintained in O(1) per play by apply_play:
+    tricks_completed: tricks finished this round (0-13).
+    played_mask: bit card.index set for every card played this round,
+        including the current trick.
+    played_by: per player, the same mask for the cards they played.
+    known_voids: per player, the suits they have shown out of this round.
+    highest_outstanding: per suit (indexed by Suit), the highest rank not yet
+        played this round; 0 once the suit is exhausted.
+    passed_cards: per player, the cards they passed this round (empty before
+        the pass and in no-pass rounds). Player i knows passed_cards[i] sit
+        with pass_target(i) until played.
+    When a state is built without them (a fresh deal, saved games, tests),
+    __post_init__ derives them from hands and current_trick; voids shown and
+    cards played in earlier tricks cannot be attributed and must be passed.
+
+    Derived facts (legal_plays) are computed on first access and cached on
+    the instance; a state never changes, so validation, transition and
+    serialization of the same state share one result.
     """
 
     round: int  # 1-based for display
@@ -42,6 +85,45 @@ class GameState:
     hearts_broken: bool
     game_over: bool
     winner_index: Optional[int] = None  # when game_over, lowest score wins
+    tricks_completed: Optional[int] = None
+    played_mask: Optional[int] = None
+    played_by: Optional[Tuple[int, ...]] = None
+    known_voids: Optional[Tuple[FrozenSet[Suit], ...]] = None
+    highest_outstanding: Optional[Tuple[int, ...]] = None
+    passed_cards: Tuple[Tuple[Card, ...], ...] = ((), (), (), ())
+
+    def __post_init__(self) -> None:
+        if self.played_mask is None:
+            held = 0
+            for hand in self.hands:
+                for c in hand:
+                    held |= 1 << c.index
+            object.__setattr__(self, "played_mask", FULL_DECK_MASK & ~held)
+        if self.tricks_completed is None:
+            in_play = sum(len(h) for h in self.hands) + len(self.current_trick)
+            object.__setattr__(self, "tricks_completed", max(0, (52 - in_play) // 4))
+        if self.played_by is None:
+            by = [0, 0, 0, 0]
+            for pi, c in self.current_trick:
+                by[pi] |= 1 << c.index
+            object.__setattr__(self, "played_by", tuple(by))
+        if self.known_voids is None:
+            voids: List[FrozenSet[Suit]] = [frozenset()] * 4
+            if self.current_trick:
+                lead_suit = self.current_trick[0][1].suit
+                for pi, c in self.current_trick[1:]:
+                    if c.suit != lead_suit:
+                        voids[pi] = voids[pi] | {lead_suit}
+            object.__setattr__(self, "known_voids", tuple(voids))
+        if self.highest_outstanding is None:
+            object.__setattr__(
+                self,
+                "highest_outstanding",
+                tuple(
+                    next_outstanding_rank(self.played_mask, suit, RANK_MAX)
+                    for suit in Suit
+                ),
+            )
 
     def hand(self, player_index: int) -> List[Card]:
         return list(self.hands[player_index])
@@ -49,6 +131,34 @@ class GameState:
     def trick_list(self) -> List[Tuple[int, Card]]:
         return list(self.current_trick)
 
+    def is_played(self, card: Card) -> bool:
+        """True if *card* has been played this round (current trick included)."""
+        return bool(self.played_mask >> card.index & 1)
+
+    @property
+    def first_trick(self) -> bool:
+        """True until the first trick of the round is complete."""
+        return self.tricks_completed == 0
+
+    @cached_property
+    def legal_plays(self) -> Tuple[Card, ...]:
+        """Cards whose_turn may play now; empty outside the play phase."""
+        if self.phase != Phase.PLAYING or self.game_over:
+            return ()
+        hand = self.hands[self.whose_turn]
+        first_trick = self.first_trick
+        return tuple(
+            get_legal_plays(
+                list(hand),
+                list(self.current_trick),
+                self.hearts_broken,
+                first_lead_of_round=first_trick
+                and not self.current_trick
+                and two_of_clubs() in hand,
+                first_trick=first_trick,
+            )
+        )
+
     @staticmethod
     def pass_direction_for_round(round_num: int) -> PassDirection:
         """Round 1→left, 2→right, 3→across, 4→none, then repeat."""
@@ -62,6 +172,52 @@ class GameState:
         return PassDirection.NONE
 
 
+_PASS_OFFSET = {
+    PassDirection.LEFT: 1,
+    PassDirection.RIGHT: 3,
+    PassDirection.ACROSS: 2,
+    PassDirection.NONE: 0,
+}
+
+
+def pass_target(player_index: int, direction: PassDirection) -> int:
+    """Player who receives *player_index*'s pass (themselves when NONE)."""
+    return (player_index + _PASS_OFFSET[direction]) % 4
+
+
+def bookkeeping_to_dict(state: GameState) -> Dict[str, Any]:
+    """Round bookkeeping that cannot be derived from hands and current_trick,
+    as JSON-friendly values for the runners' saved state."""
+    return {
+        "known_voids": [
+            "".join(sorted(CODE_SUIT[suit] for suit in voids))
+            for voids in state.known_voids
+        ],
+        "passed_cards": [[c.to_code() for c in p] for p in state.passed_cards],
+        "played_by": list(state.played_by),
+    }
+
+
+def bookkeeping_from_dict(data: Dict[str, Any]) -> Dict[str, Any]:
+    """GameState keyword arguments from bookkeeping_to_dict() values in *data*.
+
+    Keys missing from older saves fall back to what GameState derives.
+    """
+    codes = data.get("known_voids")
+    known_voids = None
+    if codes is not None:
+        known_voids = tuple(frozenset(SUIT_CODE[ch] for ch in code) for code in codes)
+    played_by = data.get("played_by")
+    return {
+        "played_by": tuple(played_by) if played_by is not None else None,
+        "known_voids": known_voids,
+        "passed_cards": tuple(
+            tuple(Card.from_code(c) for c in p)
+            for p in data.get("passed_cards", [[], [], [], []])
+        ),
+    }
+
+
 def initial_state_after_deal(
     hands: List[List[Card]],
     round_num: int = 1,
@@ -2,15 +2,17 @@
 State transitions for Hearts. Pure functions: take state + inputs, return new state (no mutation).
 """
 
+from dataclasses import replace
 from typing import List, Tuple
 
 from hearts.game.card import Card, Suit, QUEEN_OF_SPADES_RANK, two_of_clubs
-from hearts.game.rules import get_legal_plays, get_trick_winner, get_trick_points
+from hearts.game.rules import get_trick_winner, get_trick_points
 from hearts.game.state import (
     GameState,
     Phase,
     PassDirection,
     initial_state_after_deal,
+    next_outstanding_rank,
 )
 
 
@@ -82,37 +84,63 @@ def apply_passes(
         hearts_broken=False,
         game_over=state.game_over,
         winner_index=state.winner_index,
+        passed_cards=tuple(tuple(p) for p in passes_per_player),
     )
 
 
 def apply_play(state: GameState, player_index: int, card: Card) -> GameState:
     """
-    Play one card. Validates via get_legal_plays (caller must ensure card is legal).
+    Play one card. Validates against state.legal_plays (raises ValueError if illegal).
     Returns new state: hand updated, trick updated; if trick complete, points to winner and next leader.
     """
     if state.phase != Phase.PLAYING:
         raise ValueError("apply_play only in playing phase")
     if state.whose_turn != player_index:
         raise ValueError(f"Not player {player_index}'s turn")
-    hand = state.hand(player_index)
-    if card not in hand:
+    if card not in state.hands[player_index]:
         raise ValueError("Card not in hand")
-    trick_list = state.trick_list()
-    first_lead = _is_first_lead(state, hand)
-    legal = get_legal_plays(
-        hand,
-        trick_list,
-        state.hearts_broken,
-        first_lead_of_round=first_lead,
-        first_trick=_is_first_trick_of_round(state),
-    )
-    if card not in legal:
+    if card not in state.legal_plays:
         raise ValueError(f"Illegal play: {card} not in legal plays")
+    return apply_play_unchecked(state, player_index, card)
+
 
+def apply_play_unchecked(state: GameState, player_index: int, card: Card) -> GameState:
+    """
+    apply_play without validation, for callers that chose *card* from
+    state.legal_plays (or already validated it). An illegal card here
+    corrupts the state.
+    """
+    hand = state.hands[player_index]
     new_hand = [c for c in hand if c != card]
-    new_trick = state.trick_list() + [(player_index, card)]
+    new_trick = state.current_trick + ((player_index, card),)
     new_hearts_broken = state.hearts_broken or card.suit == Suit.HEARTS
 
+    suit = card.suit
+    bit = 1 << card.index
+    played_mask = state.played_mask | bit
+    played_by = state.played_by
+    played_by = (
+        played_by[:player_index]
+        + (played_by[player_index] | bit,)
+        + played_by[player_index + 1 :]
+    )
+    known_voids = state.known_voids
+    if state.current_trick:
+        lead = state.current_trick[0][1].suit
+        if suit != lead and lead not in known_voids[player_index]:
+            known_voids = (
+                known_voids[:player_index]
+                + (known_voids[player_index] | {lead},)
+                + known_voids[player_index + 1 :]
+            )
+    highest = state.highest_outstanding
+    if card.rank == highest[suit]:
+        highest = (
+            highest[:suit]
+            + (next_outstanding_rank(played_mask, suit, card.rank),)
+            + highest[suit + 1 :]
+        )
+
     if len(new_trick) < 4:
         next_turn = (player_index + 1) % 4
         return GameState(
@@ -120,13 +148,19 @@ def apply_play(state: GameState, player_index: int, card: Card) -> GameState:
             phase=Phase.PLAYING,
             pass_direction=state.pass_direction,
             hands=_replace_hand(state.hands, player_index, new_hand),
-            current_trick=tuple(new_trick),
+            current_trick=new_trick,
             whose_turn=next_turn,
             scores=state.scores,
             round_scores=state.round_scores,
             hearts_broken=new_hearts_broken,
             game_over=state.game_over,
             winner_index=state.winner_index,
+            tricks_completed=state.tricks_completed,
+            played_mask=played_mask,
+            played_by=played_by,
+            known_voids=known_voids,
+            highest_outstanding=highest,
+            passed_cards=state.passed_cards,
         )
 
     # Trick complete
@@ -149,21 +183,24 @@ def apply_play(state: GameState, player_index: int, card: Card) -> GameState:
         hearts_broken=new_hearts_broken,
         game_over=state.game_over,
         winner_index=state.winner_index,
+        tricks_completed=state.tricks_completed + 1,
+        played_mask=played_mask,
+        played_by=played_by,
+        known_voids=known_voids,
+        highest_outstanding=highest,
+        passed_cards=state.passed_cards,
     )
 
 
 def _replace_hand(
     hands: Tuple[Tuple[Card, ...], ...], player_index: int, new_hand: List[Card]
 ) -> Tuple[Tuple[Card, ...], ...]:
-    lst = [list(hands[i]) for i in range(4)]
-    lst[player_index] = new_hand
-    return tuple(tuple(h) for h in lst)
+    return hands[:player_index] + (tuple(new_hand),) + hands[player_index + 1 :]
 
 
 def _is_first_trick_of_round(state: GameState) -> bool:
     """True if we're in the first trick of this round (no tricks completed yet)."""
-    total_played = sum(13 - len(state.hands[i]) for i in range(4))
-    return total_played < 4
+    return state.first_trick
 
 
 def _is_first_lead(state: GameState, hand: List[Card]) -> bool:
@@ -195,16 +232,10 @@ def apply_round_scoring(state: GameState) -> GameState:
         min_score = min(new_scores)
         winners = [i for i, s in enumerate(new_scores) if s == min_score]
         winner = winners[0] if len(winners) == 1 else -1
-    return GameState(
-        round=state.round,
-        phase=state.phase,
-        pass_direction=state.pass_direction,
-        hands=state.hands,
-        current_trick=state.current_trick,
-        whose_turn=state.whose_turn,
+    return replace(
+        state,
         scores=new_scores,
         round_scores=(0, 0, 0, 0),
-        hearts_broken=state.hearts_broken,
         game_over=game_over,
         winner_index=winner,
     )
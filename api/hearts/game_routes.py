@@ -9,11 +9,13 @@ from typing import Dict, Optional
 
 from flask import Blueprint, request, jsonify, current_app
 
+from hearts import metrics, stats_cache
 from hearts.extensions import db
 from hearts.game.card import Card
 from hearts.game.runner import GameRunner
-from hearts.ai.factory import create_strategies
-from hearts.jwt_utils import get_current_user
+from hearts.ai import profiling
+from hearts.ai.factory import create_strategies, normalize_difficulty
+from hearts.jwt_utils import get_current_principal
 from hearts.models import ActiveGame, UserStats
 
 games_bp = Blueprint("games", __name__, url_prefix="/games")
@@ -21,7 +23,7 @@ games_bp = Blueprint("games", __name__, url_prefix="/games")
 
 def _inject_player_icons(state: dict, game_id: str) -> dict:
     """Add profile icons to each player in the state dict."""
-    user = get_current_user()
+    user = get_current_principal()
     human_icon = user.profile_icon if user else "user"
     for i, p in enumerate(state.get("players", [])):
         p["icon"] = human_icon if i == 0 else "robot"
@@ -31,6 +33,13 @@ def _inject_player_icons(state: dict, game_id: str) -> dict:
 _store: Dict[str, GameRunner] = {}
 
 
+metrics.gauge(
+    "hearts_game_store_size",
+    "Single-player games cached in memory",
+    lambda: len(_store),
+)
+
+
 def reset_store() -> None:
     """Clear the in-memory game store. For tests only."""
     _store.clear()
@@ -55,19 +64,20 @@ def _save_to_db(
     """Persist the current runner state to the database."""
     from datetime import datetime
 
-    row = ActiveGame.query.filter_by(game_id=game_id).first()
-    if row is None:
-        row = ActiveGame(
-            game_id=game_id,
-            user_id=user_id,
-            difficulty=runner.difficulty,
-            state_json=runner.to_json(),
-        )
-        db.session.add(row)
-    else:
-        row.state_json = runner.to_json()
-        row.updated_at = datetime.utcnow()
-    db.session.commit()
+    with metrics.SAVE_GAME_SECONDS.labels("single").time():
+        row = ActiveGame.query.filter_by(game_id=game_id).first()
+        if row is None:
+            row = ActiveGame(
+                game_id=game_id,
+                user_id=user_id,
+                difficulty=runner.difficulty,
+                state_json=runner.to_json(),
+            )
+            db.session.add(row)
+        else:
+            row.state_json = runner.to_json()
+            row.updated_at = datetime.utcnow()
+        db.session.commit()
 
 
 def _delete_game(game_id: str) -> None:
@@ -93,7 +103,10 @@ def start_game():
     Returns { "game_id": "<id>" }."""
     data = request.get_json() or {}
     player_name = (data.get("player_name") or "You").strip() or "You"
-    difficulty = data.get("difficulty", "easy")
+    try:
+        difficulty = normalize_difficulty(data.get("difficulty", "easy"))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
     game_id = uuid.uuid4().hex
     rng = None
     if current_app.config.get("TESTING") and "seed" in data:
@@ -108,10 +121,11 @@ def start_game():
         human_name=player_name,
         rng=rng,
         difficulty=difficulty,
+        profile_id=profiling.sample_game(game_id),
     )
     _store[game_id] = runner
 
-    user = get_current_user()
+    user = get_current_principal()
     user_id = user.id if user else None
 
     if user_id is not None:
@@ -126,7 +140,7 @@ def start_game():
 @games_bp.route("/active", methods=["GET"])
 def get_active_game():
     """Return the authenticated user's active game_id, or null."""
-    user = get_current_user()
+    user = get_current_principal()
     if not user:
         return jsonify({"error": "Authentication required"}), 401
     row = ActiveGame.query.filter_by(user_id=user.id).first()
@@ -227,7 +241,7 @@ def concede_game(game_id: str):
     newly_unlocked: list[str] = []
     active_game = ActiveGame.query.filter_by(game_id=game_id).first()
 
-    user = get_current_user()
+    user = get_current_principal()
     if user:
         stats = UserStats.query.filter_by(user_id=user.id).first()
         if not stats:
@@ -245,6 +259,7 @@ def concede_game(game_id: str):
         stats.current_win_streak = 0
 
         db.session.commit()
+        stats_cache.forget(user.id)
 
     _delete_game(game_id)
     return jsonify({"status": "conceded", "newly_unlocked": newly_unlocked})
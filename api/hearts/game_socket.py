@@ -11,7 +11,8 @@ from flask_socketio import emit
 
 from hearts.game_routes import _get_runner, _save_to_db, _evict_from_cache
 from hearts.game.card import Card
-from hearts.models import ActiveGame, User
+from hearts.jwt_utils import get_principal
+from hearts.models import ActiveGame
 
 
 _sid_to_game_id: Dict[str, str] = {}
@@ -22,9 +23,9 @@ def _lookup_player_icon(game_id: str) -> str:
     """Resolve the human player's profile icon from the ActiveGame's user."""
     row = ActiveGame.query.filter_by(game_id=game_id).first()
     if row and row.user_id:
-        user = User.query.get(row.user_id)
-        if user:
-            return user.profile_icon
+        principal = get_principal(row.user_id)
+        if principal:
+            return principal.profile_icon
     return "user"
 
 
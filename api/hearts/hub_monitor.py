@@ -0,0 +1,201 @@
+"""
+Event-loop lag monitor for the eventlet hub.
+
+Every greenthread shares one OS thread, so any handler that computes or does
+blocking I/O without yielding (a "hardest" AI decision, an unpatched driver
+call) stalls every socket and request in the process. This module makes that
+visible:
+
+- A sampler greenthread sleeps HUB_LAG_INTERVAL_MS and records how much later
+  than asked it woke up in ``hearts_eventlet_hub_lag_seconds``.
+- A native watchdog thread, which keeps running while the hub is stuck, checks
+  the sampler's heartbeat. Once it is older than HUB_LAG_THRESHOLD_MS it logs
+  the hub thread's current stack, i.e. the greenthread that is blocking, once
+  per stall.
+
+Environment:
+
+- HUB_MONITOR: "0" to disable (default on)
+- HUB_LAG_INTERVAL_MS: sampling interval (default 100)
+- HUB_LAG_THRESHOLD_MS: lag that counts as a stall (default 250)
+
+ensure_started() runs the monitor once per process. It is a no-op under
+TESTING and when eventlet has not patched the process (``flask run``).
+stats() feeds GET /health.
+"""
+
+import logging
+import os
+import sys
+import time
+import traceback
+from typing import Dict, Optional
+
+from hearts import metrics
+
+logger = logging.getLogger(__name__)
+
+LAG_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+HUB_LAG_SECONDS = metrics.histogram(
+    "hearts_eventlet_hub_lag_seconds",
+    "How late the eventlet hub woke a sleeping greenthread",
+    buckets=LAG_BUCKETS,
+)
+HUB_STALLS = metrics.counter(
+    "hearts_eventlet_hub_stalls_total",
+    "Hub stalls longer than HUB_LAG_THRESHOLD_MS",
+)
+
+
+class HubMonitor:
+    """Sampler greenthread plus native watchdog for one hub thread.
+
+    The sampler and the watchdog talk only through plain attributes
+    (heartbeat timestamp, stall flag); a stale read costs at most one
+    watchdog period.
+    """
+
+    def __init__(self, interval: float, threshold: float) -> None:
+        self.interval = interval
+        self.threshold = threshold
+        self.hub_thread_id: Optional[int] = None
+        self.heartbeat = time.monotonic()
+        self.in_stall = False
+        self.samples = 0
+        self.stalls = 0
+        self.lag_max = 0.0
+        self.last_lag = 0.0
+        self.last_stall_seconds = 0.0
+        self.last_stall_at: Optional[float] = None
+
+    # -- sampler (runs on the hub thread) ------------------------------------
+
+    def record(self, lag: float) -> None:
+        """Record one sample and refresh the heartbeat."""
+        lag = max(0.0, lag)
+        HUB_LAG_SECONDS.observe(lag)
+        self.samples += 1
+        self.last_lag = lag
+        self.lag_max = max(self.lag_max, lag)
+        if lag >= self.threshold:
+            self.stalls += 1
+            self.last_stall_seconds = lag
+            self.last_stall_at = time.time()
+            HUB_STALLS.inc()
+        self.heartbeat = time.monotonic()
+        self.in_stall = False
+
+    def sample_forever(self) -> None:
+        import eventlet
+
+        while True:
+            started = time.monotonic()
+            eventlet.sleep(self.interval)
+            self.record(time.monotonic() - started - self.interval)
+
+    # -- watchdog (runs on a native thread) ----------------------------------
+
+    def check(self, now: float) -> bool:
+        """Log the hub thread's stack if the heartbeat is stale.
+
+        Returns True when a stack was logged. Only the first check of a stall
+        logs; the next heartbeat re-arms it.
+        """
+        overdue = now - self.heartbeat - self.interval
+        if self.in_stall or overdue < self.threshold:
+            return False
+        self.in_stall = True
+        frame = sys._current_frames().get(self.hub_thread_id)
+        stack = "".join(traceback.format_stack(frame)) if frame else "<unavailable>\n"
+        logger.warning(
+            "eventlet hub blocked for %.0f ms; blocking stack:\n%s",
+            overdue * 1000,
+            stack,
+        )
+        return True
+
+    def watch_forever(self, sleep) -> None:
+        period = max(self.threshold / 2, 0.01)
+        while True:
+            sleep(period)
+            try:
+                self.check(time.monotonic())
+            except Exception:
+                logger.exception("hub_monitor: watchdog check failed")
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "interval_ms": round(self.interval * 1000, 3),
+            "threshold_ms": round(self.threshold * 1000, 3),
+            "samples": self.samples,
+            "stalls": self.stalls,
+            "lag_last_ms": round(self.last_lag * 1000, 3),
+            "lag_max_ms": round(self.lag_max * 1000, 3),
+            "last_stall_ms": round(self.last_stall_seconds * 1000, 3),
+            "last_stall_at": self.last_stall_at,
+        }
+
+
+_monitor: Optional[HubMonitor] = None
+
+
+def _from_env() -> HubMonitor:
+    return HubMonitor(
+        interval=int(os.environ.get("HUB_LAG_INTERVAL_MS", "100")) / 1000,
+        threshold=int(os.environ.get("HUB_LAG_THRESHOLD_MS", "250")) / 1000,
+    )
+
+
+def ensure_started() -> None:
+    """Start the sampler and watchdog once per process.
+
+    No-op under TESTING, with HUB_MONITOR=0, or when eventlet has not
+    patched the process (there is no shared hub to watch).
+    """
+    global _monitor
+    if _monitor is not None:
+        return
+    from flask import current_app
+
+    if current_app.config.get("TESTING") or os.environ.get("HUB_MONITOR") == "0":
+        return
+    from eventlet import patcher
+
+    if not patcher.is_monkey_patched("thread"):
+        return
+    start(_from_env())
+
+
+def start(monitor: HubMonitor) -> HubMonitor:
+    """Run *monitor* against the calling thread's hub."""
+    import eventlet
+    from eventlet import patcher
+
+    global _monitor
+    native_thread = patcher.original("_thread")
+    native_time = patcher.original("time")
+    monitor.hub_thread_id = native_thread.get_ident()
+    monitor.heartbeat = time.monotonic()
+    _monitor = monitor
+    eventlet.spawn(monitor.sample_forever)
+    native_thread.start_new_thread(monitor.watch_forever, (native_time.sleep,))
+    logger.info(
+        "hub_monitor: sampling every %.0f ms, stall threshold %.0f ms",
+        monitor.interval * 1000,
+        monitor.threshold * 1000,
+    )
+    return monitor
+
+
+def stats() -> Dict[str, float]:
+    """Lag statistics for /health ({"running": False} before start)."""
+    if _monitor is None:
+        return {"running": False}
+    return {"running": True, **_monitor.stats()}
+
+
+def reset_hub_monitor() -> None:
+    """Forget the running monitor. For tests only."""
+    global _monitor
+    _monitor = None
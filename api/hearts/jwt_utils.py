@@ -1,41 +1,149 @@
 import os
+import time
 import jwt
 from functools import wraps
+from typing import NamedTuple, Optional, Sequence
 from flask import request, jsonify, g
 
+from hearts.cache import TTLCache
+from hearts.extensions import db
 from hearts.models import User
 
 
-def get_current_user():
-    """Parse JWT from Authorization header and return User or None. Sets g.current_user."""
+class Principal(NamedTuple):
+    """The parts of a User that read-only request handling needs."""
+
+    id: int
+    username: str
+    profile_icon: str
+
+
+# Validated token -> user id, kept no longer than the token's own expiry.
+_token_cache: "TTLCache[int]" = TTLCache(maxsize=4096, ttl=300)
+# User id -> Principal; dropped by forget_principal() when the user changes.
+_principal_cache: "TTLCache[Principal]" = TTLCache(maxsize=4096, ttl=60)
+
+
+def reset_principal_cache() -> None:
+    """Clear the token and principal caches. For tests only."""
+    _token_cache.clear()
+    _principal_cache.clear()
+
+
+def forget_principal(user_id: int) -> None:
+    """Drop the cached principal for *user_id* (after a profile change or delete)."""
+    _principal_cache.pop(user_id)
+
+
+def get_principal(user_id: int) -> Optional[Principal]:
+    """Return the Principal for *user_id*, loading only its columns on a miss."""
+    principal = _principal_cache.get(user_id)
+    if principal is None:
+        row = (
+            db.session.query(User.id, User.username, User.profile_icon)
+            .filter(User.id == user_id)
+            .first()
+        )
+        if row is None:
+            return None
+        principal = Principal(*row)
+        _principal_cache.set(user_id, principal)
+    return principal
+
+
+def _bearer_token() -> Optional[str]:
     auth = request.headers.get("Authorization")
     if not auth or not auth.startswith("Bearer "):
         return None
-    token = auth[7:].strip()
+    return auth[7:].strip()
+
+
+def _user_id_from_token(token: str) -> Optional[int]:
+    """Validate *token* and return its subject, or None."""
+    user_id = _token_cache.get(token)
+    if user_id is not None:
+        return user_id
     secret = os.environ.get("JWT_SECRET")
     if not secret:
         return None
     try:
         payload = jwt.decode(token, secret, algorithms=["HS256"])
-        user_id = payload.get("sub")
-        if not user_id:
-            return None
-        user = User.query.get(int(user_id))
-        if user:
-            g.current_user = user
-        return user
     except jwt.InvalidTokenError:
         return None
+    sub = payload.get("sub")
+    if not sub:
+        return None
+    user_id = int(sub)
+    exp = payload.get("exp")
+    _token_cache.set(token, user_id, ttl=exp - time.time() if exp else None)
+    return user_id
+
+
+def get_current_user_id() -> Optional[int]:
+    """Subject of the Authorization header's JWT, or None. No database access.
+
+    Does not check that the user still exists; handlers that serve cached data
+    by user id use it to skip the users lookup on a hit.
+    """
+    token = _bearer_token()
+    return _user_id_from_token(token) if token else None
+
+
+def principal_from_token(token: str) -> Optional[Principal]:
+    """Resolve a raw JWT (e.g. from a socket query string) to a Principal."""
+    user_id = _user_id_from_token(token)
+    return get_principal(user_id) if user_id is not None else None
+
+
+def get_current_principal() -> Optional[Principal]:
+    """Parse JWT from Authorization header and return a Principal or None.
+
+    Served from cache for repeat requests with the same token, so use this
+    instead of get_current_user() when the handler only needs id / username /
+    icon. Sets g.current_principal.
+    """
+    token = _bearer_token()
+    if not token:
+        return None
+    principal = principal_from_token(token)
+    if principal:
+        g.current_principal = principal
+    return principal
+
+
+def get_current_user(options: Sequence = ()):
+    """Parse JWT from Authorization header and return User or None. Sets g.current_user.
+
+    Only the users row is loaded unless *options* (e.g.
+    ``joinedload(User.stats)``) asks for relationships up front.
+    """
+    token = _bearer_token()
+    if not token:
+        return None
+    user_id = _user_id_from_token(token)
+    if user_id is None:
+        return None
+    user = db.session.get(User, user_id, options=options)
+    if user:
+        g.current_user = user
+    return user
+
+
+def require_jwt(f=None, *, options: Sequence = ()):
+    """Decorator: require valid JWT; return 401 if missing or invalid. Sets g.current_user.
 
+    Use bare (``@require_jwt``) or with loader options for the User
+    (``@require_jwt(options=[joinedload(User.preferences)])``).
+    """
 
-def require_jwt(f):
-    """Decorator: require valid JWT; return 401 if missing or invalid. Sets g.current_user."""
+    def decorate(f):
+        @wraps(f)
+        def wrapped(*args, **kwargs):
+            user = get_current_user(options)
+            if not user:
+                return jsonify({"error": "Authentication required"}), 401
+            return f(*args, **kwargs)
 
-    @wraps(f)
-    def wrapped(*args, **kwargs):
-        user = get_current_user()
-        if not user:
-            return jsonify({"error": "Authentication required"}), 401
-        return f(*args, **kwargs)
+        return wrapped
 
-    return wrapped
+    return decorate(f) if f is not None else decorate
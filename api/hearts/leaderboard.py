@@ -0,0 +1,266 @@
+"""
+In-memory leaderboard store.
+
+Holds, per category, every user's all-time and current-month win count plus a
+pre-sorted top 10, so GET /leaderboard never aggregates GameResult rows.
+Writers call record_result() after committing a game; the boards are updated
+in place. Each category's JSON body and ETag are cached until its board
+changes. The whole store is rebuilt from the database every
+_REBUILD_SECONDS and at month rollover, which reconciles any drift (manual
+edits, deleted accounts, writes from another process).
+"""
+
+import hashlib
+import json
+import time
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import func
+
+from hearts.extensions import db
+from hearts.models import DifficultyStats, GameResult, User, UserStats
+
+CATEGORIES = ("easy", "medium", "hard", "harder", "hardest", "multiplayer")
+TOP_N = 10
+_REBUILD_SECONDS = 10 * 60
+
+_HARD_WIN_COL = {
+    "hard": UserStats.hard_wins,
+    "harder": UserStats.harder_wins,
+    "hardest": UserStats.hardest_wins,
+}
+
+
+def first_of_month() -> datetime:
+    now = datetime.utcnow()
+    return now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+class _Board:
+    """Win counts for one board and its top ``TOP_N`` user ids, best first."""
+
+    __slots__ = ("wins", "top")
+
+    def __init__(self, wins: Dict[int, int]) -> None:
+        self.wins = wins
+        self.top: List[int] = sorted(wins, key=self._rank_key)[:TOP_N]
+
+    def _rank_key(self, user_id: int) -> Tuple[int, int]:
+        return (-self.wins[user_id], user_id)
+
+    def set_wins(self, user_id: int, wins: int) -> None:
+        """Raise *user_id*'s count to *wins*.
+
+        Counts only grow between rebuilds, so the new top N is always drawn
+        from the old top N plus this user.
+        """
+        self.wins[user_id] = wins
+        candidates = set(self.top)
+        candidates.add(user_id)
+        self.top = sorted(candidates, key=self._rank_key)[:TOP_N]
+
+
+def _load_all_time() -> Dict[str, Dict[int, int]]:
+    boards: Dict[str, Dict[int, int]] = {cat: {} for cat in CATEGORIES}
+    rows = (
+        db.session.query(
+            DifficultyStats.category, DifficultyStats.user_id, DifficultyStats.games_won
+        )
+        .join(User, DifficultyStats.user_id == User.id)
+        .filter(
+            DifficultyStats.category.in_(("easy", "medium", "multiplayer")),
+            DifficultyStats.games_won > 0,
+        )
+        .all()
+    )
+    for category, user_id, wins in rows:
+        boards[category][user_id] = wins
+
+    rows = (
+        db.session.query(
+            UserStats.user_id,
+            UserStats.hard_wins,
+            UserStats.harder_wins,
+            UserStats.hardest_wins,
+        )
+        .join(User, UserStats.user_id == User.id)
+        .filter(
+            db.or_(*(col > 0 for col in _HARD_WIN_COL.values())),
+        )
+        .all()
+    )
+    for user_id, *wins in rows:
+        for category, count in zip(_HARD_WIN_COL, wins):
+            if count > 0:
+                boards[category][user_id] = count
+    return boards
+
+
+def _load_monthly(month_start: datetime) -> Dict[str, Dict[int, int]]:
+    boards: Dict[str, Dict[int, int]] = {cat: {} for cat in CATEGORIES}
+    rows = (
+        db.session.query(GameResult.difficulty, GameResult.user_id, func.count())
+        .join(User, GameResult.user_id == User.id)
+        .filter(
+            GameResult.difficulty.in_(CATEGORIES),
+            GameResult.won.is_(True),
+            GameResult.completed_at >= month_start,
+        )
+        .group_by(GameResult.difficulty, GameResult.user_id)
+        .all()
+    )
+    for category, user_id, wins in rows:
+        boards[category][user_id] = wins
+    return boards
+
+
+class LeaderboardStore:
+    """All boards plus the username / icon of every user shown on them.
+
+    ``version`` increases on changes that touch every board (rebuild,
+    invalidation, cached display info); a per-category counter increases
+    when a single board changes. Rendered responses are keyed on both.
+    """
+
+    def __init__(self) -> None:
+        self._all_time: Dict[str, _Board] = {}
+        self._monthly: Dict[str, _Board] = {}
+        self._users: Dict[int, Tuple[str, str]] = {}
+        self._month_start: Optional[datetime] = None
+        self._built_at: Optional[float] = None
+        self._category_versions: Dict[str, int] = {cat: 0 for cat in CATEGORIES}
+        self._rendered: Dict[str, Tuple[Tuple[int, int], bytes, str]] = {}
+        self.version = 0
+
+    def _is_stale(self) -> bool:
+        return (
+            self._built_at is None
+            or time.monotonic() - self._built_at > _REBUILD_SECONDS
+            or self._month_start != first_of_month()
+        )
+
+    def rebuild(self) -> None:
+        month_start = first_of_month()
+        all_time = _load_all_time()
+        monthly = _load_monthly(month_start)
+        self._all_time = {cat: _Board(all_time[cat]) for cat in CATEGORIES}
+        self._monthly = {cat: _Board(monthly[cat]) for cat in CATEGORIES}
+        self._users = {}
+        self._month_start = month_start
+        self._built_at = time.monotonic()
+        self.version += 1
+
+    def invalidate(self) -> None:
+        """Force a full rebuild on the next read."""
+        self._built_at = None
+        self.version += 1
+
+    def record_result(
+        self, user_id: int, category: str, won: bool, all_time_wins: int
+    ) -> None:
+        """Apply one committed game result.
+
+        *all_time_wins* is the user's new all-time win count for *category*
+        as stored in DifficultyStats / UserStats.
+        """
+        if not won or category not in CATEGORIES or self._built_at is None:
+            return
+        if self._month_start != first_of_month():
+            self.invalidate()
+            return
+        self._all_time[category].set_wins(user_id, all_time_wins)
+        monthly = self._monthly[category]
+        monthly.set_wins(user_id, monthly.wins.get(user_id, 0) + 1)
+        self._category_versions[category] += 1
+
+    def forget_user(self, user_id: int) -> None:
+        """Drop cached display info (username / icon) for *user_id*."""
+        if self._users.pop(user_id, None) is not None:
+            self.version += 1
+
+    def _resolve_users(self, user_ids: Iterable[int]) -> None:
+        missing = [uid for uid in user_ids if uid not in self._users]
+        if not missing:
+            return
+        rows = (
+            db.session.query(User.id, User.username, User.profile_icon)
+            .filter(User.id.in_(missing))
+            .all()
+        )
+        for user_id, username, icon in rows:
+            self._users[user_id] = (username, icon)
+
+    def _entries(self, board: _Board) -> List[dict]:
+        entries = []
+        for user_id in board.top:
+            user = self._users.get(user_id)
+            if user is None:
+                continue
+            entries.append(
+                {
+                    "rank": len(entries) + 1,
+                    "username": user[0],
+                    "profile_icon": user[1],
+                    "games_won": board.wins[user_id],
+                }
+            )
+        return entries
+
+    def get(self, category: str) -> Dict[str, List[dict]]:
+        """Return ``{"monthly": [...], "all_time": [...]}`` for *category*."""
+        if self._is_stale():
+            self.rebuild()
+        monthly = self._monthly[category]
+        all_time = self._all_time[category]
+        self._resolve_users([*monthly.top, *all_time.top])
+        return {
+            "monthly": self._entries(monthly),
+            "all_time": self._entries(all_time),
+        }
+
+    def render(self, category: str) -> Tuple[bytes, str]:
+        """Return the JSON body for *category* and a strong ETag for it.
+
+        The body is rebuilt only when the board behind it has changed. The
+        ETag is a digest of the body, so it is stable across rebuilds and
+        worker processes that produce the same leaderboard.
+        """
+        if self._is_stale():
+            self.rebuild()
+        key = (self.version, self._category_versions[category])
+        cached = self._rendered.get(category)
+        if cached is None or cached[0] != key:
+            body = json.dumps(self.get(category), separators=(",", ":")).encode()
+            etag = hashlib.sha256(body).hexdigest()[:32]
+            cached = self._rendered[category] = (key, body, etag)
+        return cached[1], cached[2]
+
+
+_store = LeaderboardStore()
+
+
+def get_leaderboard(category: str) -> Dict[str, List[dict]]:
+    return _store.get(category)
+
+
+def render_leaderboard(category: str) -> Tuple[bytes, str]:
+    return _store.render(category)
+
+
+def record_result(user_id: int, category: str, won: bool, all_time_wins: int) -> None:
+    _store.record_result(user_id, category, won, all_time_wins)
+
+
+def forget_user(user_id: int) -> None:
+    _store.forget_user(user_id)
+
+
+def invalidate() -> None:
+    _store.invalidate()
+
+
+def reset_store() -> None:
+    """Drop all boards. For tests only."""
+    global _store
+    _store = LeaderboardStore()
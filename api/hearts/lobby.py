@@ -12,6 +12,9 @@ import uuid
 from dataclasses import dataclass, field
 from typing import Any, Dict, List, Optional, Tuple
 
+from hearts import metrics
+from hearts.ai.factory import normalize_difficulty
+
 _CHARSET = "ABCDEFGHJKMNPQRSTUVWXYZ23456789"
 _CODE_LEN = 6
 _EXPIRY_SECONDS = 20 * 60  # 20 minutes
@@ -19,6 +22,8 @@ _MAX_CODE_RETRIES = 3
 
 _lobbies: Dict[str, "Lobby"] = {}
 
+metrics.gauge("hearts_lobbies", "Open multiplayer lobbies", lambda: len(_lobbies))
+
 
 @dataclass
 class Seat:
@@ -231,6 +236,7 @@ def start_game(code: str, difficulty: str) -> str:
         raise ValueError("Lobby not found")
     if lobby.status != "waiting":
         raise ValueError("Game has already started")
+    normalize_difficulty(difficulty)
 
     bot_num = 1
     for i in range(4):
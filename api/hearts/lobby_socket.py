@@ -11,6 +11,7 @@ from typing import Dict, Optional, Tuple
 from flask import request
 from flask_socketio import emit, join_room, leave_room
 
+from hearts.ai.factory import normalize_difficulty
 from hearts.lobby import (
     Lobby,
     get_lobby,
@@ -245,6 +246,7 @@ def register_lobby_socket(socketio):
         ) or "easy"
 
         try:
+            difficulty = normalize_difficulty(difficulty)
             game_id = start_game(code, difficulty)
         except ValueError as e:
             emit("error", {"message": str(e)}, namespace="/lobby")
@@ -0,0 +1,402 @@
+"""
+In-process metrics, exported in the Prometheus text format by GET /metrics.
+
+Counters and histograms are plain Python numbers updated inline. The API runs
+as a single eventlet worker and nothing here yields, so no locking is needed
+and an update costs a dict lookup and an add. Gauges are callbacks read at
+scrape time, so sizes of in-memory stores cost nothing between scrapes.
+
+Usage::
+
+    from hearts import metrics
+
+    SAVES = metrics.histogram("hearts_save_seconds", "...", ("mode",))
+    with SAVES.labels("single").time():
+        ...
+    metrics.gauge("hearts_store_size", "...", lambda: len(_store))
+"""
+
+import logging
+import math
+import time
+from abc import ABC, abstractmethod
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, List, Sequence, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Seconds; covers a cached HTTP hit through a "hardest" AI decision.
+DEFAULT_BUCKETS: Tuple[float, ...] = (
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+
+GaugeValue = Union[float, Dict[Tuple[str, ...], float]]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    parts = [f'{n}="{_escape(str(v))}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _number(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Timer:
+    """Context manager that observes its block's duration on a histogram child."""
+
+    __slots__ = ("_child", "_started")
+
+    def __init__(self, child: "_HistogramChild") -> None:
+        self._child = child
+
+    def __enter__(self) -> "_Timer":
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._child.observe(time.perf_counter() - self._started)
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str]) -> None:
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+
+    def _header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+
+class _ChildMetric(_Metric, ABC):
+    """A metric that keeps one child per label-value tuple, updated inline."""
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str]) -> None:
+        super().__init__(name, help_text, labelnames)
+        self._children: Dict[Tuple[str, ...], object] = {}
+
+    def labels(self, *values: str):
+        child = self._children.get(values)
+        if child is None:
+            if len(values) != len(self.labelnames):
+                raise ValueError(f"{self.name} expects labels {self.labelnames}")
+            child = self._children[values] = self._new_child()
+        return child
+
+    @abstractmethod
+    def _new_child(self):
+        """A fresh child for a label-value tuple not seen before."""
+
+
+class _CounterChild:
+    __slots__ = ("value",)
+
+    def __init__(self) -> None:
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0) -> None:
+        self.value += amount
+
+
+class Counter(_ChildMetric):
+    kind = "counter"
+
+    def _new_child(self) -> _CounterChild:
+        return _CounterChild()
+
+    def inc(self, amount: float = 1.0) -> None:
+        self.labels().inc(amount)
+
+    def collect(self) -> List[str]:
+        lines = self._header()
+        for values, child in self._children.items():
+            lines.append(
+                f"{self.name}{_labels(self.labelnames, values)} {_number(child.value)}"
+            )
+        return lines
+
+
+class _HistogramChild:
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets: Tuple[float, ...]) -> None:
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def time(self) -> _Timer:
+        return _Timer(self)
+
+
+class Histogram(_ChildMetric):
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help_text: str,
+        labelnames: Sequence[str],
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> None:
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def _new_child(self) -> _HistogramChild:
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value: float) -> None:
+        self.labels().observe(value)
+
+    def time(self) -> _Timer:
+        return self.labels().time()
+
+    def collect(self) -> List[str]:
+        lines = self._header()
+        for values, child in self._children.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), child.counts):
+                cumulative += count
+                le = f'le="{_number(bound)}"'
+                lines.append(
+                    f"{self.name}_bucket{_labels(self.labelnames, values, le)} "
+                    f"{cumulative}"
+                )
+            label_str = _labels(self.labelnames, values)
+            lines.append(f"{self.name}_sum{label_str} {_number(child.sum)}")
+            lines.append(f"{self.name}_count{label_str} {child.count}")
+        return lines
+
+
+class Gauge(_Metric):
+    """A value read from *fn* at scrape time.
+
+    *fn* returns a number, or a dict mapping label-value tuples to numbers.
+    ``kind="counter"`` exports a monotonically increasing value kept
+    elsewhere (e.g. a pool's checkout count) with the right type.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        help_text: str,
+        fn: Callable[[], GaugeValue],
+        labelnames: Sequence[str] = (),
+        kind: str = "gauge",
+    ) -> None:
+        super().__init__(name, help_text, labelnames)
+        self.fn = fn
+        self.kind = kind
+
+    def collect(self) -> List[str]:
+        try:
+            value = self.fn()
+        except Exception:
+            logger.exception("metrics: gauge %s failed", self.name)
+            return []
+        samples = value if isinstance(value, dict) else {(): value}
+        lines = self._header()
+        for values, sample in samples.items():
+            lines.append(
+                f"{self.name}{_labels(self.labelnames, values)} {_number(sample)}"
+            )
+        return lines
+
+
+_registry: Dict[str, _Metric] = {}
+
+
+def _register(metric: _Metric) -> _Metric:
+    existing = _registry.get(metric.name)
+    if existing is not None:
+        if type(existing) is not type(metric):
+            raise ValueError(f"metric {metric.name} already registered")
+        if isinstance(metric, Gauge):
+            # Re-registration (e.g. a module reloaded in tests) rebinds the callback.
+            existing.fn = metric.fn
+        return existing
+    _registry[metric.name] = metric
+    return metric
+
+
+def counter(name: str, help_text: str, labelnames: Sequence[str] = ()) -> Counter:
+    return _register(Counter(name, help_text, labelnames))
+
+
+def histogram(
+    name: str,
+    help_text: str,
+    labelnames: Sequence[str] = (),
+    buckets: Sequence[float] = DEFAULT_BUCKETS,
+) -> Histogram:
+    return _register(Histogram(name, help_text, labelnames, buckets))
+
+
+def gauge(
+    name: str,
+    help_text: str,
+    fn: Callable[[], GaugeValue],
+    labelnames: Sequence[str] = (),
+    kind: str = "gauge",
+) -> Gauge:
+    return _register(Gauge(name, help_text, fn, labelnames, kind))
+
+
+def gauges_from_stats(
+    prefix: str,
+    help_text: str,
+    fn: Callable[[], Dict[str, float]],
+    keys: Iterable[str],
+    counters: Iterable[str] = (),
+) -> None:
+    """Export selected keys of a stats dict (e.g. pool_stats()) as gauges.
+
+    Each key becomes ``<prefix>_<key>``; keys in *counters* are typed as
+    counters.
+    """
+    counters = set(counters)
+    for key in keys:
+        gauge(
+            f"{prefix}_{key}",
+            f"{help_text} ({key})",
+            lambda key=key: fn().get(key, 0),
+            kind="counter" if key in counters else "gauge",
+        )
+
+
+def render() -> str:
+    lines: List[str] = []
+    for metric in _registry.values():
+        lines.extend(metric.collect())
+    return "\n".join(lines) + "\n"
+
+
+# -----------------------------------------------------------------------------
+# Shared metrics
+# -----------------------------------------------------------------------------
+
+HTTP_REQUEST_SECONDS = histogram(
+    "hearts_http_request_duration_seconds",
+    "HTTP request handling time",
+    ("method", "endpoint", "status"),
+)
+SOCKET_EVENT_SECONDS = histogram(
+    "hearts_socket_event_duration_seconds",
+    "Socket.IO event handler time",
+    ("namespace", "event"),
+)
+AI_DECISION_SECONDS = histogram(
+    "hearts_ai_decision_seconds",
+    "Time for an AI seat to choose a pass or play",
+    ("difficulty", "action"),
+)
+AI_ROLLOUTS = counter(
+    "hearts_ai_rollouts_total",
+    "Monte Carlo rollouts simulated by the hard AI (rate() gives rollouts/s)",
+)
+SAVE_GAME_SECONDS = histogram(
+    "hearts_save_game_duration_seconds",
+    "Time to persist a game's state (_save_to_db)",
+    ("mode",),
+)
+
+
+# -----------------------------------------------------------------------------
+# Flask / Socket.IO integration
+# -----------------------------------------------------------------------------
+
+
+def init_app(app) -> None:
+    """Time every HTTP request by route rule."""
+    from flask import g, request
+
+    @app.before_request
+    def _start_timer():
+        g._metrics_started = time.perf_counter()
+
+    @app.after_request
+    def _observe(response):
+        started = g.pop("_metrics_started", None)
+        if started is not None:
+            rule = request.url_rule.rule if request.url_rule else "unmatched"
+            HTTP_REQUEST_SECONDS.labels(
+                request.method, rule, str(response.status_code)
+            ).observe(time.perf_counter() - started)
+        return response
+
+
+def init_socketio(socketio) -> None:
+    """Time every Socket.IO event handler and export connections per namespace.
+
+    Flask-SocketIO routes every registered handler through
+    ``SocketIO._handle_event``; wrapping it on the instance covers handlers
+    registered before or after this call without touching them.
+    """
+    handle_event = socketio._handle_event
+
+    def _timed_handle_event(handler, message, namespace, sid, *args):
+        started = time.perf_counter()
+        try:
+            return handle_event(handler, message, namespace, sid, *args)
+        finally:
+            SOCKET_EVENT_SECONDS.labels(namespace, message).observe(
+                time.perf_counter() - started
+            )
+
+    socketio._handle_event = _timed_handle_event
+
+    def _connected():
+        rooms = getattr(socketio.server.manager, "rooms", {})
+        return {(ns,): len(ns_rooms.get(None, ())) for ns, ns_rooms in rooms.items()}
+
+    gauge(
+        "hearts_socket_connections",
+        "Connected Socket.IO clients",
+        _connected,
+        ("namespace",),
+    )
+
+
+def _pending_timers() -> float:
+    from eventlet.hubs import get_hub
+
+    hub = get_hub()
+    return len(hub.timers) + len(hub.next_timers)
+
+
+gauge(
+    "hearts_eventlet_pending_timers",
+    "Timers scheduled on the eventlet hub",
+    _pending_timers,
+)
@@ -19,8 +19,11 @@ class User(db.Model):
     verification_expires = db.Column(db.DateTime)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
-    stats = db.relationship(
-        "UserStats", uselist=False, back_populates="user", lazy="joined"
+    # Loaded on access; handlers that need them up front (/me, /stats) ask for
+    # a joinedload via require_jwt(options=...).
+    stats = db.relationship("UserStats", uselist=False, back_populates="user")
+    preferences = db.relationship(
+        "UserPreferences", uselist=False, back_populates="user"
     )
 
     def to_dict(self):
@@ -175,9 +178,7 @@ class UserPreferences(db.Model):
     hard_level = db.Column(db.String(20), default="hard", nullable=False)
     mobile_layout = db.Column(db.String(20), default="single", nullable=False)
 
-    user = db.relationship(
-        "User", backref=db.backref("preferences", uselist=False, lazy="joined")
-    )
+    user = db.relationship("User", back_populates="preferences")
 
     def to_dict(self):
         return {
@@ -242,6 +243,7 @@ class DifficultyStats(db.Model):
         db.UniqueConstraint(
             "user_id", "category", name="uq_difficulty_stats_user_category"
         ),
+        db.Index("ix_difficulty_stats_category_games_won", "category", "games_won"),
     )
 
     user = db.relationship(
@@ -272,13 +274,64 @@ class GameResult(db.Model):
     user_id = db.Column(
         db.Integer, db.ForeignKey("users.id"), nullable=False, index=True
     )
-    difficulty = db.Column(db.String(16), nullable=False, index=True)
+    difficulty = db.Column(db.String(16), nullable=False)
     won = db.Column(db.Boolean, default=False, nullable=False)
     completed_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    # NULL for results recorded before games were deduplicated in the database.
+    game_id = db.Column(db.String(64), nullable=True)
+
+    # Monthly leaderboards filter on difficulty / won / completed_at and group
+    # by user_id. The predicate matches how ``won.is_(True)`` renders on each
+    # backend so SQLite's planner will pick the partial index.
+    __table_args__ = (
+        db.Index(
+            "ix_game_results_won_difficulty_completed_at",
+            "difficulty",
+            "completed_at",
+            "user_id",
+            postgresql_where=db.text("won IS true"),
+            sqlite_where=db.text("won IS 1"),
+        ),
+        # A game counts once per player, however many times it is reported.
+        db.UniqueConstraint("user_id", "game_id", name="uq_game_results_user_game"),
+    )
 
     user = db.relationship("User", backref=db.backref("game_results", lazy="dynamic"))
 
 
+class MonthlyResult(db.Model):
+    """Per-user game and win counts for one difficulty in one calendar month.
+
+    Written by reset_month from game_results, whose raw rows are pruned once
+    they fall outside the retention window.
+    """
+
+    __tablename__ = "monthly_results"
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False)
+    difficulty = db.Column(db.String(16), nullable=False)
+    month = db.Column(db.Date, nullable=False)
+    games_played = db.Column(db.Integer, default=0, nullable=False)
+    games_won = db.Column(db.Integer, default=0, nullable=False)
+
+    __table_args__ = (
+        db.UniqueConstraint(
+            "user_id", "difficulty", "month", name="uq_monthly_results_user_month"
+        ),
+        db.Index(
+            "ix_monthly_results_difficulty_month_won",
+            "difficulty",
+            "month",
+            "games_won",
+        ),
+    )
+
+    user = db.relationship(
+        "User", backref=db.backref("monthly_results", lazy="dynamic")
+    )
+
+
 class PasswordResetToken(db.Model):
     __tablename__ = "password_reset_tokens"
 
@@ -289,3 +342,29 @@ class PasswordResetToken(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
     user = db.relationship("User", backref=db.backref("reset_tokens", lazy="dynamic"))
+
+
+class OutboundEmail(db.Model):
+    """A queued email; see hearts.email_queue for the sender."""
+
+    __tablename__ = "outbound_emails"
+
+    PENDING = "pending"
+    SENDING = "sending"
+    SENT = "sent"
+    DEAD = "dead"
+
+    id = db.Column(db.Integer, primary_key=True)
+    to_email = db.Column(db.String(255), nullable=False)
+    subject = db.Column(db.String(255), nullable=False)
+    html_body = db.Column(db.Text, nullable=False)
+    status = db.Column(db.String(16), default=PENDING, nullable=False)
+    attempts = db.Column(db.Integer, default=0, nullable=False)
+    next_attempt_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    last_error = db.Column(db.Text, nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    sent_at = db.Column(db.DateTime, nullable=True)
+
+    __table_args__ = (
+        db.Index("ix_outbound_emails_status_next_attempt", "status", "next_attempt_at"),
+    )
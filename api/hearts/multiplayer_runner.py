@@ -11,25 +11,33 @@ differences from GameRunner:
 
 import json
 import random
+from dataclasses import replace
 from typing import Any, Callable, Dict, List, Optional
 
 from hearts.game.card import Card, Suit, deck_52, shuffle_deck, deal_into_4_hands
-from hearts.game.rules import get_legal_plays, is_valid_pass
-from hearts.game.state import GameState, Phase, PassDirection
+from hearts.game.rules import is_valid_pass
+from hearts.game.state import (
+    GameState,
+    Phase,
+    PassDirection,
+    bookkeeping_from_dict,
+    bookkeeping_to_dict,
+)
 from hearts.game.transitions import (
     apply_passes,
     apply_play,
+    apply_play_unchecked,
     apply_round_scoring,
     deal_new_round,
-    _is_first_lead,
-    _is_first_trick_of_round,
 )
+from hearts.ai import profiling
 from hearts.ai.base import PassStrategy, PlayStrategy
 from hearts.ai.factory import create_strategies
+from hearts.metrics import AI_DECISION_SECONDS
 
 
 def _round_complete(state: GameState) -> bool:
-    return sum(len(state.hands[i]) for i in range(4)) == 0
+    return state.tricks_completed == 13
 
 
 class SeatConfig:
@@ -79,6 +87,7 @@ class MultiplayerRunner:
         seats: List[SeatConfig],
         rng: Optional[random.Random] = None,
         difficulty: str = "easy",
+        profile_id: Optional[str] = None,
     ) -> None:
         self._state = state
         self._pass_strategy = pass_strategy
@@ -86,6 +95,10 @@ class MultiplayerRunner:
         self._seats = seats
         self._rng = rng or random.Random()
         self._difficulty = difficulty
+        self._profile_id = profile_id
+        self._profiler = profiling.open_profiler(
+            profile_id, difficulty, pass_strategy, play_strategy
+        )
         self._pending_passes: Dict[int, List[Card]] = {}
         self._last_play_events: List[Dict[str, Any]] = []
         self._last_round_ended: bool = False
@@ -110,6 +123,7 @@ class MultiplayerRunner:
         seats: List[SeatConfig],
         difficulty: str = "easy",
         rng: Optional[random.Random] = None,
+        profile_id: Optional[str] = None,
     ) -> "MultiplayerRunner":
         rng = rng or random.Random()
         deck = shuffle_deck(deck_52(), rng=rng)
@@ -117,7 +131,13 @@ class MultiplayerRunner:
         state = deal_new_round((0, 0, 0, 0), 1, hands)
         pass_strategy, play_strategy = create_strategies(difficulty, rng=rng)
         return cls(
-            state, pass_strategy, play_strategy, seats, rng=rng, difficulty=difficulty
+            state,
+            pass_strategy,
+            play_strategy,
+            seats,
+            rng=rng,
+            difficulty=difficulty,
+            profile_id=profile_id,
         )
 
     def is_active_human(self, seat_index: int) -> bool:
@@ -176,9 +196,11 @@ class MultiplayerRunner:
             if i in self._pending_passes:
                 passes[i] = self._pending_passes[i]
             else:
-                passes[i] = self._pass_strategy.choose_cards_to_pass(
-                    self._state.hand(i), self._state.pass_direction
-                )
+                with AI_DECISION_SECONDS.labels(self._difficulty, "pass").time():
+                    with profiling.decision(self._profiler, "pass", self._state, i, 0):
+                        passes[i] = self._pass_strategy.choose_cards_to_pass(
+                            self._state.hand(i), self._state.pass_direction
+                        )
         self._state = apply_passes(self._state, passes)
         self._pending_passes.clear()
         self._last_round_ended = False
@@ -201,17 +223,9 @@ class MultiplayerRunner:
         if not self._is_active_human(seat_index):
             raise ValueError("Not an active human seat")
 
-        hand = self._state.hand(seat_index)
-        if card not in hand:
+        if card not in self._state.hands[seat_index]:
             raise ValueError("Card not in hand")
-        legal = get_legal_plays(
-            hand,
-            self._state.trick_list(),
-            self._state.hearts_broken,
-            first_lead_of_round=_is_first_lead(self._state, hand),
-            first_trick=_is_first_trick_of_round(self._state),
-        )
-        if card not in legal:
+        if card not in self._state.legal_plays:
             raise ValueError("Illegal play")
 
         if card.suit == Suit.HEARTS and not self._state.hearts_broken:
@@ -222,7 +236,7 @@ class MultiplayerRunner:
         play_event = {"player_index": seat_index, "card": card.to_code()}
         self._last_play_events = [play_event]
         self._last_round_ended = False
-        self._state = apply_play(self._state, seat_index, card)
+        self._state = apply_play_unchecked(self._state, seat_index, card)
         if on_play:
             on_play(play_event)
         if (
@@ -278,15 +292,12 @@ class MultiplayerRunner:
                 if on_done:
                     on_done({})
                 return
-            hand = self._state.hand(player)
-            legal = get_legal_plays(
-                hand,
-                self._state.trick_list(),
-                self._state.hearts_broken,
-                first_lead_of_round=_is_first_lead(self._state, hand),
-                first_trick=_is_first_trick_of_round(self._state),
-            )
-            card = self._play_strategy.choose_play(self._state, player, legal)
+            legal = list(self._state.legal_plays)
+            with AI_DECISION_SECONDS.labels(self._difficulty, "play").time():
+                with profiling.decision(
+                    self._profiler, "play", self._state, player, len(legal)
+                ):
+                    card = self._play_strategy.choose_play(self._state, player, legal)
             play_event = {"player_index": player, "card": card.to_code()}
             self._last_play_events.append(play_event)
             self._state = apply_play(self._state, player, card)
@@ -330,19 +341,7 @@ class MultiplayerRunner:
         self._pending_passes.pop(seat_index, None)
 
         if self._all_humans_conceded():
-            self._state = GameState(
-                round=self._state.round,
-                phase=self._state.phase,
-                pass_direction=self._state.pass_direction,
-                hands=self._state.hands,
-                current_trick=self._state.current_trick,
-                whose_turn=self._state.whose_turn,
-                scores=self._state.scores,
-                round_scores=self._state.round_scores,
-                hearts_broken=self._state.hearts_broken,
-                game_over=True,
-                winner_index=None,
-            )
+            self._state = replace(self._state, game_over=True, winner_index=None)
             return "terminated"
 
         # If it was this player's turn to pass and all remaining humans have
@@ -380,15 +379,7 @@ class MultiplayerRunner:
             and not s.game_over
             and self._is_active_human(seat_index)
         ):
-            hand = s.hand(seat_index)
-            legal_cards = get_legal_plays(
-                hand,
-                s.trick_list(),
-                s.hearts_broken,
-                first_lead_of_round=_is_first_lead(s, hand),
-                first_trick=_is_first_trick_of_round(s),
-            )
-            legal_plays = [c.to_code() for c in legal_cards]
+            legal_plays = [c.to_code() for c in s.legal_plays]
         current_trick = [
             {"player_index": idx, "card": card.to_code()}
             for idx, card in s.current_trick
@@ -469,7 +460,7 @@ class MultiplayerRunner:
         pending = {
             str(k): [c.to_code() for c in v] for k, v in self._pending_passes.items()
         }
-        return {
+        data = {
             "state": {
                 "round": s.round,
                 "phase": s.phase.value,
@@ -484,6 +475,7 @@ class MultiplayerRunner:
                 "hearts_broken": s.hearts_broken,
                 "game_over": s.game_over,
                 "winner_index": s.winner_index,
+                **bookkeeping_to_dict(s),
             },
             "seats": [sc.to_dict() for sc in self._seats],
             "difficulty": self._difficulty,
@@ -494,6 +486,9 @@ class MultiplayerRunner:
                 str(k): v for k, v in self._hearts_broken_count.items()
             },
         }
+        if self._profile_id is not None:
+            data["ai_profile"] = self._profile_id
+        return data
 
     def to_json(self) -> str:
         return json.dumps(self.to_dict())
@@ -517,6 +512,7 @@ class MultiplayerRunner:
             hearts_broken=sd["hearts_broken"],
             game_over=sd["game_over"],
             winner_index=sd.get("winner_index"),
+            **bookkeeping_from_dict(sd),
         )
         seats = [SeatConfig.from_dict(s) for s in data["seats"]]
         difficulty = data.get("difficulty", "easy")
@@ -528,7 +524,13 @@ class MultiplayerRunner:
             rng.setstate((rng_raw[0], tuple(rng_raw[1]), rng_raw[2]))
 
         runner = cls(
-            state, pass_strategy, play_strategy, seats, rng=rng, difficulty=difficulty
+            state,
+            pass_strategy,
+            play_strategy,
+            seats,
+            rng=rng,
+            difficulty=difficulty,
+            profile_id=data.get("ai_profile"),
         )
 
         pending_raw = data.get("pending_passes", {})
@@ -8,29 +8,27 @@ own hand). Play/trick events are broadcast to the entire room.
 
 import logging
 import eventlet
-from typing import Any, Dict, Optional, Set, Tuple
+from typing import Any, Dict, Optional, Set
 
 from flask import current_app, request
 from flask_socketio import emit, join_room
 
 logger = logging.getLogger(__name__)
 
+from hearts import leaderboard, metrics, stats_cache, stats_pipeline
 from hearts.extensions import db
+from hearts.ai import profiling
 from hearts.game.card import Card
 from hearts.lobby import get_lobby
-from hearts.models import ActiveGame, DifficultyStats, GameResult, UserStats
+from hearts.models import ActiveGame
 from hearts.multiplayer_runner import MultiplayerRunner, SeatConfig
 from hearts.multiplayer_game_ops import (
     GameOps,
     make_game_callbacks,
     advance_if_bot_turn,
 )
-from hearts.jwt_utils import get_current_user
-from hearts.stats_routes import (
-    _compute_newly_unlocked,
-    _is_in_all_time_top_10,
-    _recorded_games,
-)
+from hearts.jwt_utils import get_current_principal, principal_from_token
+from hearts.stats_routes import _recorded_games
 
 _RECONNECT_TIMEOUT_SECONDS = 120
 _IDLE_TIMEOUT_SECONDS = 600
@@ -39,35 +37,31 @@ _STALE_GAME_SECONDS = 30 * 60  # 30 minutes with no DB update → game is abando
 
 
 def _get_user_from_query_token():
-    """Try to authenticate via auth_token query param (JWT passed by the client)."""
+    """Try to authenticate via auth_token query param (JWT passed by the client).
+
+    Returns a jwt_utils.Principal or None.
+    """
     import os
-    import jwt as pyjwt
 
     auth_token = (request.args.get("auth_token") or "").strip()
     if not auth_token:
         logger.debug("_get_user_from_query_token: no auth_token in query params")
         return None
-    secret = os.environ.get("JWT_SECRET")
-    if not secret:
+    if not os.environ.get("JWT_SECRET"):
         logger.warning("_get_user_from_query_token: JWT_SECRET env var not set")
         return None
     try:
-        payload = pyjwt.decode(auth_token, secret, algorithms=["HS256"])
-        user_id = payload.get("sub")
-        if not user_id:
-            logger.warning("_get_user_from_query_token: JWT has no 'sub' claim")
-            return None
-        from hearts.models import User
-
-        user = User.query.get(int(user_id))
-        if user:
-            logger.info("_get_user_from_query_token: authenticated user_id=%s", user_id)
-        else:
-            logger.warning("_get_user_from_query_token: no User for id=%s", user_id)
-        return user
+        principal = principal_from_token(auth_token)
     except Exception:
         logger.exception("_get_user_from_query_token: failed to decode JWT")
         return None
+    if principal:
+        logger.info(
+            "_get_user_from_query_token: authenticated user_id=%s", principal.id
+        )
+    else:
+        logger.warning("_get_user_from_query_token: invalid token or unknown user")
+    return principal
 
 
 # game_id -> MultiplayerRunner
@@ -94,6 +88,12 @@ _idle_timers: Dict[str, Dict[int, Any]] = {}
 # game_id -> {seat_index -> eventlet.GreenThread} for idle warning timers
 _idle_warning_timers: Dict[str, Dict[int, Any]] = {}
 
+metrics.gauge(
+    "hearts_multiplayer_runners",
+    "Multiplayer games held in memory",
+    lambda: len(_runners),
+)
+
 
 def _get_runner(game_id: str) -> Optional[MultiplayerRunner]:
     runner = _runners.get(game_id)
@@ -162,20 +162,21 @@ def _save_to_db(
 ) -> None:
     from datetime import datetime
 
-    row = ActiveGame.query.filter_by(game_id=game_id).first()
-    if row is None:
-        row = ActiveGame(
-            game_id=game_id,
-            difficulty=runner.difficulty,
-            state_json=runner.to_json(),
-            is_multiplayer=True,
-            lobby_code=lobby_code,
-        )
-        db.session.add(row)
-    else:
-        row.state_json = runner.to_json()
-        row.updated_at = datetime.utcnow()
-    db.session.commit()
+    with metrics.SAVE_GAME_SECONDS.labels("multiplayer").time():
+        row = ActiveGame.query.filter_by(game_id=game_id).first()
+        if row is None:
+            row = ActiveGame(
+                game_id=game_id,
+                difficulty=runner.difficulty,
+                state_json=runner.to_json(),
+                is_multiplayer=True,
+                lobby_code=lobby_code,
+            )
+            db.session.add(row)
+        else:
+            row.state_json = runner.to_json()
+            row.updated_at = datetime.utcnow()
+        db.session.commit()
 
 
 def _delete_game(game_id: str) -> None:
@@ -373,6 +374,7 @@ def _on_game_complete(game_id: str, runner: MultiplayerRunner, socketio) -> None
     )
 
     committed_user_ids: list = []
+    board_updates: list = []
     try:
         scores = runner.state.scores
         min_score = min(scores)
@@ -385,131 +387,42 @@ def _on_game_complete(game_id: str, runner: MultiplayerRunner, socketio) -> None
 
         unlocked_per_seat: Dict[int, list] = {}
 
-        for seat_idx, user_id in auth_map.items():
-            seat = runner.seats[seat_idx]
-            if seat.conceded:
-                continue
-            player_score = int(scores[seat_idx])
-            won = seat_idx in winners and len(winners) == 1
-            seat_moon_shots = moon_shots_map.get(seat_idx, 0)
-            seat_hearts_broken = hearts_broken_map.get(seat_idx, 0)
-
-            opponent_scores = [int(scores[i]) for i in range(4) if i != seat_idx]
-
-            # Per-category stats (multiplayer)
-            ds = DifficultyStats.query.filter_by(
-                user_id=user_id, category="multiplayer"
-            ).first()
-            if not ds:
-                ds = DifficultyStats(user_id=user_id, category="multiplayer")
-                db.session.add(ds)
-            ds.games_played += 1
-            if won:
-                ds.games_won += 1
-                ds.current_win_streak += 1
-                if ds.current_win_streak > ds.max_win_streak:
-                    ds.max_win_streak = ds.current_win_streak
-            else:
-                ds.current_win_streak = 0
-            ds.total_points += player_score
-            ds.moon_shots += seat_moon_shots
-            if ds.best_score is None or player_score < ds.best_score:
-                ds.best_score = player_score
-            if ds.worst_score is None or player_score > ds.worst_score:
-                ds.worst_score = player_score
-
-            # Global user stats
-            us = UserStats.query.filter_by(user_id=user_id).first()
-            if not us:
-                us = UserStats(user_id=user_id)
-                db.session.add(us)
-
-            old_snapshot = {
-                "games_played": us.games_played,
-                "games_won": us.games_won,
-                "moon_shots": us.moon_shots,
-                "best_score": us.best_score,
-                "hard_wins": us.hard_wins,
-                "harder_wins": us.harder_wins,
-                "hardest_wins": us.hardest_wins,
-                "max_win_streak": us.max_win_streak,
-                "night_owl": us.night_owl,
-                "lucky_seven": us.lucky_seven,
-                "double_moon": us.double_moon,
-                "early_bird": us.early_bird,
-                "lonely_heart": us.lonely_heart,
-                "photo_finish": us.photo_finish,
-                "demolition": us.demolition,
-                "speed_demon": us.speed_demon,
-                "marathon": us.marathon,
-                "eclipse": us.eclipse,
-                "heartbreaker": us.heartbreaker,
-                "monthly_star": us.monthly_star,
-                "hall_of_fame": us.hall_of_fame,
-                "new_year": us.new_year,
-                "lucky_clover": us.lucky_clover,
-                "easter_egg": us.easter_egg,
-                "fireworks": us.fireworks,
-                "spooky": us.spooky,
-                "thankful": us.thankful,
-                "christmas_spirit": us.christmas_spirit,
-            }
-
-            us.games_played += 1
-            if won:
-                us.games_won += 1
-                us.current_win_streak += 1
-                if us.current_win_streak > us.max_win_streak:
-                    us.max_win_streak = us.current_win_streak
-            else:
-                us.current_win_streak = 0
-            us.total_points += player_score
-            us.moon_shots += seat_moon_shots
-            if us.best_score is None or player_score < us.best_score:
-                us.best_score = player_score
-            if us.worst_score is None or player_score > us.worst_score:
-                us.worst_score = player_score
-
-            # Boolean achievements
-            if won and player_score == 7 and not us.lucky_seven:
-                us.lucky_seven = True
-            if seat_moon_shots >= 2 and not us.double_moon:
-                us.double_moon = True
-            if seat_moon_shots >= 3 and not us.eclipse:
-                us.eclipse = True
-            if seat_hearts_broken >= 5 and not us.heartbreaker:
-                us.heartbreaker = True
-            if won and opponent_scores and not us.photo_finish:
-                if min(opponent_scores) - player_score == 1:
-                    us.photo_finish = True
-            if won and opponent_scores and not us.demolition:
-                if all(s >= 100 for s in opponent_scores):
-                    us.demolition = True
-            if won and round_count > 0 and round_count <= 4 and not us.speed_demon:
-                us.speed_demon = True
-            if round_count >= 10 and not us.marathon:
-                us.marathon = True
-
-            if won and not us.hall_of_fame:
-                if _is_in_all_time_top_10(user_id, "multiplayer", "multiplayer"):
-                    us.hall_of_fame = True
-
-            newly_unlocked = _compute_newly_unlocked(
-                old_snapshot, us, won, player_score
-            )
-            if newly_unlocked:
-                unlocked_per_seat[seat_idx] = newly_unlocked
-
-            # Game result log (for leaderboard)
-            db.session.add(
-                GameResult(
+        seat_users = [
+            (seat_idx, user_id)
+            for seat_idx, user_id in auth_map.items()
+            if not runner.seats[seat_idx].conceded
+        ]
+        # A player whose client already reported the game over HTTP is
+        # skipped so the unique (user_id, game_id) constraint holds.
+        already = stats_pipeline.recorded_user_ids(
+            game_id, [user_id for _, user_id in seat_users]
+        )
+        seat_users = [(s, uid) for s, uid in seat_users if uid not in already]
+        recorded = stats_pipeline.record_games(
+            [
+                stats_pipeline.GameOutcome(
                     user_id=user_id,
+                    game_id=game_id,
                     difficulty="multiplayer",
-                    won=won,
+                    won=seat_idx in winners and len(winners) == 1,
+                    final_score=int(scores[seat_idx]),
+                    moon_shots=moon_shots_map.get(seat_idx, 0),
+                    round_count=round_count,
+                    opponent_scores=tuple(
+                        int(scores[i]) for i in range(4) if i != seat_idx
+                    ),
+                    hearts_broken=hearts_broken_map.get(seat_idx, 0),
                 )
-            )
-
+                for seat_idx, user_id in seat_users
+            ]
+        )
+        cache_updates: list = []
+        for (seat_idx, user_id), result in zip(seat_users, recorded):
+            if result.newly_unlocked:
+                unlocked_per_seat[seat_idx] = result.newly_unlocked
             committed_user_ids.append(user_id)
+            board_updates.append((user_id, result.outcome.won, result.all_time_wins))
+            cache_updates.append((user_id, *result.payloads()))
 
         db.session.commit()
 
@@ -517,7 +430,11 @@ def _on_game_complete(game_id: str, runner: MultiplayerRunner, socketio) -> None
         # fallback in stats_routes.record_game can still work if the
         # commit failed.
         for uid in committed_user_ids:
-            _recorded_games.add(f"{uid}:{game_id}")
+            _recorded_games.set((uid, game_id), True)
+        for user_id, won, games_won in board_updates:
+            leaderboard.record_result(user_id, "multiplayer", won, games_won)
+        for user_id, stats, categories in cache_updates:
+            stats_cache.store_game(user_id, stats, categories)
 
         logger.info(
             "_on_game_complete: committed stats for game=%s users=%s",
@@ -654,7 +571,9 @@ def create_multiplayer_game(
             )
         )
 
-    runner = MultiplayerRunner.new_game(seats, difficulty=difficulty)
+    runner = MultiplayerRunner.new_game(
+        seats, difficulty=difficulty, profile_id=profiling.sample_game(game_id)
+    )
     _runners[game_id] = runner
     _save_to_db(game_id, runner, lobby_code=lobby_code)
 
@@ -737,7 +656,7 @@ def register_multiplayer_socket(socketio):
                     }
                     _token_to_sid[player_token] = request.sid
 
-                    user = get_current_user()
+                    user = get_current_principal()
                     if user is None:
                         user = _get_user_from_query_token()
                     if user:
@@ -0,0 +1,111 @@
+"""
+Monthly rollups and retention for game_results.
+
+game_results gets one row per completed game. reset_month folds each month
+into monthly_results (one row per user, difficulty and month) and deletes raw
+rows older than GAME_RESULT_RETENTION_MONTHS. Monthly rankings and the
+monthly_star award read the rollups, so their cost does not grow with
+history.
+"""
+
+from datetime import date, datetime
+from typing import Dict, Iterable, List
+
+from sqlalchemy import case, func
+
+from hearts.extensions import db
+from hearts.models import GameResult, MonthlyResult, User
+
+TOP_N = 10
+
+
+def add_months(month_start: datetime, months: int) -> datetime:
+    """Shift a first-of-month datetime by *months* (may be negative)."""
+    index = month_start.year * 12 + month_start.month - 1 + months
+    return month_start.replace(year=index // 12, month=index % 12 + 1)
+
+
+def rollup_month(month_start: datetime) -> int:
+    """(Re)build the monthly_results rows for the month starting *month_start*.
+
+    Idempotent: existing rollups for that month are replaced, so it is safe
+    to run again while the month's raw rows are still present. Returns the
+    number of rollup rows written. Does not commit.
+    """
+    month_end = add_months(month_start, 1)
+    rows = (
+        db.session.query(
+            GameResult.user_id,
+            GameResult.difficulty,
+            func.count(),
+            func.sum(case((GameResult.won.is_(True), 1), else_=0)),
+        )
+        .filter(
+            GameResult.completed_at >= month_start,
+            GameResult.completed_at < month_end,
+        )
+        .group_by(GameResult.user_id, GameResult.difficulty)
+        .all()
+    )
+
+    month = month_start.date()
+    MonthlyResult.query.filter_by(month=month).delete()
+    db.session.add_all(
+        MonthlyResult(
+            user_id=user_id,
+            difficulty=difficulty,
+            month=month,
+            games_played=played,
+            games_won=won or 0,
+        )
+        for user_id, difficulty, played, won in rows
+    )
+    return len(rows)
+
+
+def prune_game_results(current_month: datetime, retention_months: int) -> int:
+    """Roll up and delete raw rows older than *retention_months* full months.
+
+    Every month being dropped is rolled up first, so no history is lost even
+    if reset_month was skipped for it. Returns the number of rows deleted.
+    Does not commit.
+    """
+    cutoff = add_months(current_month, -retention_months)
+    oldest = (
+        db.session.query(func.min(GameResult.completed_at))
+        .filter(GameResult.completed_at < cutoff)
+        .scalar()
+    )
+    if oldest is None:
+        return 0
+
+    month = oldest.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    while month < cutoff:
+        rollup_month(month)
+        month = add_months(month, 1)
+
+    return GameResult.query.filter(GameResult.completed_at < cutoff).delete(
+        synchronize_session=False
+    )
+
+
+def monthly_top_user_ids(
+    month: date, difficulties: Iterable[str]
+) -> Dict[str, List[int]]:
+    """Return the top ``TOP_N`` user ids by wins per difficulty for *month*."""
+    top: Dict[str, List[int]] = {}
+    for difficulty in difficulties:
+        rows = (
+            db.session.query(MonthlyResult.user_id)
+            .join(User, MonthlyResult.user_id == User.id)
+            .filter(
+                MonthlyResult.difficulty == difficulty,
+                MonthlyResult.month == month,
+                MonthlyResult.games_won > 0,
+            )
+            .order_by(MonthlyResult.games_won.desc(), MonthlyResult.user_id)
+            .limit(TOP_N)
+            .all()
+        )
+        top[difficulty] = [uid for (uid,) in rows]
+    return top
@@ -0,0 +1,94 @@
+"""
+Read-through cache of the payloads served by GET /stats and GET
+/stats/by-category.
+
+Entries are filled on read and replaced by whoever records a game, after its
+commit. Anything else that changes a user's stats rows drops the entry
+(forget) or the whole cache (clear). The TTL bounds how stale an entry can
+get if a writer is ever missed.
+
+Payloads are plain dicts shared between requests; treat them as read-only.
+"""
+
+from typing import Dict, Optional
+
+from hearts.cache import TTLCache
+from hearts.models import DifficultyStats, UserStats
+
+STATS_TTL_SECONDS = 5 * 60
+
+CATEGORIES = (
+    "easy",
+    "medium",
+    "my_mom",
+    "hard",
+    "harder",
+    "hardest",
+    "multiplayer",
+)
+
+_stats: "TTLCache[dict]" = TTLCache(maxsize=4096, ttl=STATS_TTL_SECONDS)
+_by_category: "TTLCache[dict]" = TTLCache(maxsize=4096, ttl=STATS_TTL_SECONDS)
+_empty_stats: Optional[dict] = None
+
+
+def reset_stats_cache() -> None:
+    """Clear both caches. For tests only."""
+    clear()
+
+
+def clear() -> None:
+    _stats.clear()
+    _by_category.clear()
+
+
+def forget(user_id: int) -> None:
+    """Drop everything cached for *user_id*."""
+    _stats.pop(user_id)
+    _by_category.pop(user_id)
+
+
+def empty_stats() -> dict:
+    """The /stats payload for a user with no UserStats row yet."""
+    global _empty_stats
+    if _empty_stats is None:
+        defaults = {
+            column.name: column.default.arg
+            for column in UserStats.__table__.columns
+            if column.default is not None and column.default.is_scalar
+        }
+        _empty_stats = UserStats(**defaults).to_dict()
+    return _empty_stats
+
+
+def get_stats(user_id: int) -> Optional[dict]:
+    return _stats.get(user_id)
+
+
+def put_stats(user_id: int, stats: dict) -> None:
+    _stats.set(user_id, stats)
+
+
+def get_by_category(user_id: int) -> Optional[dict]:
+    return _by_category.get(user_id)
+
+
+def put_by_category(user_id: int, rows: "list[DifficultyStats]") -> dict:
+    """Cache and return the /stats/by-category payload built from *rows*."""
+    by_cat = {row.category: row.to_dict() for row in rows}
+    payload = {cat: by_cat.get(cat) for cat in CATEGORIES}
+    _by_category.set(user_id, payload)
+    return payload
+
+
+def store_game(user_id: int, stats: dict, categories: Dict[str, dict]) -> None:
+    """Replace cached stats after a recorded game.
+
+    *categories* holds the serialized DifficultyStats rows the game touched.
+    A cached by-category payload is patched with them; an absent one stays
+    absent and is built on the next read.
+    """
+    _stats.set(user_id, stats)
+    cached = _by_category.get(user_id)
+    if cached is not None:
+        _by_category.set(user_id, {**cached, **categories})
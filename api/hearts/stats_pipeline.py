@@ -0,0 +1,450 @@
+"""
+Per-game stats recording, shared by POST /stats/record and multiplayer game
+completion.
+
+A finished game touches each player's UserStats row and one or two
+DifficultyStats rows (the board category, plus the raw tier for
+hard/harder/hardest). record_games():
+
+1. loads every row it needs in one outer-joined query, locking the players'
+   users rows so concurrent recordings for the same player serialize;
+2. applies the game and evaluates achievements in memory from the rule
+   tables below;
+3. leaves the writes to the caller's commit, which the unit of work sends as
+   one batch.
+
+The only other query is the Hall of Fame threshold (one per board, and only
+when a winner does not have the badge yet).
+"""
+
+from dataclasses import dataclass
+from datetime import date, datetime
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+from hearts.extensions import db
+from hearts.models import (
+    DIFFICULTY_TO_CATEGORY,
+    DifficultyStats,
+    GameResult,
+    User,
+    UserStats,
+)
+
+HARD_TIERS = ("hard", "harder", "hardest")
+
+
+def _easter_date(year: int) -> date:
+    """Compute Easter Sunday for *year* using the Anonymous Gregorian algorithm."""
+    a = year % 19
+    b, c = divmod(year, 100)
+    d, e = divmod(b, 4)
+    f = (b + 8) // 25
+    g_ = (b - f + 1) // 3
+    h = (19 * a + b - d - g_ + 15) % 30
+    i, k = divmod(c, 4)
+    l = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 22 * l) // 451
+    month, day = divmod(h + l - 7 * m + 114, 31)
+    return date(year, month, day + 1)
+
+
+def _thanksgiving_date(year: int) -> date:
+    """Return Thanksgiving (4th Thursday of November) for *year*."""
+    # Nov 1 weekday: 0=Mon … 6=Sun
+    first = date(year, 11, 1)
+    thu_offset = (3 - first.weekday()) % 7
+    return date(year, 11, 1 + thu_offset + 21)
+
+
+@dataclass(frozen=True)
+class GameOutcome:
+    """One player's result in a finished game.
+
+    ``started_at`` is the game's start in the player's local time; date-based
+    achievements are skipped when it is None. ``game_id`` is stored on the
+    GameResult, where a unique constraint rejects a second report of it.
+    """
+
+    user_id: int
+    game_id: Optional[str]
+    difficulty: str
+    won: bool
+    final_score: int
+    moon_shots: int = 0
+    round_count: int = 0
+    opponent_scores: Tuple[int, ...] = ()
+    hearts_broken: int = 0
+    started_at: Optional[datetime] = None
+
+    @property
+    def categories(self) -> Tuple[str, ...]:
+        """DifficultyStats categories this game is written to."""
+        category = DIFFICULTY_TO_CATEGORY.get(self.difficulty, "easy")
+        if self.difficulty in HARD_TIERS:
+            return (category, self.difficulty)
+        return (category,)
+
+
+@dataclass
+class RecordedGame:
+    outcome: GameOutcome
+    stats: UserStats
+    difficulty_stats: List[DifficultyStats]
+    newly_unlocked: List[str]
+    # Value the player is ranked by on the all-time board for this game.
+    all_time_wins: int
+
+    def payloads(self) -> Tuple[dict, Dict[str, dict]]:
+        """Serialized UserStats and touched DifficultyStats, keyed by category.
+
+        Call before committing; afterwards the rows are expired and would be
+        reloaded.
+        """
+        return self.stats.to_dict(), {
+            ds.category: ds.to_dict() for ds in self.difficulty_stats
+        }
+
+
+# -----------------------------------------------------------------------------
+# Achievement rules
+# -----------------------------------------------------------------------------
+
+# Counter thresholds: unlocked when the field crosses the threshold.
+COUNTER_TIERS: Tuple[Tuple[str, Tuple[Tuple[int, str], ...]], ...] = (
+    (
+        "games_played",
+        ((10, "newcomer_bronze"), (50, "newcomer_silver"), (200, "newcomer_gold")),
+    ),
+    ("games_won", ((10, "winner_bronze"), (25, "winner_silver"), (100, "winner_gold"))),
+    (
+        "moon_shots",
+        ((5, "moongazer_bronze"), (10, "moongazer_silver"), (25, "moongazer_gold")),
+    ),
+    ("hard_wins", ((1, "challenger_bronze"),)),
+    ("harder_wins", ((1, "challenger_silver"),)),
+    ("hardest_wins", ((1, "challenger_gold"),)),
+    ("max_win_streak", ((5, "hot_streak"),)),
+)
+
+# Counter thresholds reported after the flag achievements.
+LATE_COUNTER_TIERS: Tuple[Tuple[str, Tuple[Tuple[int, str], ...]], ...] = (
+    ("hardest_wins", ((1, "hi_mom"),)),
+)
+
+# Best (lowest) score at or below the threshold.
+BEST_SCORE_TIERS: Tuple[Tuple[int, str], ...] = (
+    (10, "tidy_bronze"),
+    (5, "tidy_silver"),
+    (0, "tidy_gold"),
+)
+
+# (minimum games played, minimum win rate %, achievement)
+WIN_RATE_TIERS: Tuple[Tuple[int, int, str], ...] = (
+    (20, 50, "consistent_bronze"),
+    (30, 60, "consistent_silver"),
+    (50, 75, "consistent_gold"),
+)
+
+# Boolean columns that are achievements of the same name.  Order is the order
+# they are reported in ``newly_unlocked``.
+FLAG_ACHIEVEMENTS: Tuple[str, ...] = (
+    "night_owl",
+    "lucky_seven",
+    "double_moon",
+    "early_bird",
+    "lonely_heart",
+    "new_year",
+    "lucky_clover",
+    "easter_egg",
+    "fireworks",
+    "spooky",
+    "thankful",
+    "christmas_spirit",
+    "photo_finish",
+    "demolition",
+    "speed_demon",
+    "marathon",
+    "eclipse",
+    "heartbreaker",
+    "monthly_star",
+    "hall_of_fame",
+    "biggest_loser",
+)
+
+# Flags earned by how the game went.
+GAME_FLAGS: Tuple[Tuple[str, Callable[[GameOutcome], bool]], ...] = (
+    ("biggest_loser", lambda o: o.final_score == 125),
+    ("lucky_seven", lambda o: o.won and o.final_score == 7),
+    ("double_moon", lambda o: o.moon_shots >= 2),
+    (
+        "photo_finish",
+        lambda o: o.won
+        and bool(o.opponent_scores)
+        and min(o.opponent_scores) - o.final_score == 1,
+    ),
+    (
+        "demolition",
+        lambda o: o.won
+        and bool(o.opponent_scores)
+        and all(s >= 100 for s in o.opponent_scores),
+    ),
+    ("speed_demon", lambda o: o.won and 0 < o.round_count <= 4),
+    ("marathon", lambda o: o.round_count >= 10),
+    ("eclipse", lambda o: o.moon_shots >= 3),
+    ("heartbreaker", lambda o: o.hearts_broken >= 5),
+)
+
+# Flags earned by when the game started (player's local time).
+DATE_FLAGS: Tuple[Tuple[str, Callable[[datetime], bool]], ...] = (
+    ("night_owl", lambda t: t.hour < 5),
+    ("early_bird", lambda t: 5 <= t.hour < 8),
+    ("lonely_heart", lambda t: (t.month, t.day) == (2, 14)),
+    ("new_year", lambda t: (t.month, t.day) == (1, 1)),
+    ("lucky_clover", lambda t: (t.month, t.day) == (3, 17)),
+    ("easter_egg", lambda t: t.date() == _easter_date(t.year)),
+    ("fireworks", lambda t: (t.month, t.day) == (7, 4)),
+    ("spooky", lambda t: (t.month, t.day) == (10, 31)),
+    ("thankful", lambda t: t.date() == _thanksgiving_date(t.year)),
+    ("christmas_spirit", lambda t: (t.month, t.day) == (12, 25)),
+)
+
+SNAPSHOT_FIELDS: Tuple[str, ...] = tuple(
+    dict.fromkeys(
+        [field for field, _ in COUNTER_TIERS + LATE_COUNTER_TIERS]
+        + ["games_played", "games_won", "best_score"]
+        + list(FLAG_ACHIEVEMENTS)
+    )
+)
+
+
+def snapshot(stats: UserStats) -> Dict[str, object]:
+    """The UserStats values achievement checks compare against."""
+    return {field: getattr(stats, field) for field in SNAPSHOT_FIELDS}
+
+
+def _win_rate(played: int, won: int) -> float:
+    return (won / played * 100) if played > 0 else 0
+
+
+def _crossed_counters(before, stats, table) -> List[str]:
+    crossed = []
+    for field, tiers in table:
+        old_val = before.get(field) or 0
+        new_val = getattr(stats, field)
+        for threshold, achievement_id in tiers:
+            if old_val < threshold <= new_val:
+                crossed.append(achievement_id)
+    return crossed
+
+
+def newly_unlocked(before: Dict[str, object], stats: UserStats) -> List[str]:
+    """Achievement IDs that *stats* qualifies for and the *before* snapshot did not."""
+    unlocked = _crossed_counters(before, stats, COUNTER_TIERS)
+
+    old_best = before.get("best_score")
+    new_best = stats.best_score
+    for threshold, achievement_id in BEST_SCORE_TIERS:
+        old_qualifies = old_best is not None and old_best <= threshold
+        new_qualifies = new_best is not None and new_best <= threshold
+        if new_qualifies and not old_qualifies:
+            unlocked.append(achievement_id)
+
+    old_gp = before.get("games_played") or 0
+    old_gw = before.get("games_won") or 0
+    for min_games, min_rate, achievement_id in WIN_RATE_TIERS:
+        old_qualifies = old_gp >= min_games and _win_rate(old_gp, old_gw) >= min_rate
+        new_qualifies = (
+            stats.games_played >= min_games
+            and _win_rate(stats.games_played, stats.games_won) >= min_rate
+        )
+        if new_qualifies and not old_qualifies:
+            unlocked.append(achievement_id)
+
+    for field in FLAG_ACHIEVEMENTS:
+        if not before.get(field) and getattr(stats, field):
+            unlocked.append(field)
+
+    unlocked.extend(_crossed_counters(before, stats, LATE_COUNTER_TIERS))
+    return unlocked
+
+
+def apply_date_flags(stats: UserStats, started_at: datetime) -> List[str]:
+    """Set the date-based flags for a game started at *started_at*; return new ones."""
+    newly: List[str] = []
+    for field, applies in DATE_FLAGS:
+        if not getattr(stats, field) and applies(started_at):
+            setattr(stats, field, True)
+            newly.append(field)
+    return newly
+
+
+# -----------------------------------------------------------------------------
+# Loading and applying
+# -----------------------------------------------------------------------------
+
+
+def load_for_update(
+    user_ids: Iterable[int], categories: Iterable[str]
+) -> Tuple[Dict[int, UserStats], Dict[Tuple[int, str], DifficultyStats]]:
+    """Load (or create) UserStats and the given DifficultyStats rows for *user_ids*.
+
+    One outer-joined query fetches everything and locks the users rows (the
+    stats rows sit on the nullable side of the join, which PostgreSQL will
+    not lock).  Missing rows are created and flushed together so their
+    column defaults are populated.
+    """
+    user_ids = set(user_ids)
+    categories = tuple(sorted(set(categories)))
+    us_by_user: Dict[int, UserStats] = {}
+    ds_by_key: Dict[Tuple[int, str], DifficultyStats] = {}
+    if not user_ids:
+        return us_by_user, ds_by_key
+
+    rows = (
+        db.session.query(User.id, UserStats, DifficultyStats)
+        .outerjoin(UserStats, UserStats.user_id == User.id)
+        .outerjoin(
+            DifficultyStats,
+            db.and_(
+                DifficultyStats.user_id == User.id,
+                DifficultyStats.category.in_(categories),
+            ),
+        )
+        .filter(User.id.in_(user_ids))
+        .with_for_update(of=User)
+        .all()
+    )
+    for user_id, us, ds in rows:
+        if us is not None:
+            us_by_user[user_id] = us
+        if ds is not None:
+            ds_by_key[(user_id, ds.category)] = ds
+
+    created = False
+    for user_id in user_ids:
+        if user_id not in us_by_user:
+            us_by_user[user_id] = UserStats(user_id=user_id)
+            db.session.add(us_by_user[user_id])
+            created = True
+        for category in categories:
+            if (user_id, category) not in ds_by_key:
+                ds = DifficultyStats(user_id=user_id, category=category)
+                ds_by_key[(user_id, category)] = ds
+                db.session.add(ds)
+                created = True
+    if created:
+        db.session.flush()
+    return us_by_user, ds_by_key
+
+
+def _apply_totals(row, outcome: GameOutcome) -> None:
+    """Update the counters UserStats and DifficultyStats have in common."""
+    row.games_played += 1
+    row.moon_shots += outcome.moon_shots
+    row.total_points += outcome.final_score
+    if row.best_score is None or outcome.final_score < row.best_score:
+        row.best_score = outcome.final_score
+    if row.worst_score is None or outcome.final_score > row.worst_score:
+        row.worst_score = outcome.final_score
+    if outcome.won:
+        row.games_won += 1
+        row.current_win_streak += 1
+        if row.current_win_streak > row.max_win_streak:
+            row.max_win_streak = row.current_win_streak
+    else:
+        row.current_win_streak = 0
+
+
+def _apply_to_user(stats: UserStats, outcome: GameOutcome) -> None:
+    _apply_totals(stats, outcome)
+    if outcome.won and outcome.difficulty in HARD_TIERS:
+        field = outcome.difficulty + "_wins"
+        setattr(stats, field, getattr(stats, field) + 1)
+    for field, applies in GAME_FLAGS:
+        if not getattr(stats, field) and applies(outcome):
+            setattr(stats, field, True)
+    if outcome.started_at is not None:
+        apply_date_flags(stats, outcome.started_at)
+
+
+def all_time_top_10_threshold(difficulty: str, category: str) -> Optional[int]:
+    """Return the 10th-highest all-time win count for a board, or None.
+
+    A user is in the top 10 iff fewer than 10 users have strictly more wins,
+    which is the same as ``wins >= threshold`` (or no threshold at all when
+    the board has fewer than 10 rows).  One ranked query answers the check
+    for any number of users.
+    """
+    if difficulty in HARD_TIERS:
+        col = getattr(UserStats, difficulty + "_wins")
+        query = db.session.query(col)
+    else:
+        col = DifficultyStats.games_won
+        query = db.session.query(col).filter(DifficultyStats.category == category)
+    row = query.order_by(col.desc()).offset(9).limit(1).first()
+    return row[0] if row else None
+
+
+def recorded_user_ids(game_id: str, user_ids: Iterable[int]) -> Set[int]:
+    """Which of *user_ids* already have a GameResult for *game_id*."""
+    user_ids = set(user_ids)
+    if not user_ids:
+        return set()
+    rows = db.session.query(GameResult.user_id).filter(
+        GameResult.game_id == game_id, GameResult.user_id.in_(user_ids)
+    )
+    return {user_id for (user_id,) in rows}
+
+
+def _board_key(outcome: GameOutcome) -> Tuple[str, str]:
+    return outcome.difficulty, outcome.categories[0]
+
+
+def record_games(outcomes: Sequence[GameOutcome]) -> List[RecordedGame]:
+    """Apply *outcomes* to the players' stats and log a GameResult for each.
+
+    Nothing is committed; the caller commits once all of its writes are
+    staged, and should treat an IntegrityError on uq_game_results_user_game
+    as "already recorded".  Results are returned in the order of *outcomes*.
+    """
+    us_by_user, ds_by_key = load_for_update(
+        (o.user_id for o in outcomes),
+        (category for o in outcomes for category in o.categories),
+    )
+
+    pending = []
+    for outcome in outcomes:
+        stats = us_by_user[outcome.user_id]
+        before = snapshot(stats)
+        _apply_to_user(stats, outcome)
+        ds_rows = [ds_by_key[(outcome.user_id, c)] for c in outcome.categories]
+        for ds in ds_rows:
+            _apply_totals(ds, outcome)
+        db.session.add(
+            GameResult(
+                user_id=outcome.user_id,
+                game_id=outcome.game_id,
+                difficulty=outcome.difficulty,
+                won=outcome.won,
+            )
+        )
+        if outcome.difficulty in HARD_TIERS:
+            wins = getattr(stats, outcome.difficulty + "_wins")
+        else:
+            wins = ds_by_key[(outcome.user_id, outcome.categories[0])].games_won
+        pending.append((outcome, stats, ds_rows, before, wins))
+
+    # The ranked query autoflushes, so it sees this batch's wins.
+    thresholds: Dict[Tuple[str, str], Optional[int]] = {}
+    for outcome, stats, _, _, wins in pending:
+        if outcome.won and not stats.hall_of_fame:
+            key = _board_key(outcome)
+            if key not in thresholds:
+                thresholds[key] = all_time_top_10_threshold(*key)
+            if thresholds[key] is None or wins >= thresholds[key]:
+                stats.hall_of_fame = True
+
+    return [
+        RecordedGame(outcome, stats, ds_rows, newly_unlocked(before, stats), wins)
+        for outcome, stats, ds_rows, before, wins in pending
+    ]
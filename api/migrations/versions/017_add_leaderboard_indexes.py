@@ -0,0 +1,55 @@
+"""Add composite indexes for leaderboard queries
+
+Revision ID: 017
+Revises: 016
+Create Date: 2026-10-19
+
+Monthly leaderboards and reset_month filter game_results on difficulty, won
+and completed_at and group by user_id. A partial index over winning rows,
+keyed (difficulty, completed_at) and carrying user_id, answers them with an
+index-only range scan. It also leads on difficulty, so the single-column
+difficulty index is dropped.
+
+The Hall of Fame check ranks difficulty_stats by games_won within a
+category; (category, games_won) lets it read the top 10 straight off the
+index.
+
+The partial-index predicate is spelled the way SQLAlchemy renders
+``GameResult.won.is_(True)`` on each backend, since SQLite only uses a
+partial index when the query repeats its WHERE term verbatim.
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "017"
+down_revision = "016"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index(
+        "ix_game_results_won_difficulty_completed_at",
+        "game_results",
+        ["difficulty", "completed_at", "user_id"],
+        postgresql_where=sa.text("won IS true"),
+        sqlite_where=sa.text("won IS 1"),
+    )
+    op.drop_index("ix_game_results_difficulty", table_name="game_results")
+    op.create_index(
+        "ix_difficulty_stats_category_games_won",
+        "difficulty_stats",
+        ["category", "games_won"],
+    )
+
+
+def downgrade():
+    op.drop_index(
+        "ix_difficulty_stats_category_games_won", table_name="difficulty_stats"
+    )
+    op.create_index("ix_game_results_difficulty", "game_results", ["difficulty"])
+    op.drop_index(
+        "ix_game_results_won_difficulty_completed_at", table_name="game_results"
+    )
@@ -0,0 +1,56 @@
+"""Add monthly_results rollup table
+
+Revision ID: 018
+Revises: 017
+Create Date: 2026-10-19
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "018"
+down_revision = "017"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "monthly_results",
+        sa.Column("id", sa.Integer, primary_key=True),
+        sa.Column("user_id", sa.Integer, sa.ForeignKey("users.id"), nullable=False),
+        sa.Column("difficulty", sa.String(16), nullable=False),
+        sa.Column("month", sa.Date, nullable=False),
+        sa.Column("games_played", sa.Integer, nullable=False, default=0),
+        sa.Column("games_won", sa.Integer, nullable=False, default=0),
+        sa.UniqueConstraint(
+            "user_id", "difficulty", "month", name="uq_monthly_results_user_month"
+        ),
+    )
+    op.create_index(
+        "ix_monthly_results_difficulty_month_won",
+        "monthly_results",
+        ["difficulty", "month", "games_won"],
+    )
+
+    # Backfill: roll up every month already in game_results.
+    conn = op.get_bind()
+    conn.execute(
+        sa.text(
+            "INSERT INTO monthly_results "
+            "(user_id, difficulty, month, games_played, games_won) "
+            "SELECT user_id, difficulty, "
+            "CAST(date_trunc('month', completed_at) AS date), "
+            "COUNT(*), SUM(CASE WHEN won THEN 1 ELSE 0 END) "
+            "FROM game_results "
+            "GROUP BY user_id, difficulty, date_trunc('month', completed_at)"
+        )
+    )
+
+
+def downgrade():
+    op.drop_index(
+        "ix_monthly_results_difficulty_month_won", table_name="monthly_results"
+    )
+    op.drop_table("monthly_results")
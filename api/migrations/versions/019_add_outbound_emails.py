@@ -0,0 +1,46 @@
+"""Add outbound_emails queue table
+
+Revision ID: 019
+Revises: 018
+Create Date: 2026-10-19
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+from datetime import datetime
+
+revision = "019"
+down_revision = "018"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "outbound_emails",
+        sa.Column("id", sa.Integer, primary_key=True),
+        sa.Column("to_email", sa.String(255), nullable=False),
+        sa.Column("subject", sa.String(255), nullable=False),
+        sa.Column("html_body", sa.Text, nullable=False),
+        sa.Column("status", sa.String(16), nullable=False, default="pending"),
+        sa.Column("attempts", sa.Integer, nullable=False, default=0),
+        sa.Column(
+            "next_attempt_at", sa.DateTime, nullable=False, default=datetime.utcnow
+        ),
+        sa.Column("last_error", sa.Text, nullable=True),
+        sa.Column("created_at", sa.DateTime, nullable=False, default=datetime.utcnow),
+        sa.Column("sent_at", sa.DateTime, nullable=True),
+    )
+    op.create_index(
+        "ix_outbound_emails_status_next_attempt",
+        "outbound_emails",
+        ["status", "next_attempt_at"],
+    )
+
+
+def downgrade():
+    op.drop_index(
+        "ix_outbound_emails_status_next_attempt", table_name="outbound_emails"
+    )
+    op.drop_table("outbound_emails")
@@ -0,0 +1,32 @@
+"""Add game_id to game_results for durable dedup
+
+Revision ID: 020
+Revises: 019
+Create Date: 2026-10-19
+
+POST /stats/record and multiplayer completion can both report the same
+game. A unique (user_id, game_id) pair makes the database reject the second
+report, across restarts and workers. Rows written before this revision keep
+a NULL game_id, which the constraint ignores.
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "020"
+down_revision = "019"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column("game_results", sa.Column("game_id", sa.String(64), nullable=True))
+    op.create_unique_constraint(
+        "uq_game_results_user_game", "game_results", ["user_id", "game_id"]
+    )
+
+
+def downgrade():
+    op.drop_constraint("uq_game_results_user_game", "game_results", type_="unique")
+    op.drop_column("game_results", "game_id")
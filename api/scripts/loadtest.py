@@ -0,0 +1,513 @@
+"""
+Load generator: many simulated players against a local API server.
+
+Each simulated game is either a single-player game (REST /games/start and
+/games/<id>/pass, then play/advance over the /game namespace) or a
+multiplayer game (REST /lobbies/create, guests join over /lobby, the host
+starts it, then every human seat passes and plays over /multi). Players pick
+a random card from the ``legal_plays`` they are sent. Difficulties are drawn
+from a weighted mix.
+
+At the end it prints games completed, actions per second, and per-operation
+round-trip percentiles and error counts. A round trip is the time from a
+client's emit (or HTTP request) to the response state, so it includes the
+AI turns the server runs before handing the turn back.
+
+Everything runs against a local server; nothing leaves the machine. Lobby
+creation is rate limited, so start the server with RATELIMIT_ENABLED=0.
+With SQLite the tables must exist first (migrations target Postgres)::
+
+    cd api
+    export DATABASE_URL=sqlite:////tmp/hearts-load.db RATELIMIT_ENABLED=0
+    python -c "from hearts import app, db; app.app_context().push(); db.create_all()"
+    gunicorn -c gunicorn_conf.py hearts:app &
+    python scripts/loadtest.py --games 200 --concurrency 20 \\
+        --mix easy=4,medium=2,hard=1 --multi-fraction 0.3
+
+For Postgres, point DATABASE_URL at it (e.g. ``docker compose up -d db``) and
+run ``flask db upgrade`` instead of create_all().
+
+Requires the Socket.IO client extras: ``pip install "python-socketio[client]"``.
+"""
+
+import argparse
+import json
+import queue
+import random
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+import socketio
+
+
+class LoadStats:
+    """Latencies and errors per operation, shared by all client threads."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+        self.messages: Counter = Counter()
+        self.games: Counter = Counter()
+
+    def record(self, op: str, seconds: float) -> None:
+        with self._lock:
+            self.latencies[op].append(seconds)
+
+    def error(self, op: str, message: str) -> None:
+        with self._lock:
+            self.errors[op] += 1
+            self.messages[f"{op}: {message}"] += 1
+
+    def game(self, outcome: str) -> None:
+        with self._lock:
+            self.games[outcome] += 1
+
+    def report(self, elapsed: float) -> str:
+        actions = sum(len(v) for v in self.latencies.values())
+        lines = [
+            f"elapsed {elapsed:.1f}s, {actions} actions ({actions / elapsed:.1f}/s)",
+            "games: " + ", ".join(f"{k}={v}" for k, v in sorted(self.games.items())),
+            "",
+            f"{'operation':<20}{'count':>8}{'errors':>8}{'err%':>7}"
+            f"{'p50 ms':>9}{'p90 ms':>9}{'p99 ms':>9}{'max ms':>9}",
+        ]
+        for op in sorted(set(self.latencies) | set(self.errors)):
+            samples = sorted(self.latencies.get(op, ()))
+            errors = self.errors.get(op, 0)
+            total = len(samples) + errors
+            cols = [_percentile(samples, p) for p in (50, 90, 99, 100)]
+            lines.append(
+                f"{op:<20}{len(samples):>8}{errors:>8}{100 * errors / total:>6.1f}%"
+                + "".join(f"{c * 1000:>9.1f}" for c in cols)
+            )
+        if self.messages:
+            lines += ["", "most common errors:"]
+            for message, count in self.messages.most_common(10):
+                lines.append(f"  {count:>5}  {message}")
+        return "\n".join(lines)
+
+
+def _percentile(samples: List[float], pct: float) -> float:
+    """Nearest-rank percentile of sorted *samples* (0 when empty)."""
+    if not samples:
+        return 0.0
+    rank = max(1, int(round(pct / 100 * len(samples))))
+    return samples[min(rank, len(samples)) - 1]
+
+
+def parse_mix(raw: str) -> List[Tuple[str, float]]:
+    """``"easy=3,hard=1"`` -> [("easy", 3.0), ("hard", 1.0)]."""
+    mix = []
+    for part in raw.split(","):
+        name, _, weight = part.strip().partition("=")
+        mix.append((name.strip(), float(weight or 1)))
+    return mix
+
+
+class LoadClient:
+    """Shared plumbing for one simulated player: HTTP, events, timing."""
+
+    # Socket.IO checks Origin against CORS_ORIGINS; main() sets it.
+    origin = "http://localhost:3000"
+
+    def __init__(self, base_url: str, stats: LoadStats, timeout: float) -> None:
+        self.base_url = base_url.rstrip("/")
+        self.stats = stats
+        self.timeout = timeout
+        self.events: "queue.Queue[Tuple[str, Any]]" = queue.Queue()
+        self.sio = socketio.Client(
+            reconnection=False, websocket_extra_options={"origin": self.origin}
+        )
+
+    def listen(self, namespace: str, *names: str) -> None:
+        for name in names:
+            self.sio.on(
+                name,
+                lambda data=None, name=name: self.events.put((name, data)),
+                namespace=namespace,
+            )
+
+    def request(
+        self, op: str, method: str, path: str, body: Optional[dict] = None
+    ) -> Optional[dict]:
+        data = json.dumps(body).encode() if body is not None else None
+        req = urllib.request.Request(
+            self.base_url + path,
+            data=data,
+            method=method,
+            headers={"Content-Type": "application/json"},
+        )
+        started = time.perf_counter()
+        try:
+            with urllib.request.urlopen(req, timeout=self.timeout) as resp:
+                payload = json.loads(resp.read() or b"null")
+        except urllib.error.HTTPError as e:
+            self.stats.error(op, f"HTTP {e.code}")
+            return None
+        except (OSError, ValueError) as e:
+            self.stats.error(op, type(e).__name__)
+            return None
+        self.stats.record(op, time.perf_counter() - started)
+        return payload
+
+    def connect(self, op: str, namespace: str, query: str) -> bool:
+        started = time.perf_counter()
+        try:
+            self.sio.connect(
+                f"{self.base_url}?{query}",
+                namespaces=[namespace],
+                transports=["websocket"],
+                wait_timeout=self.timeout,
+            )
+        except socketio.exceptions.ConnectionError as e:
+            self.stats.error(op, str(e) or "connect failed")
+            return False
+        self.stats.record(op, time.perf_counter() - started)
+        return True
+
+    def next_event(self) -> Optional[Tuple[str, Any]]:
+        try:
+            return self.events.get(timeout=self.timeout)
+        except queue.Empty:
+            return None
+
+    def close(self) -> None:
+        try:
+            self.sio.disconnect()
+        except Exception:
+            pass
+
+
+def play_single(
+    base_url: str,
+    difficulty: str,
+    stats: LoadStats,
+    rng: random.Random,
+    timeout: float,
+    max_plays: int,
+) -> None:
+    client = LoadClient(base_url, stats, timeout)
+    started = client.request(
+        "rest.start", "POST", "/games/start", {"difficulty": difficulty}
+    )
+    if not started:
+        stats.game("single_failed")
+        return
+    game_id = started["game_id"]
+    client.listen("/game", "state", "error")
+    if not client.connect("game.connect", "/game", f"game_id={game_id}"):
+        stats.game("single_failed")
+        return
+
+    state = None
+    plays = 0
+    try:
+        event = client.next_event()
+        state = event[1] if event and event[0] == "state" else None
+        while state is not None and not state["game_over"]:
+            if max_plays and plays >= max_plays:
+                break
+            if state["phase"] == "passing":
+                state = client.request(
+                    "rest.pass",
+                    "POST",
+                    f"/games/{game_id}/pass",
+                    {"cards": rng.sample(state["human_hand"], 3)},
+                )
+                continue
+            sent = time.perf_counter()
+            if state["legal_plays"]:
+                op = "game.play"
+                card = rng.choice(state["legal_plays"])
+                client.sio.emit("play", {"card": card}, namespace="/game")
+                plays += 1
+            else:
+                op = "game.advance"
+                client.sio.emit("advance", namespace="/game")
+            event = client.next_event()
+            if event is None:
+                stats.error(op, "timeout")
+                break
+            if event[0] == "error":
+                stats.error(op, event[1].get("message", "error"))
+                state = client.request("rest.get", "GET", f"/games/{game_id}")
+                continue
+            stats.record(op, time.perf_counter() - sent)
+            state = event[1]
+    finally:
+        client.close()
+
+    if state is not None and state["game_over"]:
+        stats.game("single_completed")
+    else:
+        client.request("rest.concede", "POST", f"/games/{game_id}/concede", {})
+        stats.game("single_stopped")
+
+
+def _lobby_seat(
+    base_url: str,
+    stats: LoadStats,
+    timeout: float,
+    code: str,
+    name: str,
+    token: Optional[str] = None,
+) -> Tuple[LoadClient, Optional[str]]:
+    """Connect a lobby client; guests (no *token*) join and get one."""
+    client = LoadClient(base_url, stats, timeout)
+    client.listen("/lobby", "lobby_update", "join_ack", "game_started", "error")
+    query = f"lobby_code={code}" + (f"&player_token={token}" if token else "")
+    if not client.connect("lobby.connect", "/lobby", query):
+        return client, None
+    if token is not None:
+        return client, token
+    sent = time.perf_counter()
+    client.sio.emit("join", {"name": name}, namespace="/lobby")
+    while True:
+        event = client.next_event()
+        if event is None:
+            stats.error("lobby.join", "timeout")
+            return client, None
+        if event[0] == "error":
+            stats.error("lobby.join", event[1].get("message", "error"))
+            return client, None
+        if event[0] == "join_ack":
+            stats.record("lobby.join", time.perf_counter() - sent)
+            return client, event[1]["player_token"]
+
+
+def _play_multi_seat(
+    base_url: str,
+    game_id: str,
+    token: str,
+    stats: LoadStats,
+    rng: random.Random,
+    timeout: float,
+    max_plays: int,
+) -> bool:
+    """Drive one human seat until game over; True if the game completed."""
+    client = LoadClient(base_url, stats, timeout)
+    client.listen("/multi", "state", "pass_received", "error", "game_terminated")
+    if not client.connect(
+        "multi.connect", "/multi", f"game_id={game_id}&player_token={token}"
+    ):
+        return False
+
+    # (op, sent at, card played, round) of the action awaiting its state
+    pending: Optional[Tuple[str, float, Any, int]] = None
+    plays = 0
+    try:
+        while True:
+            event = client.next_event()
+            if event is None:
+                stats.error(pending[0] if pending else "multi.wait", "timeout")
+                return False
+            kind, data = event
+            if kind == "game_terminated":
+                return False
+            if kind == "error":
+                stats.error(pending[0] if pending else "multi", data.get("message"))
+                pending = None
+                client.sio.emit("request_state", namespace="/multi")
+                continue
+            if kind == "pass_received":
+                if pending and pending[0] == "multi.pass":
+                    stats.record("multi.pass", time.perf_counter() - pending[1])
+                    pending = None
+                continue
+
+            state = data
+            if state.get("game_over"):
+                return True
+            if pending is not None:
+                op, sent, card, round_ = pending
+                # Broadcasts for earlier moves can arrive first; skip those.
+                answered = state["round"] != round_ or (
+                    card not in state["my_hand"]
+                    if op == "multi.play"
+                    else state["pass_submitted"] or state["phase"] != "passing"
+                )
+                if not answered:
+                    continue
+                stats.record(op, time.perf_counter() - sent)
+                pending = None
+            if max_plays and plays >= max_plays:
+                client.sio.emit("concede", namespace="/multi")
+                return False
+            if (
+                state["phase"] == "passing"
+                and not state["pass_submitted"]
+                and len(state["my_hand"]) >= 3
+            ):
+                cards = rng.sample(state["my_hand"], 3)
+                pending = ("multi.pass", time.perf_counter(), None, state["round"])
+                client.sio.emit("pass", {"cards": cards}, namespace="/multi")
+            elif state["legal_plays"]:
+                card = rng.choice(state["legal_plays"])
+                pending = ("multi.play", time.perf_counter(), card, state["round"])
+                client.sio.emit("play", {"card": card}, namespace="/multi")
+                plays += 1
+    finally:
+        client.close()
+
+
+def play_multi(
+    base_url: str,
+    difficulty: str,
+    stats: LoadStats,
+    rng: random.Random,
+    timeout: float,
+    max_plays: int,
+    humans: int,
+) -> None:
+    host = LoadClient(base_url, stats, timeout)
+    created = host.request(
+        "rest.lobby_create",
+        "POST",
+        "/lobbies/create",
+        {"host_name": "Load host", "num_ai": 4 - humans},
+    )
+    if not created:
+        stats.game("multi_failed")
+        return
+    code = created["code"]
+
+    seats = [
+        _lobby_seat(
+            base_url, stats, timeout, code, "Load host", created["player_token"]
+        )
+    ]
+    for i in range(1, humans):
+        seats.append(_lobby_seat(base_url, stats, timeout, code, f"Load {i}"))
+    tokens = [token for _, token in seats]
+    try:
+        if None in tokens:
+            stats.game("multi_failed")
+            return
+        host_lobby = seats[0][0]
+        sent = time.perf_counter()
+        host_lobby.sio.emit(
+            "start_game", {"difficulty": difficulty}, namespace="/lobby"
+        )
+        game_id = None
+        while game_id is None:
+            event = host_lobby.next_event()
+            if event is None or event[0] == "error":
+                message = event[1].get("message") if event else "timeout"
+                stats.error("lobby.start", message or "error")
+                stats.game("multi_failed")
+                return
+            if event[0] == "game_started":
+                game_id = event[1]["game_id"]
+        stats.record("lobby.start", time.perf_counter() - sent)
+    finally:
+        for client, _ in seats:
+            client.close()
+
+    with ThreadPoolExecutor(max_workers=humans) as pool:
+        results = list(
+            pool.map(
+                lambda token: _play_multi_seat(
+                    base_url,
+                    game_id,
+                    token,
+                    stats,
+                    random.Random(rng.random()),
+                    timeout,
+                    max_plays,
+                ),
+                tokens,
+            )
+        )
+    stats.game("multi_completed" if all(results) else "multi_stopped")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--url", default="http://localhost:5000")
+    parser.add_argument(
+        "--origin",
+        default=LoadClient.origin,
+        help="Origin header for Socket.IO; must be one of the server's CORS_ORIGINS",
+    )
+    parser.add_argument("--games", type=int, default=50, help="games to play")
+    parser.add_argument(
+        "--concurrency", type=int, default=10, help="games in flight at once"
+    )
+    parser.add_argument(
+        "--mix",
+        default="easy=1",
+        help="weighted difficulties, e.g. easy=4,medium=2,hard=1",
+    )
+    parser.add_argument(
+        "--multi-fraction",
+        type=float,
+        default=0.0,
+        help="share of games played as multiplayer lobbies",
+    )
+    parser.add_argument(
+        "--humans", type=int, default=2, help="human seats per multiplayer game"
+    )
+    parser.add_argument(
+        "--max-plays",
+        type=int,
+        default=0,
+        help="cards per player before conceding (0 plays games to the end)",
+    )
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+    if not 1 <= args.humans <= 4:
+        parser.error("--humans must be between 1 and 4")
+
+    LoadClient.origin = args.origin
+    rng = random.Random(args.seed)
+    mix = parse_mix(args.mix)
+    names = [name for name, _ in mix]
+    weights = [weight for _, weight in mix]
+    stats = LoadStats()
+
+    def run_one(seed: float) -> None:
+        game_rng = random.Random(seed)
+        difficulty = game_rng.choices(names, weights)[0]
+        try:
+            if game_rng.random() < args.multi_fraction:
+                play_multi(
+                    args.url,
+                    difficulty,
+                    stats,
+                    game_rng,
+                    args.timeout,
+                    args.max_plays,
+                    args.humans,
+                )
+            else:
+                play_single(
+                    args.url,
+                    difficulty,
+                    stats,
+                    game_rng,
+                    args.timeout,
+                    args.max_plays,
+                )
+        except Exception as e:  # keep the run going; count it
+            stats.error("client", f"{type(e).__name__}: {e}")
+            stats.game("crashed")
+
+    print(
+        f"{args.games} games, {args.concurrency} concurrent, mix {args.mix}, "
+        f"multiplayer {args.multi_fraction:.0%} against {args.url}"
+    )
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        list(pool.map(run_one, [rng.random() for _ in range(args.games)]))
+    print(stats.report(time.perf_counter() - started))
+
+
+if __name__ == "__main__":
+    main()
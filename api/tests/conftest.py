@@ -3,6 +3,7 @@
 import os
 import pytest
 import jwt as pyjwt
+from contextlib import contextmanager
 from datetime import datetime, timedelta
 
 from hearts.game.card import (
@@ -52,14 +53,29 @@ def state_playing_after_pass(state_passing):
     return apply_passes(state_passing, passes)
 
 
+def hold_round(rng, plays=0):
+    """A shuffled no-pass round (round 4) after *plays* random legal plays."""
+    from hearts.game.transitions import apply_play, deal_new_round
+
+    hands = deal_into_4_hands(shuffle_deck(deck_52(), rng))
+    state = deal_new_round((0, 0, 0, 0), 4, hands)
+    for _ in range(plays):
+        state = apply_play(state, state.whose_turn, rng.choice(state.legal_plays))
+    return state
+
+
 @pytest.fixture
 def client():
     """Flask test client for API route tests."""
     from hearts import app
     from hearts.extensions import db
+    from hearts.jwt_utils import reset_principal_cache
+    from hearts.stats_cache import reset_stats_cache
 
     app.config["TESTING"] = True
     app.config["SQLALCHEMY_DATABASE_URI"] = "sqlite://"
+    reset_principal_cache()
+    reset_stats_cache()
     with app.app_context():
         db.create_all()
         yield app.test_client()
@@ -71,6 +87,8 @@ def auth_client():
     """Flask test client with JWT_SECRET set and rate limiting disabled for auth tests."""
     from hearts import app
     from hearts.extensions import db, limiter
+    from hearts.jwt_utils import reset_principal_cache
+    from hearts.stats_cache import reset_stats_cache
 
     app.config["TESTING"] = True
     app.config["SQLALCHEMY_DATABASE_URI"] = "sqlite://"
@@ -78,6 +96,8 @@ def auth_client():
     limiter.enabled = False
     old_secret = os.environ.get("JWT_SECRET")
     os.environ["JWT_SECRET"] = JWT_SECRET
+    reset_principal_cache()
+    reset_stats_cache()
     with app.app_context():
         db.create_all()
         yield app.test_client()
@@ -105,3 +125,21 @@ def make_jwt(
 def auth_headers(token: str) -> dict:
     """Build Authorization header dict from a JWT token."""
     return {"Authorization": f"Bearer {token}"}
+
+
+@contextmanager
+def count_queries():
+    """Collect the SQL statements executed inside the block (needs an app context)."""
+    from sqlalchemy import event
+    from hearts.extensions import db
+
+    statements: list = []
+
+    def _record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(db.engine, "before_cursor_execute", _record)
+    try:
+        yield statements
+    finally:
+        event.remove(db.engine, "before_cursor_execute", _record)
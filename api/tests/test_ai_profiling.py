@@ -0,0 +1,163 @@
+"""
+Tests for opt-in AI decision profiling and its trace exports.
+"""
+
+import json
+import random
+
+import pytest
+
+from hearts.ai import profiling
+from hearts.ai.hard_ai import HardPassStrategy, HardPlayStrategy
+from hearts.ai.profiling import DecisionProfiler, DecisionRecord
+from hearts.game.card import Card, Suit
+from hearts.game.rules import get_legal_plays
+from hearts.game.runner import GameRunner
+from hearts.game.state import GameState, Phase, PassDirection
+
+
+def _mid_round_state() -> GameState:
+    """Player 0 to follow a club lead with several legal clubs."""
+    rng = random.Random(7)
+    rest = [
+        Card(suit, rank)
+        for suit in (Suit.DIAMONDS, Suit.SPADES, Suit.HEARTS)
+        for rank in range(2, 15)
+    ]
+    rng.shuffle(rest)
+    clubs = [Card(Suit.CLUBS, rank) for rank in range(3, 15)]
+    hands = [
+        clubs[:4] + rest[:8],
+        clubs[4:8] + rest[8:16],
+        clubs[8:11] + rest[16:25],
+        clubs[11:] + rest[25:36],
+    ]
+    return GameState(
+        round=1,
+        phase=Phase.PLAYING,
+        pass_direction=PassDirection.LEFT,
+        hands=tuple(tuple(h) for h in hands),
+        current_trick=((3, Card(Suit.CLUBS, 2)),),
+        whose_turn=0,
+        scores=(0, 0, 0, 0),
+        round_scores=(0, 0, 0, 0),
+        hearts_broken=False,
+        game_over=False,
+        winner_index=None,
+    )
+
+
+def _legal(state: GameState, player: int):
+    return get_legal_plays(state.hand(player), state.trick_list(), state.hearts_broken)
+
+
+class TestHardPlayProfiling:
+    def test_phases_and_counters_are_recorded(self):
+        state = _mid_round_state()
+        legal = _legal(state, 0)
+        strat = HardPlayStrategy(rng=random.Random(1), num_worlds=4)
+        strat.profiler = DecisionProfiler("hard")
+
+        with strat.profiler.decision("play", state, 0, len(legal)):
+            strat.choose_play(state, 0, legal)
+
+        (record,) = strat.profiler.records
+        assert record.counters["legal_moves"] == len(legal)
+        assert record.counters["worlds"] == 4
+        assert record.counters["rollouts"] == len(legal) * 4
+        assert record.counters["worlds_reused"] == 0
+        assert record.phases["determinize"][1] == 4
+        assert record.phases["rollout"][1] == len(legal) * 4
+        for path in ("rollout;legal_plays", "rollout;apply_play", "rollout;policy"):
+            assert record.phases[path][1] > 0
+        assert record.phases["rollout"][0] <= record.duration_s
+
+    def test_profiling_does_not_change_the_choice(self):
+        state = _mid_round_state()
+        legal = _legal(state, 0)
+        plain = HardPlayStrategy(rng=random.Random(5), num_worlds=6)
+        profiled = HardPlayStrategy(rng=random.Random(5), num_worlds=6)
+        profiled.profiler = DecisionProfiler("hard")
+        with profiled.profiler.decision("play", state, 0, len(legal)):
+            chosen = profiled.choose_play(state, 0, legal)
+        assert chosen == plain.choose_play(state, 0, legal)
+
+
+class TestExport:
+    @pytest.fixture
+    def record(self):
+        return DecisionRecord(
+            label="hard",
+            action="play",
+            player_index=2,
+            round=3,
+            start_us=1_000_000.0,
+            duration_s=0.010,
+            phases={
+                "rollout;policy": [0.004, 40],
+                "rollout": [0.007, 10],
+                "determinize": [0.002, 10],
+            },
+            counters={"worlds": 10},
+        )
+
+    def test_folded_stacks_use_exclusive_time(self, record):
+        lines = dict(
+            line.rsplit(" ", 1) for line in profiling.to_folded([record]).splitlines()
+        )
+        assert lines == {
+            "hard;play": "1000",
+            "hard;play;determinize": "2000",
+            "hard;play;rollout": "3000",
+            "hard;play;rollout;policy": "4000",
+        }
+
+    def test_chrome_trace_nests_phases_inside_their_parent(self, record):
+        events = profiling.to_chrome_trace([record])["traceEvents"]
+        by_name = {e["name"]: e for e in events}
+        decision = by_name["hard play"]
+        assert decision["dur"] == pytest.approx(10_000)
+        assert decision["args"]["worlds"] == 10
+        rollout, policy = by_name["rollout"], by_name["policy"]
+        assert policy["ts"] >= rollout["ts"]
+        assert policy["ts"] + policy["dur"] <= rollout["ts"] + rollout["dur"]
+        assert all(e["tid"] == 2 for e in events)
+
+
+class TestPerGameToggle:
+    def test_off_without_profile_dir(self, monkeypatch):
+        monkeypatch.delenv("AI_PROFILE_DIR", raising=False)
+        assert profiling.sample_game("g1") is None
+        strat = HardPlayStrategy()
+        assert profiling.open_profiler("g1", "hard", strat) is None
+        assert strat.profiler is None
+
+    def test_profiled_game_writes_decisions_and_survives_reload(
+        self, monkeypatch, tmp_path
+    ):
+        monkeypatch.setenv("AI_PROFILE_DIR", str(tmp_path))
+        monkeypatch.setenv("AI_PROFILE_SAMPLE_RATE", "1")
+        profile_id = profiling.sample_game("g1")
+        runner = GameRunner.new_game(
+            HardPassStrategy(),
+            HardPlayStrategy(num_worlds=2),
+            rng=random.Random(3),
+            difficulty="hard",
+            profile_id=profile_id,
+        )
+        runner.submit_pass(list(runner.state.hand(0)[:3]))
+
+        path = tmp_path / "g1.jsonl"
+        records = profiling.load_jsonl(str(path))
+        assert [r.action for r in records] == ["pass"] * 3
+        assert all(r.counters["combinations"] == 286 for r in records)
+
+        reloaded = GameRunner.from_json(runner.to_json())
+        assert reloaded.to_dict()["ai_profile"] == "g1"
+        reloaded.advance_to_human_turn()
+        actions = [r.action for r in profiling.load_jsonl(str(path))]
+        assert actions[:3] == ["pass"] * 3
+
+        out = tmp_path / "trace.json"
+        profiling.main([str(path), "--format", "chrome", "-o", str(out)])
+        assert json.loads(out.read_text())["traceEvents"]
@@ -3,24 +3,34 @@ Unit tests for AI strategies: medium (heuristic), hard (Monte Carlo), factory.
 """
 
 import random
+from contextlib import nullcontext
+from dataclasses import replace
 
 import pytest
 
 from hearts.game.card import Card, Suit, QUEEN_OF_SPADES_RANK, deck_52, two_of_clubs
 from hearts.game.state import GameState, Phase, PassDirection
 from hearts.game.rules import get_legal_plays
-from hearts.game.transitions import apply_play, apply_passes, _is_first_lead
+from hearts.game.transitions import (
+    apply_play,
+    apply_passes,
+    deal_new_round,
+    _is_first_lead,
+)
 
 from hearts.ai.random_ai import RandomPassStrategy, RandomPlayStrategy
 from hearts.ai.medium_ai import MediumPassStrategy, MediumPlayStrategy
 from hearts.ai.hard_ai import (
     HardPassStrategy,
     HardPlayStrategy,
-    RoundTracker,
     _hand_danger,
     _determinize,
+    _same_round,
+    _still_consistent,
+    _WorldPool,
 )
-from hearts.ai.factory import create_strategies
+from hearts.ai.factory import DIFFICULTIES, create_strategies, normalize_difficulty
+from tests.conftest import hold_round
 
 
 _QS = Card(Suit.SPADES, QUEEN_OF_SPADES_RANK)
@@ -331,7 +341,7 @@ class TestHardPlayStrategy:
         # Run multiple determinizations and ensure opponent hands vary
         seen_hands_1: set = set()
         for _ in range(10):
-            det = _determinize(state, 0, {}, rng)
+            det = _determinize(state, 0, rng)
             seen_hands_1.add(det.hands[1])
 
         # With 10 random samples of 13 cards from 39, we should see variation
@@ -339,13 +349,116 @@ class TestHardPlayStrategy:
 
 
 # ===================================================================
-# Round tracker
+# Helper: a strategy's plays over a whole self-play round
+# ===================================================================
+
+
+class _Seat(MediumPlayStrategy):
+    """Plays with *strategy*, each play inside the context manager
+    *around(state, player_index, legal_plays)* returns."""
+
+    def __init__(self, strategy, around):
+        super().__init__(rng=random.Random(0))
+        self.strategy = strategy
+        self.around = around
+
+    def choose_play(self, state, player_index, legal_plays):
+        with self.around(state, player_index, legal_plays):
+            return self.strategy.choose_play(state, player_index, legal_plays)
+
+
+def _play_seat_zero(strategy, rng, around=lambda *args: nullcontext()):
+    """Play a hold round with *strategy* in seat 0 and medium opponents."""
+    from hearts.ai import selfplay
+
+    medium = (MediumPassStrategy(rng=rng), MediumPlayStrategy(rng=rng))
+    seats = [(MediumPassStrategy(rng=rng), _Seat(strategy, around))] + [medium] * 3
+    return selfplay.play_round(selfplay.deal(rng, round_num=4), seats)
+
+
+# ===================================================================
+# World pool (hard AI worlds kept across a seat's plays)
 # ===================================================================
 
 
-class TestRoundTracker:
+class TestWorldPool:
+    def test_true_deal_stays_consistent(self, rng):
+        state = hold_round(rng)
+        start = state.hands
+        for _ in range(7):
+            state = apply_play(state, state.whose_turn, state.legal_plays[0])
+        assert _still_consistent(start, state, 0) == state.hands
+
+    def test_world_with_a_played_card_in_the_wrong_hand_is_dropped(self, rng):
+        state = hold_round(rng)
+        leader = state.whose_turn
+        other = next(j for j in range(4) if j not in (0, leader))
+        two_c = two_of_clubs()
+        hands = [list(h) for h in state.hands]
+        swap = hands[other][0]
+        hands[leader][hands[leader].index(two_c)] = swap
+        hands[other][0] = two_c
+        world = tuple(tuple(h) for h in hands)
+        state = apply_play(state, leader, two_c)
+        assert _still_consistent(world, state, other) is None
+
+    def test_world_swapping_cards_of_a_finished_trick_is_dropped(self, rng):
+        state = hold_round(rng)
+        start = state.hands
+        first_trick = []
+        for _ in range(5):
+            player, card = state.whose_turn, state.legal_plays[0]
+            first_trick.append((player, card))
+            state = apply_play(state, player, card)
+        (a, card_a), (b, card_b) = first_trick[1:3]
+        observer = next(j for j in range(4) if j not in (a, b))
+        hands = [list(h) for h in start]
+        hands[a][hands[a].index(card_a)] = card_b
+        hands[b][hands[b].index(card_b)] = card_a
+        world = tuple(tuple(h) for h in hands)
+        assert _still_consistent(start, state, observer) == state.hands
+        assert _still_consistent(world, state, observer) is None
+
+    def test_refresh_keeps_consistent_worlds_and_tops_up(self, rng):
+        state = hold_round(rng)
+        for _ in range(4):
+            state = apply_play(state, state.whose_turn, state.legal_plays[0])
+        player = state.whose_turn
+        pool = _WorldPool(state)
+        assert pool.refresh(state, player, 10, random.Random(1)) == 0
+        assert len(pool.worlds) == 10
+        assert pool.refresh(state, player, 12, random.Random(1)) == 10
+        assert len(pool.worlds) == 12
+        assert all(w[player] == state.hands[player] for w in pool.worlds)
+
+    def test_new_round_is_detected(self, rng):
+        state = hold_round(rng)
+        later = apply_play(state, state.whose_turn, state.legal_plays[0])
+        assert _same_round(later, state.round, state.played_mask)
+        assert not _same_round(state, later.round, later.played_mask)
+        assert not _same_round(replace(later, round=5), state.round, 0)
+
+    def test_hard_play_reuses_worlds_within_a_round(self):
+        from hearts.ai.profiling import DecisionProfiler
+
+        strat = HardPlayStrategy(rng=random.Random(1), num_worlds=8)
+        strat.profiler = DecisionProfiler("hard")
+
+        def decision(state, player_index, legal_plays):
+            return strat.profiler.decision("play", state, player_index, 0)
+
+        _play_seat_zero(strat, random.Random(3), around=decision)
+        reused = [r.counters.get("worlds_reused", 0) for r in strat.profiler.records]
+        assert any(reused)
+
+
+# ===================================================================
+# Known voids (tracked on GameState)
+# ===================================================================
+
+
+class TestKnownVoids:
     def test_detects_void(self):
-        tracker = RoundTracker()
         trick = (
             (0, Card(Suit.CLUBS, 5)),
             (1, Card(Suit.HEARTS, 10)),  # player 1 didn't follow clubs
@@ -355,44 +468,115 @@ class TestRoundTracker:
             whose_turn=2,
             current_trick=trick,
         )
-        tracker.observe(state)
-        assert Suit.CLUBS in tracker.known_voids.get(1, set())
+        assert Suit.CLUBS in state.known_voids[1]
 
-    def test_resets_on_new_round(self):
-        tracker = RoundTracker()
-        trick = (
+    def test_void_outlives_the_trick(self):
+        state = _playing_state(
+            [
+                [Card(Suit.CLUBS, 5), Card(Suit.DIAMONDS, 2)],
+                [Card(Suit.HEARTS, 10), Card(Suit.DIAMONDS, 3)],
+                [Card(Suit.CLUBS, 9), Card(Suit.DIAMONDS, 4)],
+                [Card(Suit.CLUBS, 7), Card(Suit.DIAMONDS, 5)],
+            ],
+            hearts_broken=True,
+        )
+        for player, card in (
             (0, Card(Suit.CLUBS, 5)),
             (1, Card(Suit.HEARTS, 10)),
-        )
-        state = GameState(
-            round=1,
-            phase=Phase.PLAYING,
-            pass_direction=PassDirection.LEFT,
-            hands=((), (), (), ()),
-            current_trick=trick,
-            whose_turn=2,
-            scores=(0, 0, 0, 0),
-            round_scores=(0, 0, 0, 0),
+            (2, Card(Suit.CLUBS, 9)),
+            (3, Card(Suit.CLUBS, 7)),
+        ):
+            state = apply_play(state, player, card)
+        assert state.current_trick == ()
+        assert state.known_voids[1] == frozenset({Suit.CLUBS})
+        assert not any(state.known_voids[i] for i in (0, 2, 3))
+
+    def test_resets_on_new_round(self):
+        hands = [deck_52()[i * 13 : (i + 1) * 13] for i in range(4)]
+        state = deal_new_round((10, 20, 30, 40), 2, hands)
+        assert state.known_voids == (frozenset(),) * 4
+        assert state.tricks_completed == 0
+        assert state.played_mask == 0
+
+    def test_determinize_deals_only_unplayed_cards_and_respects_voids(self):
+        rng = random.Random(3)
+        hands = [
+            [Card(Suit.CLUBS, r) for r in range(2, 15)],
+            [Card(Suit.DIAMONDS, r) for r in range(2, 15)],
+            [Card(Suit.SPADES, r) for r in range(2, 15)],
+            [Card(Suit.HEARTS, r) for r in range(2, 15)],
+        ]
+        state = _playing_state(hands, whose_turn=0, hearts_broken=True)
+        for player, card in (
+            (0, Card(Suit.CLUBS, 2)),
+            (1, Card(Suit.DIAMONDS, 2)),
+            (2, Card(Suit.SPADES, 2)),
+            (3, Card(Suit.HEARTS, 2)),
+        ):
+            state = apply_play(state, player, card)
+        played = {Card(suit, 2) for suit in Suit}
+        for _ in range(10):
+            det = _determinize(state, 0, rng)
+            for j in (1, 2, 3):
+                assert len(det.hands[j]) == 12
+                assert not played & set(det.hands[j])
+                assert all(c.suit != Suit.CLUBS for c in det.hands[j])
+
+
+class TestConstrainedDeterminization:
+    @staticmethod
+    def _tight_state():
+        """Player 0 to lead; player 1 holds only hearts, player 2 no hearts."""
+        hearts = [Card(Suit.HEARTS, r) for r in range(2, 15)]
+        spades = [Card(Suit.SPADES, r) for r in range(2, 15)]
+        diamonds = [Card(Suit.DIAMONDS, r) for r in range(2, 15)]
+        return _playing_state(
+            [
+                [Card(Suit.CLUBS, r) for r in range(3, 6)],
+                hearts[:3],
+                [spades[0], diamonds[0], hearts[3]],
+                spades[1:4],
+            ],
+            whose_turn=0,
             hearts_broken=True,
-            game_over=False,
         )
-        tracker.observe(state)
-        assert Suit.CLUBS in tracker.known_voids.get(1, set())
-
-        state2 = GameState(
-            round=2,
-            phase=Phase.PLAYING,
-            pass_direction=PassDirection.RIGHT,
-            hands=((), (), (), ()),
-            current_trick=(),
-            whose_turn=0,
-            scores=(0, 0, 0, 0),
-            round_scores=(0, 0, 0, 0),
-            hearts_broken=False,
-            game_over=False,
+
+    def test_every_world_satisfies_voids_and_hand_sizes(self):
+        state = replace(
+            self._tight_state(),
+            known_voids=(
+                frozenset(),
+                frozenset({Suit.CLUBS, Suit.DIAMONDS, Suit.SPADES}),
+                frozenset(),
+                frozenset({Suit.HEARTS, Suit.DIAMONDS}),
+            ),
+        )
+        rng = random.Random(11)
+        seen = set()
+        for _ in range(200):
+            det = _determinize(state, 0, rng)
+            assert [len(h) for h in det.hands] == [3, 3, 3, 3]
+            assert all(c.suit == Suit.HEARTS for c in det.hands[1])
+            assert all(c.suit == Suit.SPADES for c in det.hands[3])
+            assert det.hands[0] == state.hands[0]
+            seen.add(det.hands[2])
+        # Player 2 must take the diamond plus whatever hearts and spades are left.
+        assert all(Card(Suit.DIAMONDS, 2) in h for h in seen)
+        assert len(seen) > 1
+
+    def test_passed_cards_stay_with_the_receiver(self):
+        passed = (Card(Suit.SPADES, 2), Card(Suit.DIAMONDS, 2), _AH)
+        state = replace(
+            self._tight_state(),
+            pass_direction=PassDirection.ACROSS,
+            passed_cards=(passed, (), (), ()),
         )
-        tracker.observe(state2)
-        assert 1 not in tracker.known_voids or Suit.CLUBS not in tracker.known_voids[1]
+        rng = random.Random(2)
+        for _ in range(50):
+            det = _determinize(state, 0, rng)
+            # A♥ was played; the other two are still with player 2.
+            assert {Card(Suit.SPADES, 2), Card(Suit.DIAMONDS, 2)} <= set(det.hands[2])
+            assert all(_AH not in h for h in det.hands)
 
 
 # ===================================================================
@@ -416,6 +600,7 @@ class TestFactory:
         assert isinstance(ps, HardPassStrategy)
         assert isinstance(pl, HardPlayStrategy)
         assert pl._num_worlds == 50
+        assert pl._rollout_tricks == 3
 
     def test_harder(self):
         ps, pl = create_strategies("harder")
@@ -429,6 +614,16 @@ class TestFactory:
         assert isinstance(pl, HardPlayStrategy)
         assert pl._num_worlds == 150
 
+    def test_every_offered_difficulty_is_created(self):
+        for difficulty in DIFFICULTIES:
+            create_strategies(difficulty)
+
+    def test_normalize_difficulty(self):
+        assert normalize_difficulty("  Hardest ") == "hardest"
+        for bad in ("impossible", None, 3):
+            with pytest.raises(ValueError, match="Unknown difficulty"):
+                normalize_difficulty(bad)
+
     def test_case_insensitive(self):
         ps, pl = create_strategies("  Medium  ")
         assert isinstance(ps, MediumPassStrategy)
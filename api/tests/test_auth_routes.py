@@ -10,7 +10,7 @@ from unittest.mock import patch
 
 import pytest
 
-from tests.conftest import JWT_SECRET, make_jwt, auth_headers
+from tests.conftest import JWT_SECRET, make_jwt, auth_headers, count_queries
 
 
 @pytest.fixture(autouse=True)
@@ -205,6 +205,27 @@ class TestLogin:
         assert me_r.status_code == 200
         assert me_r.get_json()["user"]["username"] == "alice"
 
+    def test_login_rehashes_password_after_parameter_change(
+        self, auth_client, monkeypatch
+    ):
+        from argon2 import PasswordHasher
+        from hearts.models import User
+
+        _register_and_verify(auth_client)
+        old_hash = User.query.filter_by(username="alice").first().password_hash
+
+        cheaper = PasswordHasher(time_cost=1, memory_cost=8192, parallelism=1)
+        monkeypatch.setattr("hearts.auth_utils._hasher", cheaper)
+        r = auth_client.post(
+            "/login", json={"username": "alice", "password": "password123"}
+        )
+        assert r.status_code == 200
+
+        new_hash = User.query.filter_by(username="alice").first().password_hash
+        assert new_hash != old_hash
+        assert "m=8192,t=1,p=1" in new_hash
+        assert not cheaper.check_needs_rehash(new_hash)
+
 
 # -----------------------------------------------------------------------------
 # GET /me
@@ -244,6 +265,51 @@ class TestMe:
         assert r.status_code == 401
 
 
+class TestUserLoadQueries:
+    """Authenticated endpoints load only what they use from users and its relations."""
+
+    def _token(self, auth_client):
+        from hearts.extensions import db
+        from hearts.models import User, UserPreferences, UserStats
+
+        _register_and_verify(auth_client)
+        user_id = User.query.filter_by(username="alice").first().id
+        db.session.add(UserStats(user_id=user_id))
+        db.session.add(UserPreferences(user_id=user_id, card_style="flourish"))
+        db.session.commit()
+        db.session.expunge_all()
+        return make_jwt(user_id, username="alice", email="alice@example.com")
+
+    def test_me_loads_user_and_preferences_in_one_query(self, auth_client):
+        token = self._token(auth_client)
+        with count_queries() as statements:
+            r = auth_client.get("/me", headers=auth_headers(token))
+        assert r.status_code == 200
+        assert r.get_json()["user"]["preferences"]["card_style"] == "flourish"
+        assert len(statements) == 1
+        assert "user_preferences" in statements[0]
+        assert "user_stats" not in statements[0]
+
+    def test_plain_jwt_endpoints_load_only_the_users_row(self, auth_client):
+        token = self._token(auth_client)
+        with count_queries() as statements:
+            r = auth_client.get("/stats/by-category", headers=auth_headers(token))
+        assert r.status_code == 200
+        user_loads = [s for s in statements if "FROM users" in s]
+        assert len(user_loads) == 1
+        assert "JOIN" not in user_loads[0]
+
+    def test_stats_loads_user_and_stats_in_one_query(self, auth_client):
+        token = self._token(auth_client)
+        with count_queries() as statements:
+            r = auth_client.get("/stats", headers=auth_headers(token))
+        assert r.status_code == 200
+        selects = [s for s in statements if s.lstrip().startswith("SELECT")]
+        assert len(selects) == 1
+        assert "user_stats" in selects[0]
+        assert "user_preferences" not in selects[0]
+
+
 # -----------------------------------------------------------------------------
 # POST /verify-email
 # -----------------------------------------------------------------------------
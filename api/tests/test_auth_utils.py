@@ -0,0 +1,62 @@
+"""
+Tests for password hashing and the pool that keeps it off the eventlet hub.
+"""
+
+import pytest
+
+from hearts import auth_utils
+from hearts.auth_utils import (
+    _HashPool,
+    hash_password,
+    hash_pool_stats,
+    needs_rehash,
+    verify_password,
+)
+
+
+@pytest.fixture
+def offloaded_pool(monkeypatch):
+    """Route hashing through eventlet's thread pool, as under gunicorn."""
+    pool = _HashPool(2)
+    monkeypatch.setattr(_HashPool, "_offload", lambda self: True)
+    monkeypatch.setattr(auth_utils, "_pool", pool)
+    return pool
+
+
+def test_hash_and_verify_inline():
+    h = hash_password("password123")
+    assert verify_password("password123", h)
+    assert not verify_password("wrong", h)
+    assert not needs_rehash(h)
+
+
+def test_hash_and_verify_through_thread_pool(offloaded_pool):
+    h = hash_password("password123")
+    assert verify_password("password123", h)
+    assert not verify_password("wrong", h)
+
+    stats = hash_pool_stats()
+    assert stats["completed"] == 3
+    assert stats["in_flight"] == 0
+    assert stats["waiting"] == 0
+    assert stats["max_concurrency"] == 2
+    assert stats["run_seconds_total"] > 0
+
+
+def test_hub_keeps_running_while_hashing(offloaded_pool):
+    import eventlet
+
+    ticks = []
+
+    def ticker():
+        for _ in range(5):
+            ticks.append(1)
+            eventlet.sleep(0)
+
+    eventlet.spawn(ticker)
+    hash_password("password123")
+    assert len(ticks) == 5
+
+
+def test_needs_rehash_ignores_foreign_hashes():
+    assert not needs_rehash("not-an-argon2-hash")
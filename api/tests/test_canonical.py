@@ -0,0 +1,123 @@
+"""
+Property tests for hearts.game.canonical: the canonical form must keep the
+legal-move and scoring semantics of the position it stands for.
+"""
+
+import random
+
+import pytest
+
+from hearts.game.canonical import canonical_position, canonicalize
+from hearts.game.card import Card, Suit, deck_52
+from hearts.game.rules import get_legal_plays, get_trick_points, get_trick_winner
+from hearts.game.transitions import apply_play
+from tests.conftest import hold_round
+
+_SWAP = {Suit.CLUBS: Suit.DIAMONDS, Suit.DIAMONDS: Suit.CLUBS}
+
+
+def _random_positions(seed, count=60):
+    """States at random points of randomly played hold rounds."""
+    rng = random.Random(seed)
+    for _ in range(count):
+        yield hold_round(rng, plays=rng.randrange(52)), rng
+
+
+def _canonical_legal(pos, hearts_broken, first_trick):
+    trick = [(i, c) for i, c in enumerate(pos.trick)]
+    return get_legal_plays(
+        list(pos.hand),
+        trick,
+        hearts_broken,
+        first_lead_of_round=first_trick and not trick,
+        first_trick=first_trick,
+    )
+
+
+def _swap_minors(card):
+    return Card(_SWAP.get(card.suit, card.suit), card.rank)
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_legal_plays_map_onto_canonical_legal_plays(seed):
+    for state, _ in _random_positions(seed):
+        player = state.whose_turn
+        pos = canonical_position(state, player)
+        canonical = _canonical_legal(pos, state.hearts_broken, state.first_trick)
+        assert sorted(canonical, key=lambda c: c.index) == sorted(
+            (pos.card(c) for c in state.legal_plays), key=lambda c: c.index
+        )
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_completed_tricks_keep_winner_and_points(seed):
+    for state, rng in _random_positions(seed):
+        pos = canonical_position(state, state.whose_turn)
+        trick = list(state.current_trick)
+        while len(trick) < 4:
+            player = state.whose_turn
+            card = rng.choice(state.legal_plays)
+            trick.append((player, card))
+            state = apply_play(state, player, card)
+        mapped = [(i, pos.card(c)) for i, c in trick]
+        assert get_trick_winner(mapped, mapped[0][1].suit) == get_trick_winner(
+            trick, trick[0][1].suit
+        )
+        assert get_trick_points(mapped) == get_trick_points(trick)
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_canonical_form_is_a_fixed_point(seed):
+    for state, _ in _random_positions(seed):
+        pos = canonical_position(state, state.whose_turn)
+        played = sum(1 << c.index for c in deck_52() if c not in pos.live)
+        played |= sum(1 << c.index for c in pos.trick)
+        again = canonicalize(
+            pos.hand, pos.trick, played, state.hearts_broken, state.first_trick
+        )
+        assert again.key == pos.key
+        assert all(pos.actual(pos.card(c)) == c for c in state.hands[state.whose_turn])
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_clubs_and_diamonds_are_interchangeable_after_the_first_trick(seed):
+    for state, _ in _random_positions(seed):
+        if state.first_trick:
+            continue
+        hand = state.hands[state.whose_turn]
+        trick = [c for _, c in state.current_trick]
+        played = sum(
+            1 << _swap_minors(c).index for c in deck_52() if state.is_played(c)
+        )
+        a = canonicalize(hand, trick, state.played_mask, state.hearts_broken)
+        b = canonicalize(
+            [_swap_minors(c) for c in hand],
+            [_swap_minors(c) for c in trick],
+            played,
+            state.hearts_broken,
+        )
+        assert a.key == b.key
+
+
+def test_rank_gaps_are_compressed():
+    low = canonicalize([Card(Suit.DIAMONDS, 3)], [], 1 << Card(Suit.DIAMONDS, 2).index)
+    assert low.hand == (Card(Suit.CLUBS, 2),)
+    both = canonicalize([Card(Suit.HEARTS, 14)], [], 0)
+    gap = canonicalize([Card(Suit.HEARTS, 14)], [], 1 << Card(Suit.HEARTS, 13).index)
+    assert both.key != gap.key
+    assert gap.hand == (Card(Suit.HEARTS, 13),)
+
+
+def test_queen_of_spades_keeps_its_identity():
+    played = sum(1 << Card(Suit.SPADES, r).index for r in (2, 3, 13))
+    pos = canonicalize([Card(Suit.SPADES, 12), Card(Suit.SPADES, 14)], [], played)
+    assert pos.hand == (Card(Suit.SPADES, 12), Card(Suit.SPADES, 13))
+    gone = canonicalize([Card(Suit.SPADES, 11)], [], 1 << Card(Suit.SPADES, 12).index)
+    assert gone.hand == (Card(Suit.SPADES, 11),)
+
+
+def test_first_trick_keeps_clubs_and_two_of_clubs():
+    hand = [Card(Suit.CLUBS, 2), Card(Suit.DIAMONDS, 9)]
+    pos = canonicalize(hand, [], 0, first_trick=True)
+    assert not pos.swapped
+    assert pos.card(Card(Suit.CLUBS, 2)) == Card(Suit.CLUBS, 2)
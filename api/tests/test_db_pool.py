@@ -0,0 +1,70 @@
+"""
+Tests for the database pool configuration and its checkout counters.
+"""
+
+import pytest
+import sqlalchemy as sa
+
+from hearts import db_pool
+from hearts.db_pool import InstrumentedQueuePool, engine_options, pool_stats
+
+
+@pytest.fixture
+def engine(tmp_path):
+    db_pool.reset_pool_stats()
+    engine = sa.create_engine(
+        f"sqlite:///{tmp_path / 'pool.db'}",
+        poolclass=InstrumentedQueuePool,
+        pool_size=1,
+        max_overflow=0,
+        pool_timeout=0.05,
+    )
+    yield engine
+    engine.dispose()
+    db_pool.reset_pool_stats()
+
+
+def test_sqlite_uses_driver_defaults():
+    assert engine_options("sqlite://") == {}
+
+
+def test_postgres_options_come_from_environment(monkeypatch):
+    monkeypatch.setenv("DB_POOL_SIZE", "3")
+    monkeypatch.setenv("DB_MAX_OVERFLOW", "0")
+    monkeypatch.setenv("DB_POOL_PRE_PING", "0")
+    monkeypatch.setenv("DB_STATEMENT_TIMEOUT_MS", "2500")
+    options = engine_options("postgresql://u:p@localhost/hearts")
+    assert options["poolclass"] is InstrumentedQueuePool
+    assert options["pool_size"] == 3
+    assert options["max_overflow"] == 0
+    assert options["pool_pre_ping"] is False
+    assert options["connect_args"] == {"options": "-c statement_timeout=2500"}
+
+
+def test_statement_timeout_can_be_disabled(monkeypatch):
+    monkeypatch.setenv("DB_STATEMENT_TIMEOUT_MS", "0")
+    assert "connect_args" not in engine_options("postgresql://localhost/hearts")
+
+
+def test_counts_checkouts_and_timeouts(engine):
+    held = engine.connect()
+    stats = pool_stats(engine)
+    assert stats["checkouts"] == 1
+    assert stats["connects"] == 1
+    assert stats["checked_out"] == 1
+
+    with pytest.raises(sa.exc.TimeoutError):
+        engine.connect()
+    held.close()
+
+    stats = pool_stats(engine)
+    assert stats["checkouts"] == 2
+    assert stats["checkout_timeouts"] == 1
+    assert stats["checkout_seconds_max"] >= 0.05
+    assert stats["checked_out"] == 0
+
+
+def test_health_reports_pool(client):
+    r = client.get("/health")
+    assert r.status_code == 200
+    assert "checkouts" in r.get_json()["db_pool"]
@@ -0,0 +1,148 @@
+"""
+Tests for the outbound email queue: enqueue, delivery, backoff, dead-lettering,
+purging.
+"""
+
+from datetime import datetime, timedelta
+
+import pytest
+
+from hearts import email_queue
+from hearts.email_queue import EmailSendError, MemoryTransport
+from hearts.extensions import db
+from hearts.models import OutboundEmail
+
+
+@pytest.fixture
+def transport(auth_client, monkeypatch):
+    """Route the queue through a fresh in-memory transport."""
+    fake = MemoryTransport()
+    monkeypatch.setitem(auth_client.application.config, "EMAIL_TRANSPORT", "memory")
+    monkeypatch.setitem(email_queue._transports, "memory", fake)
+    return fake
+
+
+def _make_due(row_id):
+    row = db.session.get(OutboundEmail, row_id)
+    row.next_attempt_at = datetime.utcnow() - timedelta(seconds=1)
+    db.session.commit()
+
+
+class TestEndpointsEnqueue:
+    def test_register_returns_without_sending(self, auth_client, transport):
+        r = auth_client.post(
+            "/register",
+            json={
+                "username": "mailer",
+                "email": "mailer@example.com",
+                "password": "password123",
+            },
+        )
+        assert r.status_code == 201
+        assert transport.outbox == []
+
+        row = OutboundEmail.query.one()
+        assert row.to_email == "mailer@example.com"
+        assert row.status == OutboundEmail.PENDING
+        assert "verify-email?token=" in row.html_body
+
+        assert email_queue.process_due() == 1
+        assert [m[0] for m in transport.outbox] == ["mailer@example.com"]
+        row = db.session.get(OutboundEmail, row.id)
+        assert row.status == OutboundEmail.SENT
+        assert row.html_body == ""
+
+
+class TestDelivery:
+    def test_temporary_failure_backs_off_then_succeeds(self, auth_client, transport):
+        row = email_queue.enqueue("a@example.com", "Hi", "<p>hi</p>")
+        transport.fail_next = 1
+
+        email_queue.process_due()
+        row = db.session.get(OutboundEmail, row.id)
+        assert row.status == OutboundEmail.PENDING
+        assert row.attempts == 1
+        assert row.last_error == "simulated failure"
+        assert row.next_attempt_at > datetime.utcnow() + timedelta(seconds=20)
+
+        # Not due yet: nothing is attempted.
+        assert email_queue.process_due() == 0
+
+        _make_due(row.id)
+        email_queue.process_due()
+        row = db.session.get(OutboundEmail, row.id)
+        assert row.status == OutboundEmail.SENT
+        assert row.attempts == 2
+        assert transport.outbox == [("a@example.com", "Hi", "<p>hi</p>")]
+
+    def test_dead_letters_after_max_attempts(self, auth_client, transport):
+        row = email_queue.enqueue("a@example.com", "Hi", "<p>hi</p>")
+        transport.fail_next = email_queue.MAX_ATTEMPTS
+
+        for _ in range(email_queue.MAX_ATTEMPTS):
+            _make_due(row.id)
+            email_queue.process_due()
+
+        row = db.session.get(OutboundEmail, row.id)
+        assert row.status == OutboundEmail.DEAD
+        assert row.attempts == email_queue.MAX_ATTEMPTS
+        _make_due(row.id)
+        assert email_queue.process_due() == 0
+        assert email_queue.queue_stats() == {OutboundEmail.DEAD: 1}
+
+    def test_permanent_failure_is_dead_lettered_immediately(
+        self, auth_client, transport, monkeypatch
+    ):
+        def reject(to_email, subject, html_body):
+            raise EmailSendError("bad address", permanent=True)
+
+        monkeypatch.setattr(transport, "send", reject)
+        row = email_queue.enqueue("bad@example.com", "Hi", "<p>hi</p>")
+        email_queue.process_due()
+        row = db.session.get(OutboundEmail, row.id)
+        assert row.status == OutboundEmail.DEAD
+        assert row.attempts == 1
+        assert row.html_body == ""
+
+    def test_expired_lease_is_reclaimed(self, auth_client, transport):
+        row = email_queue.enqueue("a@example.com", "Hi", "<p>hi</p>")
+        row.status = OutboundEmail.SENDING
+        row.attempts = 1
+        db.session.commit()
+
+        _make_due(row.id)
+        email_queue.process_due()
+        assert db.session.get(OutboundEmail, row.id).status == OutboundEmail.SENT
+
+    def test_missing_smtp2go_key_falls_back_to_logging(self, auth_client, monkeypatch):
+        config = auth_client.application.config
+        monkeypatch.setitem(config, "EMAIL_TRANSPORT", "smtp2go")
+        monkeypatch.setitem(config, "SMTP2GO_API_KEY", "")
+        assert isinstance(email_queue.get_transport(), email_queue.LogTransport)
+        row = email_queue.enqueue("a@example.com", "Hi", "<p>hi</p>")
+        email_queue.process_due()
+        assert db.session.get(OutboundEmail, row.id).status == OutboundEmail.SENT
+
+    def test_missing_smtp2go_key_is_permanent(self, auth_client, monkeypatch):
+        monkeypatch.setitem(auth_client.application.config, "SMTP2GO_API_KEY", "")
+        with pytest.raises(EmailSendError) as exc_info:
+            email_queue.Smtp2GoTransport().send("a@example.com", "Hi", "<p>hi</p>")
+        assert exc_info.value.permanent
+
+
+class TestPurge:
+    def test_only_old_finished_rows_are_deleted(self, auth_client, transport):
+        old = datetime.utcnow() - timedelta(days=8)
+        ids = {}
+        for status in (OutboundEmail.SENT, OutboundEmail.DEAD, OutboundEmail.PENDING):
+            row = email_queue.enqueue("a@example.com", status, "<p>hi</p>")
+            row.status = status
+            row.created_at = old
+            ids[status] = row.id
+        recent = email_queue.enqueue("b@example.com", "recent", "<p>hi</p>")
+        recent.status = OutboundEmail.SENT
+        db.session.commit()
+
+        assert email_queue.purge_finished() == 2
+        remaining = {row.id for row in OutboundEmail.query.all()}
+        assert remaining == {ids[OutboundEmail.PENDING], recent.id}
@@ -0,0 +1,92 @@
+"""
+Tests for the static evaluator that cuts the hard AI's rollouts short.
+"""
+
+import json
+import random
+
+import pytest
+
+from hearts.ai import evaluator
+from hearts.ai.evaluator import FEATURES, Evaluator
+from hearts.ai.hard_ai import HardPlayStrategy, _simulate_remaining
+from hearts.ai.medium_ai import MediumPlayStrategy
+from hearts.game.card import Card, Suit
+from tests.conftest import hold_round
+
+
+@pytest.fixture(autouse=True)
+def _reset():
+    evaluator.reset_evaluator()
+    yield
+    evaluator.reset_evaluator()
+
+
+def _points_out(state):
+    hearts = sum(1 for r in range(2, 15) if not state.is_played(Card(Suit.HEARTS, r)))
+    return hearts + (0 if state.is_played(Card(Suit.SPADES, 12)) else 13)
+
+
+class TestEvaluator:
+    def test_packaged_weights_load(self):
+        ev = evaluator.get_evaluator()
+        assert len(ev.weights) == len(FEATURES)
+        assert evaluator.get_evaluator() is ev
+
+    @pytest.mark.parametrize("tricks", [1, 4, 9, 12])
+    def test_estimates_share_exactly_the_points_still_out(self, rng, tricks):
+        state = hold_round(rng, plays=tricks * 4)
+        remaining = evaluator.get_evaluator().remaining_points(state)
+        assert all(r >= 0 for r in remaining)
+        assert sum(remaining) == pytest.approx(_points_out(state))
+        assert sum(evaluator.get_evaluator().estimate(state)) == pytest.approx(26)
+
+    def test_fit_recovers_linear_weights(self):
+        rng = random.Random(3)
+        true = [rng.uniform(-2, 2) for _ in FEATURES]
+        rows = [[1.0] + [rng.random() for _ in FEATURES[1:]] for _ in range(400)]
+        targets = [sum(w * x for w, x in zip(true, row)) for row in rows]
+        fitted = evaluator.fit(rows, targets, ridge=0)
+        assert fitted == pytest.approx(true, abs=1e-6)
+
+    def test_save_and_load_round_trip(self, tmp_path):
+        path = str(tmp_path / "weights.json")
+        Evaluator([0.5] * len(FEATURES)).save(path, rounds=7)
+        assert Evaluator.load(path).weights == (0.5,) * len(FEATURES)
+        assert json.loads(open(path).read())["rounds"] == 7
+
+    def test_weights_for_other_features_are_rejected(self, tmp_path):
+        path = tmp_path / "weights.json"
+        path.write_text(json.dumps({"features": ["bias"], "weights": [1.0]}))
+        with pytest.raises(ValueError):
+            Evaluator.load(str(path))
+
+
+class TestRolloutCutoff:
+    def test_rollout_stops_at_the_trick_boundary(self, rng):
+        state = hold_round(rng, plays=8)
+        ev = evaluator.get_evaluator()
+        seen = []
+
+        class _Recording(Evaluator):
+            def estimate(self, state):
+                seen.append(state)
+                return ev.estimate(state)
+
+        scores = _simulate_remaining(
+            state,
+            MediumPlayStrategy(rng=random.Random(0)),
+            stop_after=5,
+            evaluator=_Recording(ev.weights),
+        )
+        (stopped,) = seen
+        assert stopped.tricks_completed == 5
+        assert stopped.current_trick == ()
+        assert sum(scores) == pytest.approx(26)
+
+    def test_hard_play_with_cutoff_picks_a_legal_card(self, rng):
+        state = hold_round(rng, plays=12)
+        player = state.whose_turn
+        legal = list(state.legal_plays)
+        strat = HardPlayStrategy(rng=random.Random(1), num_worlds=5, rollout_tricks=2)
+        assert strat.choose_play(state, player, legal) in legal
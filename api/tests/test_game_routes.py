@@ -56,6 +56,33 @@ class TestStartGame:
         assert isinstance(data["game_id"], str)
         assert len(data["game_id"]) == 32
 
+    def test_start_rejects_unknown_difficulty(self, client):
+        r = client.post(
+            "/games/start",
+            json={"difficulty": "expert"},
+            headers={"Content-Type": "application/json"},
+        )
+        assert r.status_code == 400
+        assert "Unknown difficulty" in r.get_json()["error"]
+
+    def test_start_normalizes_difficulty(self, client):
+        r = client.post(
+            "/games/start",
+            json={"difficulty": " Hard "},
+            headers={"Content-Type": "application/json"},
+        )
+        assert r.status_code == 201
+        state = client.get(f"/games/{r.get_json()['game_id']}").get_json()
+        assert state["difficulty"] == "hard"
+
+    def test_start_rejects_non_string_difficulty(self, client):
+        r = client.post(
+            "/games/start",
+            json={"difficulty": 3},
+            headers={"Content-Type": "application/json"},
+        )
+        assert r.status_code == 400
+
     def test_start_accepts_player_name(self, client):
         r = client.post(
             "/games/start",
@@ -413,3 +440,60 @@ class TestActiveGame:
     def test_active_game_401_without_jwt(self, client):
         r = client.get("/games/active")
         assert r.status_code == 401
+
+
+# -----------------------------------------------------------------------------
+# Player icons / cached principal
+# -----------------------------------------------------------------------------
+
+
+class TestPlayerIcons:
+    def _login(self, auth_client):
+        from tests.conftest import auth_headers
+
+        _register_verified(auth_client, "iconplayer", "icon@example.com")
+        login_r = auth_client.post(
+            "/login",
+            json={"username": "iconplayer", "password": "password123"},
+        )
+        return auth_headers(login_r.get_json()["token"])
+
+    def test_repeat_requests_skip_user_lookup(self, auth_client):
+        from tests.conftest import count_queries
+
+        headers = self._login(auth_client)
+        game_id = auth_client.post("/games/start", json={}, headers=headers).get_json()[
+            "game_id"
+        ]
+        auth_client.get(f"/games/{game_id}", headers=headers)
+
+        with count_queries() as statements:
+            r = auth_client.get(f"/games/{game_id}", headers=headers)
+        assert r.status_code == 200
+        assert r.get_json()["players"][0]["icon"] == "user"
+        assert not any("FROM users" in s for s in statements)
+
+    def test_icon_change_is_visible_immediately(self, auth_client):
+        headers = self._login(auth_client)
+        game_id = auth_client.post("/games/start", json={}, headers=headers).get_json()[
+            "game_id"
+        ]
+        auth_client.get(f"/games/{game_id}", headers=headers)
+
+        r = auth_client.patch(
+            "/profile", json={"profile_icon": "atom"}, headers=headers
+        )
+        assert r.status_code == 200
+        r = auth_client.get(f"/games/{game_id}", headers=headers)
+        assert r.get_json()["players"][0]["icon"] == "atom"
+        assert r.get_json()["players"][1]["icon"] == "robot"
+
+    def test_deleted_user_token_stops_resolving(self, auth_client):
+        headers = self._login(auth_client)
+        assert auth_client.get("/games/active", headers=headers).status_code == 200
+
+        r = auth_client.delete(
+            "/account", json={"password": "password123"}, headers=headers
+        )
+        assert r.status_code == 200
+        assert auth_client.get("/games/active", headers=headers).status_code == 401
@@ -3,6 +3,8 @@ Unit tests for Hearts engine: rules, transitions, runner.
 No full-game integration test (play to 100).
 """
 
+import json
+
 import pytest
 
 from hearts.game.card import (
@@ -19,10 +21,18 @@ from hearts.game.rules import (
     get_trick_points,
     is_valid_pass,
 )
-from hearts.game.state import GameState, Phase, PassDirection, initial_state_after_deal
+from hearts.game.state import (
+    GameState,
+    Phase,
+    PassDirection,
+    bookkeeping_from_dict,
+    bookkeeping_to_dict,
+    initial_state_after_deal,
+)
 from hearts.game.transitions import (
     apply_passes,
     apply_play,
+    apply_play_unchecked,
     apply_round_scoring,
     deal_new_round,
     _is_first_lead,
@@ -209,6 +219,121 @@ class TestApplyPlay:
         assert len(state.current_trick) == 0
         assert sum(state.round_scores) >= 0
 
+    def test_legal_plays_are_computed_once_per_state(self, state_playing_after_pass):
+        state = state_playing_after_pass
+        hand = state.hand(state.whose_turn)
+        expected = get_legal_plays(
+            hand,
+            state.trick_list(),
+            state.hearts_broken,
+            first_lead_of_round=_is_first_lead(state, hand),
+            first_trick=True,
+        )
+        assert list(state.legal_plays) == expected
+        assert state.legal_plays is state.legal_plays
+
+    def test_unchecked_play_matches_apply_play(self, state_playing_after_pass, rng):
+        checked = unchecked = state_playing_after_pass
+        for _ in range(12):
+            player = checked.whose_turn
+            card = rng.choice(checked.legal_plays)
+            checked = apply_play(checked, player, card)
+            unchecked = apply_play_unchecked(unchecked, player, card)
+            assert checked == unchecked
+
+    def test_illegal_play_still_rejected(self, state_playing_after_pass):
+        state = state_playing_after_pass
+        player = state.whose_turn
+        illegal = [c for c in state.hand(player) if c not in state.legal_plays]
+        with pytest.raises(ValueError):
+            apply_play(state, player, illegal[0])
+
+
+class TestRoundBookkeeping:
+    def test_incremental_fields_match_a_rescan(self, state_playing_after_pass, rng):
+        state = state_playing_after_pass
+        voids = [set(), set(), set(), set()]
+        played_by = [0, 0, 0, 0]
+        for _ in range(52):
+            player = state.whose_turn
+            card = rng.choice(state.legal_plays)
+            if state.current_trick and card.suit != state.current_trick[0][1].suit:
+                voids[player].add(state.current_trick[0][1].suit)
+            played_by[player] |= 1 << card.index
+            state = apply_play(state, player, card)
+
+            derived = GameState(
+                round=state.round,
+                phase=state.phase,
+                pass_direction=state.pass_direction,
+                hands=state.hands,
+                current_trick=state.current_trick,
+                whose_turn=state.whose_turn,
+                scores=state.scores,
+                round_scores=state.round_scores,
+                hearts_broken=state.hearts_broken,
+                game_over=state.game_over,
+                played_by=state.played_by,
+                known_voids=state.known_voids,
+                passed_cards=state.passed_cards,
+            )
+            assert state == derived
+            assert state.known_voids == tuple(frozenset(v) for v in voids)
+            assert state.played_by == tuple(played_by)
+        assert state.tricks_completed == 13
+        assert state.played_mask == (1 << 52) - 1
+        assert state.highest_outstanding == (0, 0, 0, 0)
+
+    def test_bookkeeping_json_round_trip(self, state_playing_after_pass, rng):
+        state = state_playing_after_pass
+        for _ in range(30):
+            state = apply_play(state, state.whose_turn, rng.choice(state.legal_plays))
+        saved = json.loads(json.dumps(bookkeeping_to_dict(state)))
+        restored = bookkeeping_from_dict(saved)
+        assert restored == {
+            "played_by": state.played_by,
+            "known_voids": state.known_voids,
+            "passed_cards": state.passed_cards,
+        }
+
+    def test_bookkeeping_missing_from_older_saves_is_derived(self):
+        assert bookkeeping_from_dict({}) == {
+            "played_by": None,
+            "known_voids": None,
+            "passed_cards": ((), (), (), ()),
+        }
+
+    def test_highest_outstanding_steps_past_played_cards(self):
+        hands = [
+            [Card(Suit.SPADES, 14), Card(Suit.CLUBS, 2)],
+            [Card(Suit.SPADES, 13), Card(Suit.CLUBS, 3)],
+            [Card(Suit.SPADES, 9), Card(Suit.CLUBS, 4)],
+            [Card(Suit.SPADES, 12), Card(Suit.CLUBS, 5)],
+        ]
+        state = GameState(
+            round=1,
+            phase=Phase.PLAYING,
+            pass_direction=PassDirection.LEFT,
+            hands=tuple(tuple(h) for h in hands),
+            current_trick=(),
+            whose_turn=1,
+            scores=(0, 0, 0, 0),
+            round_scores=(0, 0, 0, 0),
+            hearts_broken=False,
+            game_over=False,
+        )
+        # Every card outside these hands counts as played.
+        assert state.highest_outstanding[Suit.SPADES] == 14
+        assert state.highest_outstanding[Suit.HEARTS] == 0
+        state = apply_play(state, 1, Card(Suit.SPADES, 13))
+        assert state.highest_outstanding[Suit.SPADES] == 14
+        state = apply_play(state, 2, Card(Suit.SPADES, 9))
+        state = apply_play(state, 3, Card(Suit.SPADES, 12))
+        state = apply_play(state, 0, Card(Suit.SPADES, 14))
+        assert state.highest_outstanding[Suit.SPADES] == 0
+        assert state.is_played(Card(Suit.SPADES, 12))
+        assert not state.is_played(Card(Suit.CLUBS, 2))
+
 
 class TestHeartsBreaking:
     def test_playing_heart_breaks_hearts(self):
@@ -737,6 +862,20 @@ class TestRoundBoundary:
 
 
 class TestRunnerSerialization:
+    def test_round_trip_preserves_known_voids(self):
+        rng = __import__("random").Random(5)
+        runner = GameRunner.new_game(
+            RandomPassStrategy(rng=rng), RandomPlayStrategy(rng=rng), rng=rng
+        )
+        runner.submit_pass(list(runner.state.hand(0)[:3]))
+        while not any(runner.state.known_voids) and not runner.state.game_over:
+            if runner.state.whose_turn == 0:
+                runner.submit_play(runner.state.legal_plays[0])
+            else:
+                runner.advance_to_human_turn()
+        restored = GameRunner.from_json(runner.to_json())
+        assert restored.state == runner.state
+
     def test_round_trip_preserves_frontend_state(self):
         rng = __import__("random").Random(99)
         runner = GameRunner.new_game(
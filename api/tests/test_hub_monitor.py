@@ -0,0 +1,60 @@
+"""
+Tests for the eventlet hub lag monitor.
+"""
+
+import logging
+import threading
+import time
+
+import eventlet
+import pytest
+
+from hearts import hub_monitor
+from hearts.hub_monitor import HubMonitor
+
+
+@pytest.fixture(autouse=True)
+def _reset():
+    hub_monitor.reset_hub_monitor()
+    yield
+    hub_monitor.reset_hub_monitor()
+
+
+def test_sampler_measures_a_blocked_hub():
+    monitor = HubMonitor(interval=0.01, threshold=0.1)
+    sampler = eventlet.spawn(monitor.sample_forever)
+    try:
+        eventlet.sleep(0.05)
+        # time.sleep is not patched here, so this holds the hub.
+        eventlet.spawn(time.sleep, 0.2)
+        eventlet.sleep(0.3)
+    finally:
+        sampler.kill()
+    assert monitor.samples > 2
+    assert monitor.stalls >= 1
+    assert monitor.lag_max >= 0.1
+
+
+def test_watchdog_logs_the_blocking_stack_once_per_stall(caplog):
+    monitor = HubMonitor(interval=0.01, threshold=0.1)
+    monitor.hub_thread_id = threading.get_ident()
+    monitor.heartbeat = time.monotonic() - 1.0
+    with caplog.at_level(logging.WARNING, logger="hearts.hub_monitor"):
+        assert monitor.check(time.monotonic()) is True
+        assert monitor.check(time.monotonic()) is False
+    assert len(caplog.records) == 1
+    assert "test_watchdog_logs_the_blocking_stack_once_per_stall" in caplog.text
+
+    monitor.record(0.0)
+    assert monitor.in_stall is False
+    assert monitor.check(time.monotonic()) is False
+
+
+def test_health_and_metrics_report_lag(client):
+    body = client.get("/health").get_json()
+    assert body["event_loop"] == {"running": False}
+
+    hub_monitor.HubMonitor(interval=0.1, threshold=0.25).record(0.3)
+    text = client.get("/metrics").get_data(as_text=True)
+    assert "hearts_eventlet_hub_lag_seconds_bucket" in text
+    assert "hearts_eventlet_hub_stalls_total" in text
@@ -0,0 +1,315 @@
+"""
+Tests for leaderboard routes: GET /leaderboard and the in-memory store behind it.
+"""
+
+import pytest
+from unittest.mock import patch
+
+from tests.conftest import make_jwt, auth_headers, count_queries
+
+
+@pytest.fixture(autouse=True)
+def _reset_leaderboard():
+    """Start each test with an unbuilt leaderboard store."""
+    from hearts.leaderboard import reset_store
+    from hearts.stats_routes import reset_recorded_games
+
+    reset_store()
+    reset_recorded_games()
+    yield
+    reset_store()
+    reset_recorded_games()
+
+
+def _create_user_and_token(auth_client, username):
+    """Register a user and return (user_id, jwt_token)."""
+    with patch("hearts.auth_routes.send_verification_email"):
+        r = auth_client.post(
+            "/register",
+            json={
+                "username": username,
+                "email": f"{username}@example.com",
+                "password": "password123",
+            },
+        )
+    user = r.get_json()["user"]
+    token = make_jwt(user["id"], username=user["username"], email=user["email"])
+    return user["id"], token
+
+
+def _record_wins(auth_client, token, count, difficulty="easy", prefix="g"):
+    for i in range(count):
+        r = auth_client.post(
+            "/stats/record",
+            json={
+                "game_id": f"{prefix}-{difficulty}-{i}",
+                "final_score": 20,
+                "won": True,
+                "difficulty": difficulty,
+            },
+            headers=auth_headers(token),
+        )
+        assert r.status_code == 200
+
+
+def _usernames(entries):
+    return [(e["username"], e["games_won"]) for e in entries]
+
+
+class TestGetLeaderboard:
+    def test_invalid_category_returns_400(self, auth_client):
+        r = auth_client.get("/leaderboard?category=nope")
+        assert r.status_code == 400
+
+    def test_empty_boards(self, auth_client):
+        r = auth_client.get("/leaderboard?category=easy")
+        assert r.status_code == 200
+        assert r.get_json() == {"monthly": [], "all_time": []}
+
+    def test_orders_by_wins_then_user_id(self, auth_client):
+        _, alice = _create_user_and_token(auth_client, "alice")
+        _, bob = _create_user_and_token(auth_client, "bob")
+        _, carol = _create_user_and_token(auth_client, "carol")
+        _record_wins(auth_client, alice, 1, prefix="a")
+        _record_wins(auth_client, bob, 3, prefix="b")
+        _record_wins(auth_client, carol, 1, prefix="c")
+
+        data = auth_client.get("/leaderboard?category=easy").get_json()
+        expected = [("bob", 3), ("alice", 1), ("carol", 1)]
+        assert _usernames(data["all_time"]) == expected
+        assert _usernames(data["monthly"]) == expected
+        assert [e["rank"] for e in data["all_time"]] == [1, 2, 3]
+
+    def test_hard_tiers_use_user_stats_columns(self, auth_client):
+        _, alice = _create_user_and_token(auth_client, "alice")
+        _record_wins(auth_client, alice, 2, difficulty="harder")
+
+        data = auth_client.get("/leaderboard?category=harder").get_json()
+        assert _usernames(data["all_time"]) == [("alice", 2)]
+        easy = auth_client.get("/leaderboard?category=easy").get_json()
+        assert easy["all_time"] == []
+
+
+class TestIncrementalUpdates:
+    def test_record_updates_built_board_without_rebuild(self, auth_client):
+        _, alice = _create_user_and_token(auth_client, "alice")
+        _, bob = _create_user_and_token(auth_client, "bob")
+        _record_wins(auth_client, alice, 2, prefix="a")
+        auth_client.get("/leaderboard?category=easy")
+
+        _record_wins(auth_client, bob, 3, prefix="b")
+        with auth_client.application.app_context():
+            with count_queries() as statements:
+                data = auth_client.get("/leaderboard?category=easy").get_json()
+
+        assert _usernames(data["all_time"]) == [("bob", 3), ("alice", 2)]
+        assert _usernames(data["monthly"]) == [("bob", 3), ("alice", 2)]
+        # Only bob's display info is fetched; no win counts are re-aggregated.
+        assert not any("game_results" in s for s in statements)
+        assert not any("difficulty_stats" in s for s in statements)
+
+    def test_losses_do_not_enter_board(self, auth_client):
+        _, alice = _create_user_and_token(auth_client, "alice")
+        auth_client.get("/leaderboard?category=easy")
+        r = auth_client.post(
+            "/stats/record",
+            json={"game_id": "loss", "final_score": 90, "won": False},
+            headers=auth_headers(alice),
+        )
+        assert r.status_code == 200
+        data = auth_client.get("/leaderboard?category=easy").get_json()
+        assert data["all_time"] == []
+
+    def test_profile_icon_change_is_reflected(self, auth_client):
+        _, alice = _create_user_and_token(auth_client, "alice")
+        _record_wins(auth_client, alice, 1)
+        auth_client.get("/leaderboard?category=easy")
+
+        r = auth_client.patch(
+            "/profile", json={"profile_icon": "atom"}, headers=auth_headers(alice)
+        )
+        assert r.status_code == 200
+        data = auth_client.get("/leaderboard?category=easy").get_json()
+        assert data["all_time"][0]["profile_icon"] == "atom"
+
+    def test_deleted_account_disappears(self, auth_client):
+        _, alice = _create_user_and_token(auth_client, "alice")
+        _, bob = _create_user_and_token(auth_client, "bob")
+        _record_wins(auth_client, alice, 1, prefix="a")
+        _record_wins(auth_client, bob, 1, prefix="b")
+        auth_client.get("/leaderboard?category=easy")
+
+        r = auth_client.delete(
+            "/account",
+            json={"password": "password123"},
+            headers=auth_headers(alice),
+        )
+        assert r.status_code == 200
+        data = auth_client.get("/leaderboard?category=easy").get_json()
+        assert _usernames(data["all_time"]) == [("bob", 1)]
+
+    def test_rebuild_picks_up_direct_db_writes(self, auth_client):
+        from hearts import leaderboard
+        from hearts.extensions import db
+        from hearts.models import DifficultyStats
+
+        alice_id, alice = _create_user_and_token(auth_client, "alice")
+        _record_wins(auth_client, alice, 1)
+        auth_client.get("/leaderboard?category=easy")
+
+        with auth_client.application.app_context():
+            ds = DifficultyStats.query.filter_by(
+                user_id=alice_id, category="easy"
+            ).first()
+            ds.games_won = 7
+            db.session.commit()
+
+        data = auth_client.get("/leaderboard?category=easy").get_json()
+        assert data["all_time"][0]["games_won"] == 1
+
+        leaderboard.invalidate()
+        data = auth_client.get("/leaderboard?category=easy").get_json()
+        assert data["all_time"][0]["games_won"] == 7
+
+
+class TestHttpCaching:
+    def test_sets_etag_and_cache_control(self, auth_client):
+        r = auth_client.get("/leaderboard?category=easy")
+        assert r.status_code == 200
+        assert r.headers["ETag"].startswith('"')
+        assert "public" in r.headers["Cache-Control"]
+        assert "max-age=" in r.headers["Cache-Control"]
+
+    def test_matching_if_none_match_returns_304(self, auth_client):
+        etag = auth_client.get("/leaderboard?category=easy").headers["ETag"]
+        r = auth_client.get(
+            "/leaderboard?category=easy", headers={"If-None-Match": etag}
+        )
+        assert r.status_code == 304
+        assert r.data == b""
+
+    def test_etag_changes_only_for_the_updated_category(self, auth_client):
+        _, alice = _create_user_and_token(auth_client, "alice")
+        easy = auth_client.get("/leaderboard?category=easy").headers["ETag"]
+        medium = auth_client.get("/leaderboard?category=medium").headers["ETag"]
+
+        _record_wins(auth_client, alice, 1, difficulty="easy")
+
+        r = auth_client.get(
+            "/leaderboard?category=easy", headers={"If-None-Match": easy}
+        )
+        assert r.status_code == 200
+        assert r.headers["ETag"] != easy
+        assert _usernames(r.get_json()["all_time"]) == [("alice", 1)]
+        r = auth_client.get(
+            "/leaderboard?category=medium", headers={"If-None-Match": medium}
+        )
+        assert r.status_code == 304
+
+    def test_etag_is_stable_across_rebuilds(self, auth_client):
+        from hearts import leaderboard
+
+        _, alice = _create_user_and_token(auth_client, "alice")
+        _record_wins(auth_client, alice, 1)
+        etag = auth_client.get("/leaderboard?category=easy").headers["ETag"]
+
+        leaderboard.invalidate()
+        r = auth_client.get(
+            "/leaderboard?category=easy", headers={"If-None-Match": etag}
+        )
+        assert r.status_code == 304
+
+
+# -----------------------------------------------------------------------------
+# POST /leaderboard/reset-month
+# -----------------------------------------------------------------------------
+
+ADMIN_KEY = "test-admin-key"
+
+
+def _reset_month(auth_client):
+    return auth_client.post(
+        "/leaderboard/reset-month", headers={"X-Admin-Key": ADMIN_KEY}
+    )
+
+
+class TestResetMonth:
+    @pytest.fixture(autouse=True)
+    def _admin_key(self, monkeypatch):
+        monkeypatch.setenv("ADMIN_KEY", ADMIN_KEY)
+
+    def test_rejects_wrong_admin_key(self, auth_client):
+        r = auth_client.post("/leaderboard/reset-month", headers={"X-Admin-Key": "no"})
+        assert r.status_code == 403
+
+    def test_rolls_up_month_and_awards_monthly_star(self, auth_client):
+        from hearts.leaderboard import first_of_month
+        from hearts.models import MonthlyResult, UserStats
+
+        alice_id, alice = _create_user_and_token(auth_client, "alice")
+        _record_wins(auth_client, alice, 2)
+        auth_client.post(
+            "/stats/record",
+            json={"game_id": "loss", "final_score": 90, "won": False},
+            headers=auth_headers(alice),
+        )
+
+        r = _reset_month(auth_client)
+        assert r.status_code == 200
+        assert r.get_json()["awarded"] == 1
+        # Running it again replaces the rollup rather than adding to it.
+        r = _reset_month(auth_client)
+        assert r.get_json()["awarded"] == 0
+
+        with auth_client.application.app_context():
+            rollups = MonthlyResult.query.filter_by(user_id=alice_id).all()
+            assert [(m.difficulty, m.games_played, m.games_won) for m in rollups] == [
+                ("easy", 3, 2)
+            ]
+            assert rollups[0].month == first_of_month().date()
+            stats = UserStats.query.filter_by(user_id=alice_id).first()
+            assert stats.monthly_star is True
+
+    def test_prunes_raw_rows_past_retention(self, auth_client):
+        from datetime import timedelta
+
+        from hearts.extensions import db
+        from hearts.leaderboard import first_of_month
+        from hearts.models import GameResult, MonthlyResult
+        from hearts.result_history import add_months
+
+        alice_id, _ = _create_user_and_token(auth_client, "alice")
+        retention = auth_client.application.config["GAME_RESULT_RETENTION_MONTHS"]
+        current = first_of_month()
+        old_month = add_months(current, -(retention + 2))
+        kept_month = add_months(current, -retention)
+
+        with auth_client.application.app_context():
+            for when, won in [
+                (old_month + timedelta(days=3), True),
+                (old_month + timedelta(days=9), False),
+                (kept_month + timedelta(hours=1), True),
+                (current + timedelta(minutes=1), True),
+            ]:
+                db.session.add(
+                    GameResult(
+                        user_id=alice_id,
+                        difficulty="medium",
+                        won=won,
+                        completed_at=when,
+                    )
+                )
+            db.session.commit()
+
+        r = _reset_month(auth_client)
+        assert r.status_code == 200
+        assert r.get_json()["pruned"] == 2
+
+        with auth_client.application.app_context():
+            remaining = sorted(g.completed_at for g in GameResult.query.all())
+            assert [d.replace(day=1, hour=0, minute=0) for d in remaining] == [
+                kept_month,
+                current,
+            ]
+            old = MonthlyResult.query.filter_by(month=old_month.date()).one()
+            assert (old.games_played, old.games_won) == (2, 1)
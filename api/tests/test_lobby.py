@@ -208,6 +208,17 @@ class TestStartGame:
         with pytest.raises(ValueError, match="already started"):
             start_game(lobby.code, "easy")
 
+    def test_accepts_difficulty_in_any_case(self):
+        lobby = create_lobby("Host")
+        start_game(lobby.code, " Medium ")
+        assert lobby.status == "playing"
+
+    def test_raises_for_unknown_difficulty(self):
+        lobby = create_lobby("Host")
+        with pytest.raises(ValueError, match="Unknown difficulty"):
+            start_game(lobby.code, "expert")
+        assert lobby.status == "waiting"
+
 
 class TestExpiration:
     def test_get_lobby_returns_none_for_expired(self):
@@ -0,0 +1,100 @@
+"""
+Tests for the in-process metrics registry and GET /metrics.
+"""
+
+import re
+
+import pytest
+
+from hearts import metrics
+
+
+def _sample(text, name, **labels):
+    """Value of the sample *name* with exactly *labels*, or None."""
+    label_str = ",".join(f'{k}="{v}"' for k, v in labels.items())
+    pattern = (
+        "^" + re.escape(name + (f"{{{label_str}}}" if labels else "")) + r" (\S+)$"
+    )
+    match = re.search(pattern, text, re.MULTILINE)
+    return float(match.group(1)) if match else None
+
+
+class TestRegistry:
+    def test_counter_and_labels(self):
+        c = metrics.counter("test_events_total", "Events", ("kind",))
+        c.labels("a").inc()
+        c.labels("a").inc(2)
+        c.labels("b").inc()
+        text = metrics.render()
+        assert "# TYPE test_events_total counter" in text
+        assert _sample(text, "test_events_total", kind="a") == 3
+        assert _sample(text, "test_events_total", kind="b") == 1
+
+    def test_histogram_buckets_are_cumulative(self):
+        h = metrics.histogram("test_latency_seconds", "Latency", buckets=(0.1, 1.0))
+        for value in (0.05, 0.1, 0.5, 3.0):
+            h.observe(value)
+        text = metrics.render()
+        assert _sample(text, "test_latency_seconds_bucket", le="0.1") == 2
+        assert _sample(text, "test_latency_seconds_bucket", le="1") == 3
+        assert _sample(text, "test_latency_seconds_bucket", le="+Inf") == 4
+        assert _sample(text, "test_latency_seconds_count") == 4
+        assert _sample(text, "test_latency_seconds_sum") == pytest.approx(3.65)
+
+    def test_label_count_is_checked(self):
+        h = metrics.histogram("test_labelled_seconds", "Latency", ("a", "b"))
+        with pytest.raises(ValueError):
+            h.labels("only-one")
+
+    def test_failing_gauge_is_skipped(self):
+        def broken():
+            raise RuntimeError("boom")
+
+        metrics.gauge("test_broken", "Broken", broken)
+        assert "test_broken" not in metrics.render()
+
+    def test_gauges_are_labelled_by_their_callback_only(self):
+        g = metrics.gauge("test_sizes", "Sizes", lambda: {("x",): 2}, ("store",))
+        assert not hasattr(g, "labels")
+        assert _sample(metrics.render(), "test_sizes", store="x") == 2
+
+
+class TestEndpoint:
+    def test_http_requests_and_saves_are_recorded(self, client):
+        r = client.post("/games/start", json={"seed": 1})
+        assert r.status_code == 201
+
+        r = client.get("/metrics")
+        assert r.status_code == 200
+        assert r.content_type.startswith("text/plain; version=0.0.4")
+        text = r.get_data(as_text=True)
+        assert (
+            _sample(
+                text,
+                "hearts_http_request_duration_seconds_count",
+                method="POST",
+                endpoint="/games/start",
+                status="201",
+            )
+            >= 1
+        )
+        assert _sample(text, "hearts_save_game_duration_seconds_count", mode="single")
+        assert _sample(text, "hearts_game_store_size") >= 1
+        assert "hearts_db_pool_checked_out" in text
+
+    def test_socket_events_are_recorded(self, client):
+        from hearts import app, socketio
+
+        sock = socketio.test_client(app, namespace="/game", flask_test_client=client)
+        assert not sock.is_connected(namespace="/game")  # no game_id: rejected
+
+        text = client.get("/metrics").get_data(as_text=True)
+        assert (
+            _sample(
+                text,
+                "hearts_socket_event_duration_seconds_count",
+                namespace="/game",
+                event="connect",
+            )
+            >= 1
+        )
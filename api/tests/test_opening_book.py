@@ -0,0 +1,161 @@
+"""
+Tests for the hard AI's opening book and the self-play driver that builds it.
+"""
+
+import random
+from dataclasses import replace
+
+import pytest
+
+from hearts.ai import opening_book, selfplay
+from hearts.ai.hard_ai import HardPlayStrategy
+from hearts.ai.opening_book import OpeningBook
+from hearts.ai.profiling import DecisionProfiler
+from hearts.ai.random_ai import RandomPassStrategy, RandomPlayStrategy
+from hearts.game.card import Card, Suit
+from hearts.game.state import GameState, Phase, PassDirection
+
+
+@pytest.fixture(autouse=True)
+def _reset():
+    opening_book.reset_opening_book()
+    yield
+    opening_book.reset_opening_book()
+
+
+def _first_trick_follow() -> GameState:
+    """Player 2 to follow 2♣, 9♣ holding 3♣, 8♣, J♣ and Q♠."""
+    rest = [
+        Card(suit, rank)
+        for suit in (Suit.DIAMONDS, Suit.SPADES, Suit.HEARTS)
+        for rank in range(2, 15)
+        if Card(suit, rank) != Card(Suit.SPADES, 12)
+    ]
+    hands = [
+        [Card(Suit.CLUBS, r) for r in (4, 5, 6)] + rest[:9],
+        [Card(Suit.CLUBS, r) for r in (7, 10, 13)] + rest[9:18],
+        [Card(Suit.CLUBS, r) for r in (3, 8, 11)]
+        + [Card(Suit.SPADES, 12)]
+        + rest[18:27],
+        [Card(Suit.CLUBS, 14)] + rest[27:38],
+    ]
+    return GameState(
+        round=1,
+        phase=Phase.PLAYING,
+        pass_direction=PassDirection.LEFT,
+        hands=tuple(tuple(h) for h in hands),
+        current_trick=((0, Card(Suit.CLUBS, 2)), (1, Card(Suit.CLUBS, 9))),
+        whose_turn=2,
+        scores=(0, 0, 0, 0),
+        round_scores=(0, 0, 0, 0),
+        hearts_broken=False,
+        game_over=False,
+    )
+
+
+class TestKeysAndActions:
+    def test_first_trick_follow_key(self):
+        state = _first_trick_follow()
+        key = opening_book.situation_key(state, 2, state.legal_plays)
+        assert key == bytes([opening_book.FIRST_TRICK_FOLLOW, 2, 9, 1, 3, 11, 8])
+
+    def test_forced_and_midround_plays_are_not_covered(self):
+        state = _first_trick_follow()
+        assert opening_book.situation_key(state, 2, state.legal_plays[:1]) is None
+        later = replace(state, tricks_completed=5)
+        assert opening_book.situation_key(later, 2, later.legal_plays) is None
+
+    @pytest.mark.parametrize("rank", [3, 8, 11])
+    def test_actions_round_trip(self, rank):
+        state = _first_trick_follow()
+        legal, trick = state.legal_plays, state.current_trick
+        card = Card(Suit.CLUBS, rank)
+        action = opening_book.encode_action(card, legal, trick)
+        assert opening_book.decode_action(action, legal, trick) == card
+
+    def test_duck_is_relative_to_the_trick(self):
+        state = _first_trick_follow()
+        legal, trick = state.legal_plays, state.current_trick
+        action = opening_book.encode_action(Card(Suit.CLUBS, 8), legal, trick)
+        higher = ((0, Card(Suit.CLUBS, 2)), (1, Card(Suit.CLUBS, 13)))
+        assert opening_book.decode_action(action, legal, higher) == Card(Suit.CLUBS, 11)
+
+
+class TestBookFile:
+    def test_write_and_lookup(self, tmp_path):
+        path = str(tmp_path / "book.bin")
+        entries = {bytes([3, i]): i for i in range(100)}
+        assert opening_book.write_book(path, entries) == 100
+        book = OpeningBook(path)
+        assert len(book) == 100
+        assert all(book.lookup(k) == v for k, v in entries.items())
+        assert book.lookup(b"missing") is None
+        book.close()
+
+    def test_rejects_other_files(self, tmp_path):
+        path = tmp_path / "junk.bin"
+        path.write_bytes(b"not a book at all")
+        with pytest.raises(ValueError):
+            OpeningBook(str(path))
+
+    def test_env_book_is_mapped_once(self, tmp_path, monkeypatch):
+        path = str(tmp_path / "book.bin")
+        opening_book.write_book(path, {b"k": 1})
+        monkeypatch.setenv("AI_OPENING_BOOK", path)
+        book = opening_book.get_book()
+        assert book is not None and book.lookup(b"k") == 1
+        assert opening_book.get_book() is book
+
+    def test_unset_or_unreadable_means_no_book(self, tmp_path, monkeypatch):
+        monkeypatch.delenv("AI_OPENING_BOOK", raising=False)
+        assert opening_book.get_book() is None
+        opening_book.reset_opening_book()
+        monkeypatch.setenv("AI_OPENING_BOOK", str(tmp_path / "nope.bin"))
+        assert opening_book.get_book() is None
+
+
+class TestHardPlayWithBook:
+    def test_book_hit_skips_the_search(self, tmp_path):
+        state = _first_trick_follow()
+        legal = list(state.legal_plays)
+        key = opening_book.situation_key(state, 2, legal)
+        lowest = opening_book.encode_action(Card(Suit.CLUBS, 3), legal)
+        path = str(tmp_path / "book.bin")
+        opening_book.write_book(path, {key: lowest})
+
+        strat = HardPlayStrategy(rng=random.Random(1), book=OpeningBook(path))
+        strat.profiler = DecisionProfiler("hard")
+        with strat.profiler.decision("play", state, 2, len(legal)):
+            assert strat.choose_play(state, 2, legal) == Card(Suit.CLUBS, 3)
+        (record,) = strat.profiler.records
+        assert record.counters["book_hits"] == 1
+        assert "rollout" not in record.phases
+
+    def test_generate_records_covered_decisions(self):
+        entries = opening_book.generate(4, num_worlds=2, min_visits=1, min_share=0)
+        assert entries
+        assert {key[0] for key in entries} <= {
+            opening_book.FIRST_TRICK_FOLLOW,
+            opening_book.FIRST_TRICK_DISCARD,
+            opening_book.SECOND_TRICK_LEAD,
+        }
+
+
+class TestSelfPlay:
+    def test_play_game_runs_to_game_over(self):
+        rng = random.Random(3)
+        seat = (RandomPassStrategy(rng=rng), RandomPlayStrategy(rng=rng))
+        plays = []
+        result = selfplay.play_game(
+            [seat] * 4, rng, on_play=lambda s, p, legal, c: plays.append(c)
+        )
+        assert max(result.scores) >= 100
+        assert len(plays) == 52 * result.rounds
+
+    def test_play_round_stops_after_requested_tricks(self):
+        rng = random.Random(4)
+        seat = (RandomPassStrategy(rng=rng), RandomPlayStrategy(rng=rng))
+        state = selfplay.play_round(selfplay.deal(rng), [seat] * 4, tricks=1)
+        assert state.tricks_completed == 1
+        assert state.current_trick == ()
+        assert sum(len(h) for h in state.hands) == 48